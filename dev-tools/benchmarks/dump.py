@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Benchmark dumping trees as text with py2c.tree.dump.
+
+Usage: dump.py [small|medium|large]
+"""
+
+import io
+import sys
+import timeit
+from os.path import join, realpath, dirname
+
+sys.path.insert(0, join(dirname(realpath(__file__)), "..", ".."))
+
+from sample_tree import (  # noqa
+    SIZES, NODES_PER_FUNCTION, load_nodes, build_module
+)
+from py2c.tree import dump  # noqa
+
+REPEAT = 5
+
+
+def dump_to_stream(tree, **options):
+    stream = io.StringIO()
+    dump.dump(tree, stream, **options)
+    return stream.getvalue()
+
+
+def main():
+    size = sys.argv[1] if len(sys.argv) > 1 else "medium"
+    num_functions = SIZES[size]
+    num_nodes = num_functions * NODES_PER_FUNCTION + 1
+    nodes = load_nodes()
+
+    tree = build_module(num_functions, nodes)
+    tree.finalize()
+
+    print("[py2c] Dumping a tree of {} nodes ({})".format(num_nodes, size))
+    for label, func in [
+        ("repr", lambda: repr(tree)),
+        ("indented", lambda: dump_to_stream(tree)),
+        ("indented, depth <= 3", lambda: dump_to_stream(tree, max_depth=3)),
+    ]:
+        text_size = len(func())
+        duration = min(timeit.repeat(func, number=1, repeat=REPEAT))
+        print("[py2c]   {}: {:.1f} MiB in {:.4f}s ({:.1f} MiB/s)".format(
+            label, text_size / 2**20, duration, text_size / duration / 2**20
+        ))
+
+    # Deep trees, which a recursive repr cannot handle
+    deep = nodes.Name("x")
+    for _ in range(sys.getrecursionlimit() * 10):
+        deep = nodes.Call(deep, [])
+    duration = min(timeit.repeat(lambda: repr(deep), number=1, repeat=REPEAT))
+    print("[py2c]   repr of a tree {} deep: {:.4f}s".format(
+        sys.getrecursionlimit() * 10, duration
+    ))
+
+if __name__ == '__main__':
+    main()
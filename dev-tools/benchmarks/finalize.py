@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Benchmark finalizing a tree, and re-finalizing it after a local change.
+
+The first finalization is compared with the recursive one py2c used to have,
+which neither recorded parents nor skipped finalized nodes.
+
+Usage: finalize.py [small|medium|large]
+"""
+
+import sys
+import time
+from os.path import join, realpath, dirname
+
+sys.path.insert(0, join(dirname(realpath(__file__)), "..", ".."))
+
+from sample_tree import (  # noqa
+    SIZES, NODES_PER_FUNCTION, load_nodes, build_module
+)
+from py2c.tree import Node, FinalizationError, _get_schema  # noqa
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def recursive_finalize(node):
+    """Finalize a tree like Node.finalize did before it was made iterative.
+    """
+    missing = []
+    for name, _, modifier in _get_schema(node.__class__).fields:
+        if hasattr(node, name):
+            if modifier in ('ZERO_OR_MORE', 'ONE_OR_MORE'):
+                items = tuple(getattr(node, name))
+                node._set_field_value(name, items)
+            elif modifier in ('NEEDED', 'OPTIONAL'):
+                items = [getattr(node, name)]
+
+            for item in filter(lambda x: isinstance(x, Node), items):
+                recursive_finalize(item)
+        elif modifier in ('NEEDED', 'ONE_OR_MORE'):
+            missing.append(name)
+        elif modifier == 'OPTIONAL':
+            node._set_field_value(name, None)
+        elif modifier == 'ZERO_OR_MORE':
+            node._set_field_value(name, ())
+
+    if missing:
+        raise FinalizationError(missing)
+
+
+def main():
+    size = sys.argv[1] if len(sys.argv) > 1 else "medium"
+    num_functions = SIZES[size]
+    num_nodes = num_functions * NODES_PER_FUNCTION + 1
+
+    nodes = load_nodes()
+    tree = build_module(num_functions, nodes)
+
+    def local_change():
+        # Replace the value returned by a function in the middle of the module
+        function = tree.body[num_functions // 2]
+        function.body[-1].value = nodes.Name("z")
+
+    other_tree = build_module(num_functions, nodes)
+    results = [
+        ("recursive finalize", timed(lambda: recursive_finalize(other_tree))),
+        ("first finalize", timed(tree.finalize)),
+        ("unchanged re-finalize", timed(tree.finalize)),
+        ("local change", timed(local_change)),
+        ("re-finalize after change", timed(tree.finalize)),
+    ]
+
+    print("[py2c] Finalizing a tree of {} nodes ({})".format(num_nodes, size))
+    for name, taken in results:
+        print("[py2c]   {:<26}{:.6f}s".format(name, taken))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Benchmark rewriting trees until they stop changing.
+
+Compares running a transformer over the whole tree until it changes nothing
+with a FixpointRewriter, which only revisits what changed. The rewrite rule
+folds additions of numbers before visiting their operands, so nested
+additions take many rounds to fold.
+
+Usage: fixpoint.py [small|medium|large]
+"""
+
+import sys
+import timeit
+from os.path import join, realpath, dirname
+
+sys.path.insert(0, join(dirname(realpath(__file__)), "..", ".."))
+
+from sample_tree import (  # noqa
+    SIZES, NODES_PER_FUNCTION, load_nodes, build_module
+)
+from py2c.tree.visitors import (  # noqa
+    RecursiveNodeTransformer, FixpointRewriter
+)
+
+REPEAT = 5
+# Depth of the nested additions, and the number of functions with one
+NESTING = 8
+EVERY = 50
+
+
+class AdditionFolder(RecursiveNodeTransformer):
+
+    def __init__(self, nodes):
+        super().__init__()
+        self.nodes = nodes
+
+    def visit_BinOp(self, node):
+        Num = self.nodes.Num
+        if (
+            node.op == "Add" and
+            isinstance(node.left, Num) and isinstance(node.right, Num)
+        ):
+            return Num(node.left.n + node.right.n)
+        return self.generic_visit(node)
+
+
+def build_tree(num_functions, nodes):
+    tree = build_module(num_functions, nodes)
+    for function in tree.body[::EVERY]:
+        value = nodes.Num(1)
+        for i in range(NESTING):
+            value = nodes.BinOp(nodes.Num(i), "Add", value)
+        function.body[0].value = value
+    return tree
+
+
+def main():
+    size = sys.argv[1] if len(sys.argv) > 1 else "medium"
+    num_functions = SIZES[size]
+    nodes = load_nodes(slots=True)
+    num_nodes = num_functions * NODES_PER_FUNCTION + 1
+
+    def whole_tree():
+        tree = build_tree(num_functions, nodes)
+        transformer = AdditionFolder(nodes)
+        rounds = 0
+        while True:
+            rounds += 1
+            transformer.visit(tree)
+            if not transformer.changed:
+                return rounds
+
+    def rewriter():
+        rewriter = FixpointRewriter(AdditionFolder(nodes))
+        rewriter.rewrite(build_tree(num_functions, nodes))
+        return rewriter
+
+    build = min(timeit.repeat(
+        lambda: build_tree(num_functions, nodes), number=1, repeat=REPEAT
+    ))
+    print("[py2c] Folding additions in a tree of about {} nodes ({})".format(
+        num_nodes, size
+    ))
+    print("[py2c]   whole tree each round: {} rounds".format(whole_tree()))
+    print("[py2c]   FixpointRewriter: {0.rounds} rounds, {0.revisited} "
+          "nodes revisited".format(rewriter()))
+    for label, func in [
+        ("whole tree each round", whole_tree),
+        ("FixpointRewriter", rewriter),
+    ]:
+        best = min(timeit.repeat(func, number=1, repeat=REPEAT)) - build
+        print("[py2c]   {}: {:.4f}s".format(label, best))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Benchmark the validation of identifiers, and their symbol table.
+
+Usage: identifiers.py [small|medium|large]
+"""
+
+import sys
+import timeit
+from os.path import join, realpath, dirname
+
+sys.path.insert(0, join(dirname(realpath(__file__)), "..", ".."))
+
+from sample_tree import (  # noqa
+    SIZES, NODES_PER_FUNCTION, load_nodes, build_module
+)
+from py2c.tree import Node, identifier, IdentifierTable  # noqa
+
+# The timings are small, so many are taken and the best is reported.
+NUMBER = 20
+REPEAT = 100
+
+
+def best_time_per_name(func, names):
+    times = timeit.repeat(func, number=NUMBER, repeat=REPEAT)
+    return min(times) / (NUMBER * len(names))
+
+
+def count_identifiers(tree):
+    """Count the identifiers in a tree of the sample classes.
+    """
+    table = IdentifierTable()
+    count = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        for name, type_, _ in node._fields:
+            value = getattr(node, name)
+            if not isinstance(value, (list, tuple)):
+                value = [value]
+            for elem in value:
+                if type_ is identifier:
+                    table.symbol(elem)
+                    count += 1
+                elif isinstance(elem, Node):
+                    stack.append(elem)
+    return count, len(table)
+
+
+def main():
+    size = sys.argv[1] if len(sys.argv) > 1 else "medium"
+    num_functions = SIZES[size]
+    generic = load_nodes()
+    specialized = load_nodes(slots=True, specialized=True)
+
+    # Names that have been validated before, like most names in a program
+    names = ["name_{}".format(i) for i in range(200)]
+    for name in names:
+        identifier(name)
+
+    print("[py2c] Validating known identifiers, per name")
+    for label, func in [
+        ("isinstance", lambda: [isinstance(n, identifier) for n in names]),
+        ("generic Name", lambda: [generic.Name(n) for n in names]),
+        ("specialized Name", lambda: [specialized.Name(n) for n in names]),
+    ]:
+        print("[py2c]   {}: {:.0f}ns".format(
+            label, best_time_per_name(func, names) * 1e9
+        ))
+
+    tree = build_module(num_functions, specialized)
+    tree.finalize()
+    count, distinct = count_identifiers(tree)
+    print("[py2c] A tree of {} nodes ({}) has {} identifiers, {} distinct"
+          .format(num_functions * NODES_PER_FUNCTION + 1, size, count,
+                  distinct))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Benchmark memory and equality checks of interned trees.
+
+Usage: interning.py [small|medium|large]
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+from os.path import join, realpath, dirname
+
+sys.path.insert(0, join(dirname(realpath(__file__)), "..", ".."))
+
+from sample_tree import (  # noqa
+    SIZES, NODES_PER_FUNCTION, load_nodes, build_module
+)
+from py2c.tree import InternTable  # noqa
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    size = sys.argv[1] if len(sys.argv) > 1 else "medium"
+    num_functions = SIZES[size]
+    num_nodes = num_functions * NODES_PER_FUNCTION + 1
+    nodes = load_nodes(slots=True)
+
+    gc.collect()
+    tracemalloc.start()
+    tree = build_module(num_functions, nodes)
+    tree.finalize()
+    before, _ = tracemalloc.get_traced_memory()
+    table = InternTable()
+    table.intern(tree)
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    other = build_module(num_functions, nodes)
+    other.finalize()
+    plain_eq_time = timed(lambda: tree == other)
+    intern_time = timed(lambda: table.intern(other))
+    interned_eq_time = timed(lambda: tree == other)
+
+    print("[py2c] Interning a tree of {} nodes ({})".format(num_nodes, size))
+    print("[py2c]   interning took   {:.4f}s, {} distinct nodes".format(
+        intern_time, len(table)
+    ))
+    print("[py2c]   memory           {:.2f} MiB -> {:.2f} MiB".format(
+        before / 2**20, after / 2**20
+    ))
+    print("[py2c]   equal trees ==   {:.6f}s -> {:.6f}s".format(
+        plain_eq_time, interned_eq_time
+    ))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Benchmark the construction of py2c.tree Node trees.
+
+Usage: node_construction.py [small|medium|large]
+"""
+
+import sys
+import timeit
+from os.path import join, realpath, dirname
+
+sys.path.insert(0, join(dirname(realpath(__file__)), "..", ".."))
+
+from sample_tree import (  # noqa
+    SIZES, NODES_PER_FUNCTION, load_nodes, build_module
+)
+from py2c.tree import trusted_construction  # noqa
+
+REPEAT = 5
+
+
+def build_trusted_module(num_functions, nodes):
+    with trusted_construction():
+        return build_module(num_functions, nodes)
+
+
+def main():
+    size = sys.argv[1] if len(sys.argv) > 1 else "medium"
+    num_functions = SIZES[size]
+    nodes = load_nodes()
+    num_nodes = num_functions * NODES_PER_FUNCTION + 1
+
+    print("[py2c] Constructed {} nodes ({})".format(num_nodes, size))
+    for name, builder in [
+        ("checked", build_module), ("trusted", build_trusted_module)
+    ]:
+        times = timeit.repeat(
+            lambda: builder(num_functions, nodes), number=1, repeat=REPEAT
+        )
+        best = min(times)
+        print("[py2c]   {}, best of {}: {:.4f}s ({:.2f}us/node)".format(
+            name, REPEAT, best, best / num_nodes * 1e6
+        ))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Benchmark generating many definition files with py2c.tree.node_gen.
+
+Compares regenerating all the files of a directory sequentially against
+doing so in pools of processes. Each file holds many copies of the
+definitions of the benchmarks' nodes, renamed.
+
+Usage: node_gen_parallel.py [number of files] [copies per file]
+"""
+
+import io
+import os
+import re
+import sys
+import shutil
+import timeit
+import tempfile
+import contextlib
+from os.path import join, realpath, dirname
+
+sys.path.insert(0, join(dirname(realpath(__file__)), "..", ".."))
+
+from sample_tree import DEFINITIONS  # noqa
+from py2c.tree import node_gen  # noqa
+
+REPEAT = 5
+
+
+def write_definitions(directory, num_files, copies):
+    for i in range(num_files):
+        text = "\n".join(
+            # Suffix the names of the nodes, but not "Node" or the types
+            re.sub(r"\b(?!Node\b|identifier\b|int\b)([A-Za-z]+)\b",
+                   r"\1_{}_{}".format(i, j), DEFINITIONS)
+            for j in range(copies)
+        )
+        with open(join(directory, "tree_{}.tree".format(i)), "w") as f:
+            f.write(text)
+
+
+def main():
+    num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    copies = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    directory = tempfile.mkdtemp()
+    try:
+        write_definitions(directory, num_files, copies)
+
+        def func(processes):
+            def generate():
+                # Keep the reports from drowning out the results
+                with contextlib.redirect_stdout(io.StringIO()):
+                    node_gen.generate(
+                        directory, update=True, processes=processes
+                    )
+            return generate
+
+        print("[py2c] Generating {} files of {} definitions ({} CPUs)".format(
+            num_files, copies * DEFINITIONS.count(":"), os.cpu_count()
+        ))
+        for processes in [1, 2, 4]:
+            best = min(timeit.repeat(func(processes), number=1, repeat=REPEAT))
+            print("[py2c]   {} process(es): {:.4f}s".format(processes, best))
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Benchmark starting up the parser of py2c.tree.node_gen.
+
+Compares the hand-written `Parser` against `PlyParser`, which builds it's
+lexer and LALR tables when it's created. Startup is timed in fresh
+interpreters (importing node_gen, creating a parser and parsing the
+definitions of the benchmarks' nodes once, after py2c.tree is imported) and
+in this one.
+
+Usage: node_gen_startup.py
+"""
+
+import sys
+import timeit
+import subprocess
+from os.path import join, realpath, dirname
+
+sys.path.insert(0, join(dirname(realpath(__file__)), "..", ".."))
+
+from sample_tree import DEFINITIONS  # noqa
+from py2c.tree import node_gen  # noqa
+
+REPEAT = 5
+
+# Run in a fresh interpreter, with the repository on the path
+STARTUP_CODE = """
+import sys, time
+sys.path.insert(0, {root!r})
+import py2c.tree
+start = time.perf_counter()
+from py2c.tree import node_gen
+node_gen.{parser}().parse({text!r})
+print(time.perf_counter() - start)
+"""
+
+
+def time_startup(parser_name):
+    code = STARTUP_CODE.format(
+        root=join(dirname(realpath(__file__)), "..", ".."),
+        parser=parser_name,
+        text=DEFINITIONS,
+    )
+    return min(
+        float(subprocess.check_output([sys.executable, "-c", code]))
+        for _ in range(REPEAT)
+    )
+
+
+def main():
+    print("[py2c] Starting the parser of node_gen")
+    for parser_class in [node_gen.PlyParser, node_gen.Parser]:
+        name = parser_class.__name__
+        print("[py2c]   {}".format(name))
+
+        best = time_startup(name)
+        print("[py2c]     import, create and parse: {:.2f}ms".format(
+            best * 1e3
+        ))
+
+        best = min(timeit.repeat(parser_class, number=1, repeat=REPEAT))
+        print("[py2c]     create: {:.2f}ms".format(best * 1e3))
+
+        parser = parser_class()
+        best = min(timeit.repeat(
+            lambda: parser.parse(DEFINITIONS), number=10, repeat=REPEAT
+        )) / 10
+        print("[py2c]     parse: {:.2f}ms".format(best * 1e3))
+
+if __name__ == '__main__':
+    main()
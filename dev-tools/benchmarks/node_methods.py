@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks of Node's generic methods against node_gen's specialized.
+
+Usage: node_methods.py
+"""
+
+import sys
+import timeit
+from os.path import join, realpath, dirname
+
+sys.path.insert(0, join(dirname(realpath(__file__)), "..", ".."))
+
+from sample_tree import load_nodes, build_function  # noqa
+
+NUMBER = 20000
+REPEAT = 5
+
+# name -> (setup, statement)
+BENCHMARKS = [
+    ("__init__ (positional)", "", "n.BinOp(left, 'Add', right)"),
+    ("__init__ (keyword)", "", "n.BinOp(left=left, op='Add', right=right)"),
+    ("__eq__ (leaf)", "other = n.Num(1)", "num == other"),
+    ("__eq__ (function)", "a, b = func(n, 1), func(n, 1)", "a == b"),
+    (
+        "__eq__ (hashed, unequal)",
+        "a, b = func(n, 1), func(n, 2); a.finalize(); b.finalize(); "
+        "hash(a); hash(b)",
+        "a == b"
+    ),
+]
+
+
+def run(nodes, setup, statement):
+    namespace = {
+        "n": nodes, "func": build_function,
+        "left": nodes.Name("x"), "right": nodes.Num(1), "num": nodes.Num(1),
+    }
+    exec(setup, namespace)
+    times = timeit.repeat(
+        eval("lambda: " + statement, namespace), number=NUMBER, repeat=REPEAT
+    )
+    return min(times) / NUMBER
+
+
+def main():
+    generic = load_nodes()
+    specialized = load_nodes(specialized=True)
+
+    print("[py2c] {:<24}{:>12}{:>14}{:>9}".format(
+        "", "generic", "specialized", "speedup"
+    ))
+    for name, setup, statement in BENCHMARKS:
+        generic_time = run(generic, setup, statement)
+        specialized_time = run(specialized, setup, statement)
+        print("[py2c] {:<24}{:>10.2f}us{:>12.2f}us{:>8.2f}x".format(
+            name, generic_time * 1e6, specialized_time * 1e6,
+            generic_time / specialized_time
+        ))
+
+if __name__ == '__main__':
+    main()
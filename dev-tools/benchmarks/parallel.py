@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Benchmark visiting the top-level statements of a tree in parallel.
+
+Compares visiting a module with one visitor against visit_in_parallel, with
+a pool of processes made for each call (which inherit the tree) and with one
+that is reused (which is sent the nodes).
+
+Usage: parallel.py [small|medium|large] [processes]
+"""
+
+import sys
+import timeit
+import concurrent.futures
+from os.path import join, realpath, dirname
+
+sys.path.insert(0, join(dirname(realpath(__file__)), "..", ".."))
+
+from sample_tree import (  # noqa
+    SIZES, NODES_PER_FUNCTION, load_nodes, build_module
+)
+from py2c.tree.parallel import visit_in_parallel  # noqa
+from py2c.tree.visitors import RecursiveNodeVisitor  # noqa
+
+REPEAT = 5
+
+
+class NameCounter(RecursiveNodeVisitor):
+
+    def __init__(self):
+        super().__init__()
+        self.names = {}
+
+    def visit_Name(self, node):
+        self.names[node.id] = self.names.get(node.id, 0) + 1
+
+    def merge(self, other):
+        for name, count in other.names.items():
+            self.names[name] = self.names.get(name, 0) + count
+
+
+def main():
+    size = sys.argv[1] if len(sys.argv) > 1 else "medium"
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    num_functions = SIZES[size]
+    num_nodes = num_functions * NODES_PER_FUNCTION + 1
+    # Pickled by the name of their module
+    nodes = load_nodes("benchmark_nodes", slots=True)
+    tree = build_module(num_functions, nodes)
+
+    def sequential():
+        visitor = NameCounter()
+        visitor.visit(tree)
+        return visitor.names
+
+    def parallel():
+        # The processes inherit the tree
+        return visit_in_parallel(NameCounter, tree, processes=processes).names
+
+    with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+        def parallel_executor():
+            return visit_in_parallel(
+                NameCounter, tree, processes=processes, executor=executor
+            ).names
+
+        assert sequential() == parallel() == parallel_executor()
+        print("[py2c] Visiting a tree of {} nodes ({}) with {} processes"
+              .format(num_nodes, size, processes or "all the"))
+        for label, func in [
+            ("one visitor", sequential),
+            ("visit_in_parallel", parallel),
+            ("visit_in_parallel, reused pool", parallel_executor),
+        ]:
+            best = min(timeit.repeat(func, number=1, repeat=REPEAT))
+            print("[py2c]   {}: {:.4f}s ({:.0f}ns/node)".format(
+                label, best, best / num_nodes * 1e9
+            ))
+
+if __name__ == '__main__':
+    main()
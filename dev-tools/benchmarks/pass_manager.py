@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Benchmark running passes in a single walk with a PassManager.
+
+Compares walking the tree once per pass with a PassManager walking it once
+for all of them.
+
+Usage: pass_manager.py [small|medium|large]
+"""
+
+import sys
+import timeit
+from os.path import join, realpath, dirname
+
+sys.path.insert(0, join(dirname(realpath(__file__)), "..", ".."))
+
+from sample_tree import (  # noqa
+    SIZES, NODES_PER_FUNCTION, load_nodes, build_module
+)
+from py2c.tree.visitors import (  # noqa
+    RecursiveNodeVisitor, RecursiveNodeTransformer, PassManager
+)
+
+REPEAT = 5
+
+
+class NameCounter(RecursiveNodeVisitor):
+
+    def __init__(self):
+        super().__init__()
+        self.names = 0
+
+    def visit_Name(self, node):
+        self.names += 1
+
+
+class NestingCounter(RecursiveNodeVisitor):
+
+    def __init__(self):
+        super().__init__()
+        self.depth = self.max_depth = 0
+
+    def visit_Call(self, node):
+        self.depth += 1
+        self.max_depth = max(self.depth, self.max_depth)
+        yield
+        self.depth -= 1
+
+
+class NumberFolder(RecursiveNodeTransformer):
+
+    def visit_Num(self, node):
+        return node
+
+
+PASSES = [NameCounter, NestingCounter, NumberFolder]
+
+
+def main():
+    size = sys.argv[1] if len(sys.argv) > 1 else "medium"
+    num_functions = SIZES[size]
+    num_nodes = num_functions * NODES_PER_FUNCTION + 1
+    nodes = load_nodes(slots=True)
+    tree = build_module(num_functions, nodes)
+
+    def separately(passes):
+        def func():
+            for visitor_class in passes:
+                visitor_class().visit(tree)
+        return func
+
+    def fused(passes):
+        def func():
+            PassManager([visitor_class() for visitor_class in passes]).visit(
+                tree
+            )
+        return func
+
+    print("[py2c] Running passes on a tree of {} nodes ({})".format(
+        num_nodes, size
+    ))
+    for count in range(1, len(PASSES) + 1):
+        passes = PASSES[:count]
+        for label, func in [
+            ("separate walks", separately(passes)),
+            ("one walk", fused(passes)),
+        ]:
+            best = min(timeit.repeat(func, number=1, repeat=REPEAT))
+            print("[py2c]   {} pass(es), {}: {:.4f}s ({:.0f}ns/node)".format(
+                count, label, best, best / num_nodes * 1e9
+            ))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Benchmark searching trees with the patterns of py2c.tree.query.
+
+Compares a visitor written for a search with compiled patterns, searching
+the tree itself and a NodeIndex of it.
+
+Usage: query.py [small|medium|large]
+"""
+
+import sys
+import timeit
+from os.path import join, realpath, dirname
+
+sys.path.insert(0, join(dirname(realpath(__file__)), "..", ".."))
+
+from sample_tree import (  # noqa
+    SIZES, NODES_PER_FUNCTION, load_nodes, build_module
+)
+from py2c.tree.query import Pattern, compile_pattern, NodeIndex  # noqa
+from py2c.tree.visitors import RecursiveNodeVisitor  # noqa
+
+REPEAT = 5
+# Number of searches of the tree, for the index
+SEARCHES = 10
+
+
+class LenCallFinder(RecursiveNodeVisitor):
+    """Finds calls of `len`, like Pattern(Call, func=Pattern(Name, id="len"))
+    """
+
+    def __init__(self, nodes):
+        super().__init__()
+        self.nodes = nodes
+        self.found = []
+
+    def visit_Call(self, node):
+        func = node.func
+        if isinstance(func, self.nodes.Name) and func.id == "len":
+            self.found.append(node)
+        yield
+
+
+def main():
+    size = sys.argv[1] if len(sys.argv) > 1 else "medium"
+    num_functions = SIZES[size]
+    num_nodes = num_functions * NODES_PER_FUNCTION + 1
+    nodes = load_nodes(slots=True)
+    tree = build_module(num_functions, nodes)
+    pattern = compile_pattern(
+        Pattern(nodes.Call, func=Pattern(nodes.Name, id="len"))
+    )
+
+    def visitor():
+        for _ in range(SEARCHES):
+            finder = LenCallFinder(nodes)
+            finder.visit(tree)
+        return finder.found
+
+    def search():
+        for _ in range(SEARCHES):
+            found = pattern.findall(tree)
+        return found
+
+    def search_index():
+        index = NodeIndex(tree)
+        for _ in range(SEARCHES):
+            found = pattern.findall(index)
+        return found
+
+    assert visitor() == search() == search_index()
+    print("[py2c] Searching a tree of {} nodes ({}) {} times".format(
+        num_nodes, size, SEARCHES
+    ))
+    for label, func in [
+        ("visitor", visitor),
+        ("pattern", search),
+        ("pattern, with an index", search_index),
+    ]:
+        best = min(timeit.repeat(func, number=1, repeat=REPEAT))
+        print("[py2c]   {}: {:.4f}s ({:.0f}ns/node per search)".format(
+            label, best, best / num_nodes / SEARCHES * 1e9
+        ))
+
+if __name__ == '__main__':
+    main()
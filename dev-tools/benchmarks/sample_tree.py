@@ -0,0 +1,89 @@
+"""Node classes and a synthetic program used by the benchmarks.
+
+The classes mirror a small part of Python's AST, which is enough to build
+trees with the shape (and size) of a real translated module. They are
+generated with `py2c.tree.node_gen`, so that the benchmarks can compare the
+generator's options.
+"""
+
+import sys
+from types import ModuleType, SimpleNamespace
+
+from py2c.tree import node_gen
+
+__all__ = [
+    "SIZES", "NODES_PER_FUNCTION", "DEFINITIONS", "load_nodes", "build_module"
+]
+
+# Number of top-level functions in the generated program
+SIZES = {
+    "small": 100,
+    "medium": 1000,
+    "large": 10000,
+}
+# Number of nodes in each function built by `build_function`
+NODES_PER_FUNCTION = 23
+
+DEFINITIONS = """
+Module(Node): [stmt* body]
+
+stmt(Node): []
+expr(Node): []
+
+FunctionDef(stmt): [identifier name, identifier* args, stmt+ body]
+Assign(stmt): [expr+ targets, expr value]
+Return(stmt): [expr? value]
+
+BinOp(expr): [expr left, identifier op, expr right]
+Call(expr): [expr func, expr* args]
+Name(expr): [identifier id]
+Num(expr): [int n]
+"""
+
+
+def load_nodes(module_name=None, **options):
+    """Generate the node classes, passing `options` to the SourceGenerator.
+
+    If `module_name` is given, the classes are put in a module of that name
+    (in sys.modules), so that they can be found by name, like when pickling.
+    """
+    definitions = node_gen.Parser().parse(DEFINITIONS)
+    sources = node_gen.SourceGenerator(**options).generate_sources(definitions)
+
+    if module_name is None:
+        namespace = {}
+    else:
+        module = sys.modules[module_name] = ModuleType(module_name)
+        namespace = module.__dict__
+    exec(node_gen.PREFIX + "\n\n\n" + sources, namespace)
+    return SimpleNamespace(**namespace)
+
+
+def build_function(n, i):
+    """Build a function definition with a handful of statements.
+    """
+    return n.FunctionDef(
+        "func_{}".format(i),
+        ["a", "b"],
+        [
+            n.Assign([n.Name("x")], n.BinOp(n.Name("a"), "Add", n.Num(i))),
+            n.Assign(
+                [n.Name("y")], n.Call(n.Name("len"), [n.Name("b"), n.Name("x")])
+            ),
+            n.Assign(
+                [n.Name("z")],
+                n.BinOp(n.BinOp(n.Name("x"), "Mult", n.Name("y")), "Sub", n.Num(1))
+            ),
+            n.Return(n.Call(n.Name("print"), [n.Name("z")])),
+        ]
+    )
+
+
+def build_module(num_functions, nodes=None):
+    """Build a Module with `num_functions` function definitions.
+
+    `nodes` are the classes from `load_nodes` to build the Module with.
+    """
+    if nodes is None:
+        nodes = load_nodes()
+    return nodes.Module([build_function(nodes, i) for i in range(num_functions)])
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Compare the compact serialization format with pickle for size and speed.
+
+Usage: serialization.py [small|medium|large]
+"""
+
+import sys
+import pickle
+import timeit
+from os.path import join, realpath, dirname
+
+sys.path.insert(0, join(dirname(realpath(__file__)), "..", ".."))
+
+from sample_tree import (  # noqa
+    SIZES, NODES_PER_FUNCTION, load_nodes, build_module
+)
+from py2c.tree import serialize  # noqa
+
+
+def best_time(func, repeat=5):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main():
+    size = sys.argv[1] if len(sys.argv) > 1 else "medium"
+    num_functions = SIZES[size]
+    num_nodes = num_functions * NODES_PER_FUNCTION + 1
+    # The classes need to be found by name, for loading.
+    nodes = load_nodes("sample_tree_nodes", slots=True, specialized=True)
+
+    tree = build_module(num_functions, nodes)
+    tree.finalize()
+
+    protocol = pickle.HIGHEST_PROTOCOL
+    pickled = pickle.dumps(tree, protocol)
+    serialized = serialize.dumps(tree)
+    assert serialize.loads(serialized) == tree
+
+    print("[py2c] A tree of {} nodes ({})".format(num_nodes, size))
+    print("[py2c]   size: pickle {:.1f} KiB, compact {:.1f} KiB".format(
+        len(pickled) / 2**10, len(serialized) / 2**10
+    ))
+    print("[py2c]   dump: pickle {:.4f}s, compact {:.4f}s".format(
+        best_time(lambda: pickle.dumps(tree, protocol)),
+        best_time(lambda: serialize.dumps(tree)),
+    ))
+    print("[py2c]   load: pickle {:.4f}s, compact {:.4f}s".format(
+        best_time(lambda: pickle.loads(pickled)),
+        best_time(lambda: serialize.loads(serialized)),
+    ))
+
+    if protocol >= 5:
+        buffers = []
+        in_band = pickle.dumps(
+            serialize.SerializedTree(serialized), protocol,
+            buffer_callback=buffers.append
+        )
+        out_of_band = len(buffers[0].raw())
+        print("[py2c]   pickled SerializedTree: {} B in-band, {:.1f} KiB "
+              "out-of-band".format(len(in_band), out_of_band / 2**10))
+
+if __name__ == '__main__':
+    main()
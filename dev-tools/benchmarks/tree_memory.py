@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Compare the memory used by dict-backed and slotted trees of one program.
+
+Both layouts pay for the slots py2c.tree.Node keeps for finalization (the
+state, parent and hash of each node), which are shown separately.
+
+Usage: tree_memory.py [small|medium|large]
+"""
+
+import gc
+import sys
+import struct
+import tracemalloc
+from os.path import join, realpath, dirname
+
+sys.path.insert(0, join(dirname(realpath(__file__)), "..", ".."))
+
+from sample_tree import (  # noqa
+    SIZES, NODES_PER_FUNCTION, load_nodes, build_module
+)
+from py2c.tree import Node  # noqa
+
+
+def measure(num_functions, nodes):
+    """Return the memory (in bytes) allocated by a finalized tree.
+    """
+    gc.collect()
+    tracemalloc.start()
+    tree = build_module(num_functions, nodes)
+    tree.finalize()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del tree
+    return size
+
+
+def main():
+    size = sys.argv[1] if len(sys.argv) > 1 else "medium"
+    num_functions = SIZES[size]
+    num_nodes = num_functions * NODES_PER_FUNCTION + 1
+
+    dict_size = measure(num_functions, load_nodes(slots=False))
+    slots_size = measure(num_functions, load_nodes(slots=True))
+
+    print("[py2c] Memory used by a tree of {} nodes ({})".format(num_nodes, size))
+    for name, used in [("dict", dict_size), ("slots", slots_size)]:
+        print("[py2c]   {:<5}: {:>8.2f} MiB ({:.0f} bytes/node)".format(
+            name, used / 2**20, used / num_nodes
+        ))
+    print("[py2c]   slots/dict: {:.2f}".format(slots_size / dict_size))
+    print("[py2c]   of which Node's slots: {} bytes/node".format(
+        len(Node.__slots__) * struct.calcsize("P")
+    ))
+
+if __name__ == '__main__':
+    main()
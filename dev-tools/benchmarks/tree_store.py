@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Compare Node trees with TreeStore for memory and finding nodes by class.
+
+Usage: tree_store.py [small|medium|large]
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+from os.path import join, realpath, dirname
+
+sys.path.insert(0, join(dirname(realpath(__file__)), "..", ".."))
+
+from sample_tree import (  # noqa
+    SIZES, NODES_PER_FUNCTION, load_nodes, build_module
+)
+from py2c.tree.store import TreeStore  # noqa
+from py2c.tree.visitors import RecursiveNodeVisitor  # noqa
+
+
+class NameCollector(RecursiveNodeVisitor):
+
+    def __init__(self):
+        super().__init__()
+        self.found = []
+
+    def visit_Name(self, node):
+        self.found.append(node)
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def collect_names(tree):
+    collector = NameCollector()
+    collector.visit(tree)
+    return collector.found
+
+
+def main():
+    size = sys.argv[1] if len(sys.argv) > 1 else "medium"
+    num_functions = SIZES[size]
+    num_nodes = num_functions * NODES_PER_FUNCTION + 1
+    nodes = load_nodes(slots=True)
+
+    gc.collect()
+    tracemalloc.start()
+    tree = build_module(num_functions, nodes)
+    tree.finalize()
+    tree_size, _ = tracemalloc.get_traced_memory()
+    store = TreeStore.from_node(tree)
+    store_size = tracemalloc.get_traced_memory()[0] - tree_size
+    tracemalloc.stop()
+
+    walk_time, found = timed(lambda: collect_names(tree))
+    scan_time, indices = timed(lambda: store.indices_of(nodes.Name))
+    assert len(found) == len(indices)
+
+    print("[py2c] A tree of {} nodes ({})".format(num_nodes, size))
+    print("[py2c]   memory: Nodes {:.2f} MiB, TreeStore {:.2f} MiB".format(
+        tree_size / 2**20, store_size / 2**20
+    ))
+    print("[py2c]   finding {} Names: visitor {:.4f}s, scan {:.4f}s".format(
+        len(indices), walk_time, scan_time
+    ))
+
+if __name__ == '__main__':
+    main()
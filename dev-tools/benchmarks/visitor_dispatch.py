@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Benchmark the dispatch of nodes to the methods of visitors.
+
+Compares the cached dispatch tables with looking up `'visit_' + class name`
+on every visit, which is how visitors used to dispatch. (The traversal of
+trees is benchmarked by visitor_traversal.py.)
+
+Usage: visitor_dispatch.py [small|medium|large]
+"""
+
+import sys
+import timeit
+from os.path import join, realpath, dirname
+
+sys.path.insert(0, join(dirname(realpath(__file__)), "..", ".."))
+
+from sample_tree import (  # noqa
+    SIZES, NODES_PER_FUNCTION, load_nodes, build_module
+)
+from py2c.tree.visitors import RecursiveNodeVisitor  # noqa
+
+REPEAT = 5
+
+
+class DispatchOnlyVisitor(RecursiveNodeVisitor):
+    """Dispatches each node, without visiting it's children
+    """
+
+    def generic_visit(self, node):
+        pass
+
+
+class StringDispatchOnlyVisitor(DispatchOnlyVisitor):
+
+    def _visit(self, node):
+        method = 'visit_' + node.__class__.__name__
+        visitor = getattr(self, method, self.generic_visit)
+        return visitor(node)
+
+
+class CollectingVisitor(RecursiveNodeVisitor):
+
+    def __init__(self):
+        super().__init__()
+        self.collected = []
+
+    def generic_visit(self, node):
+        self.collected.append(node)
+        super().generic_visit(node)
+
+    @classmethod
+    def collect(cls, tree):
+        visitor = cls()
+        visitor.visit(tree)
+        return visitor.collected
+
+
+def main():
+    size = sys.argv[1] if len(sys.argv) > 1 else "medium"
+    num_functions = SIZES[size]
+    num_nodes = num_functions * NODES_PER_FUNCTION + 1
+    nodes = load_nodes(slots=True)
+
+    tree = build_module(num_functions, nodes)
+    tree.finalize()
+    flat = list(CollectingVisitor.collect(tree))
+    assert len(flat) == num_nodes
+
+    def dispatch(visitor_class):
+        def func():
+            visitor = visitor_class()
+            for node in flat:
+                visitor.visit(node)
+        return func
+
+    print("[py2c] Visiting a tree of {} nodes ({})".format(num_nodes, size))
+    for label, func in [
+        ("dispatch only, by name", dispatch(StringDispatchOnlyVisitor)),
+        ("dispatch only, cached table", dispatch(DispatchOnlyVisitor)),
+    ]:
+        best = min(timeit.repeat(func, number=1, repeat=REPEAT))
+        print("[py2c]   {}: {:.4f}s ({:.0f}ns/node)".format(
+            label, best, best / num_nodes * 1e9
+        ))
+
+if __name__ == '__main__':
+    main()
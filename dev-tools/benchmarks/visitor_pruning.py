@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Benchmark skipping sub-trees that can't contain the visited classes.
+
+Compares visitors interested in a few classes of statements, with and
+without pruning the sub-trees (expressions) those can't appear in.
+
+Usage: visitor_pruning.py [small|medium|large]
+"""
+
+import sys
+import timeit
+from os.path import join, realpath, dirname
+
+sys.path.insert(0, join(dirname(realpath(__file__)), "..", ".."))
+
+from sample_tree import (  # noqa
+    SIZES, NODES_PER_FUNCTION, load_nodes, build_module
+)
+from py2c.tree.visitors import (  # noqa
+    RecursiveNodeVisitor, _get_dispatch_table
+)
+
+REPEAT = 5
+
+
+class ReturnCounter(RecursiveNodeVisitor):
+
+    def __init__(self):
+        super().__init__()
+        self.returns = 0
+
+    def visit_Return(self, node):
+        self.returns += 1
+
+
+class NameCounter(RecursiveNodeVisitor):
+
+    def __init__(self):
+        super().__init__()
+        self.names = 0
+
+    def visit_Name(self, node):
+        self.names += 1
+
+
+def create(visitor_class, pruning):
+    visitor = visitor_class()
+    if not pruning:
+        # Visit every node, like before pruning
+        visitor._pruning = False
+        visitor._dispatch_table = _get_dispatch_table(visitor_class)
+    return visitor
+
+
+def main():
+    size = sys.argv[1] if len(sys.argv) > 1 else "medium"
+    num_functions = SIZES[size]
+    num_nodes = num_functions * NODES_PER_FUNCTION + 1
+    nodes = load_nodes(slots=True)
+    tree = build_module(num_functions, nodes)
+
+    print("[py2c] Visiting a tree of {} nodes ({})".format(num_nodes, size))
+    for label, visitor_class, pruning in [
+        ("Return, not pruned", ReturnCounter, False),
+        ("Return, pruned", ReturnCounter, True),
+        ("Name (nothing to prune), not pruned", NameCounter, False),
+        ("Name (nothing to prune), pruned", NameCounter, True),
+    ]:
+        def func():
+            create(visitor_class, pruning).visit(tree)
+        best = min(timeit.repeat(func, number=1, repeat=REPEAT))
+        print("[py2c]   {}: {:.4f}s ({:.0f}ns/node)".format(
+            label, best, best / num_nodes * 1e9
+        ))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Benchmark the traversal of trees by visitors and transformers.
+
+Compares the explicit-stack traversal with the recursive one visitors used
+to have (reproduced here), on a wide tree and on a deep one.
+
+Usage: visitor_traversal.py [small|medium|large]
+"""
+
+import sys
+import timeit
+import collections.abc
+from os.path import join, realpath, dirname
+
+sys.path.insert(0, join(dirname(realpath(__file__)), "..", ".."))
+
+from sample_tree import (  # noqa
+    SIZES, NODES_PER_FUNCTION, load_nodes, build_module
+)
+from py2c.tree.visitors import (  # noqa
+    Access, RecursiveNodeVisitor, RecursiveNodeTransformer
+)
+
+REPEAT = 5
+
+
+# -----------------------------------------------------------------------------
+# The recursive traversal
+# -----------------------------------------------------------------------------
+class RecursiveTraversal(object):
+
+    def _visit_value(self, parent, field, value, index=None):
+        self._access_path.append(Access(parent.__class__, field, index))
+        val = self._visit(value)
+        self._access_path.pop()
+        return val
+
+
+class OldNodeVisitor(RecursiveTraversal, RecursiveNodeVisitor):
+
+    def _visit_children(self, node):
+        for field, value in self.iter_fields(node):
+            if isinstance(value, (list, tuple)):
+                for i, child in enumerate(value):
+                    if isinstance(child, self.base_class):
+                        self._visit_value(node, field, child, i)
+            elif isinstance(value, self.base_class):
+                self._visit_value(node, field, value)
+
+
+class OldNodeTransformer(RecursiveTraversal, RecursiveNodeTransformer):
+
+    def _visit_children(self, node):
+        for field, old_value in self.iter_fields(node):
+            if isinstance(old_value, list):
+                self._visit_list(node, field, old_value)
+            elif isinstance(old_value, self.base_class):
+                new_node = self._visit_value(node, field, old_value)
+                if new_node is None:
+                    delattr(node, field)
+                else:
+                    if new_node is self.NONE_DEPUTY:
+                        new_node = None
+                    setattr(node, field, new_node)
+
+    def _visit_list(self, node, field, original_list):
+        new_list = []
+        for i, value in enumerate(original_list):
+            if isinstance(value, self.base_class):
+                value = self._visit_value(node, field, value, i)
+                if value is None:
+                    continue
+                elif value is self.NONE_DEPUTY:
+                    value = None
+                elif isinstance(value, collections.abc.Iterable):
+                    new_list.extend(value)
+                    continue
+            new_list.append(value)
+        original_list[:] = new_list
+
+
+# -----------------------------------------------------------------------------
+# Visitors
+# -----------------------------------------------------------------------------
+class CountingVisitor(RecursiveNodeVisitor):
+
+    def __init__(self):
+        super().__init__()
+        self.names = 0
+
+    def visit_Name(self, node):
+        self.names += 1
+
+
+class OldCountingVisitor(OldNodeVisitor, CountingVisitor):
+    pass
+
+
+class TrackingCountingVisitor(CountingVisitor):
+    track_access_path = True
+
+
+class RenamingTransformer(RecursiveNodeTransformer):
+
+    def visit_Name(self, node):
+        return node
+
+
+class OldRenamingTransformer(OldNodeTransformer, RenamingTransformer):
+    pass
+
+
+def main():
+    size = sys.argv[1] if len(sys.argv) > 1 else "medium"
+    num_functions = SIZES[size]
+    num_nodes = num_functions * NODES_PER_FUNCTION + 1
+    nodes = load_nodes(slots=True)
+
+    wide = build_module(num_functions, nodes)
+    # As deep as the recursive traversal can go
+    depth = sys.getrecursionlimit() // 10
+    deep = nodes.Name("x")
+    for _ in range(depth):
+        deep = nodes.Call(deep, [nodes.Name("y")])
+
+    for name, tree, tree_size in [
+        ("wide", wide, num_nodes), ("deep", deep, depth * 2 + 1)
+    ]:
+        print("[py2c] Visiting a {} tree of {} nodes".format(name, tree_size))
+        for label, visitor_class in [
+            ("visitor, recursive", OldCountingVisitor),
+            ("visitor, explicit stack", CountingVisitor),
+            ("visitor, explicit stack, tracked path", TrackingCountingVisitor),
+            ("transformer, recursive", OldRenamingTransformer),
+            ("transformer, explicit stack", RenamingTransformer),
+        ]:
+            def func():
+                visitor_class().visit(tree)
+            # Deep trees are visited many times, to be measurable
+            number = 1 if tree is wide else 200
+            best = min(timeit.repeat(func, number=number, repeat=REPEAT))
+            best /= number
+            print("[py2c]   {}: {:.5f}s ({:.0f}ns/node)".format(
+                label, best, best / tree_size * 1e9
+            ))
+
+    depth = sys.getrecursionlimit() * 10
+    for _ in range(depth):
+        deep = nodes.Call(deep, [])
+    duration = min(timeit.repeat(
+        lambda: CountingVisitor().visit(deep), number=1, repeat=REPEAT
+    ))
+    print("[py2c] Visiting a tree {} deep: {:.4f}s".format(depth, duration))
+
+if __name__ == '__main__':
+    main()
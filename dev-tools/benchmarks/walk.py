@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Benchmark walking trees with py2c.tree.walk.
+
+Compares streaming over the nodes of a tree with `walk` against collecting
+them with a visitor, which is what analysis code had to do before.
+
+Usage: walk.py [small|medium|large]
+"""
+
+import sys
+import timeit
+from collections import deque
+from os.path import join, realpath, dirname
+
+sys.path.insert(0, join(dirname(realpath(__file__)), "..", ".."))
+
+from sample_tree import (  # noqa
+    SIZES, NODES_PER_FUNCTION, load_nodes, build_module
+)
+from py2c.tree.walk import walk  # noqa
+from py2c.tree.visitors import RecursiveNodeVisitor  # noqa
+
+REPEAT = 5
+
+
+class CollectingVisitor(RecursiveNodeVisitor):
+
+    def __init__(self, types):
+        super().__init__()
+        self.types = types
+        self.collected = []
+
+    def generic_visit(self, node):
+        if isinstance(node, self.types):
+            self.collected.append(node)
+        super().generic_visit(node)
+
+
+def main():
+    size = sys.argv[1] if len(sys.argv) > 1 else "medium"
+    num_functions = SIZES[size]
+    num_nodes = num_functions * NODES_PER_FUNCTION + 1
+    nodes = load_nodes(slots=True)
+    tree = build_module(num_functions, nodes)
+
+    def visitor(types):
+        def func():
+            visitor = CollectingVisitor(types)
+            visitor.visit(tree)
+            return len(visitor.collected)
+        return func
+
+    def walker(**options):
+        def func():
+            # Consumes the nodes without keeping them
+            deque(walk(tree, **options), maxlen=0)
+        return func
+
+    print("[py2c] Walking a tree of {} nodes ({})".format(num_nodes, size))
+    for label, func in [
+        ("all nodes, visitor", visitor(nodes.Node)),
+        ("all nodes, walk", walker()),
+        ("all nodes, walk in post-order", walker(order="post")),
+        ("all nodes, walk breadth first", walker(order="bfs")),
+        ("all nodes, walk with paths", walker(with_path=True)),
+        ("Return nodes, visitor", visitor(nodes.Return)),
+        ("Return nodes, walk", walker(types=nodes.Return)),
+    ]:
+        best = min(timeit.repeat(func, number=1, repeat=REPEAT))
+        print("[py2c]   {}: {:.4f}s ({:.0f}ns/node)".format(
+            label, best, best / num_nodes * 1e9
+        ))
+
+if __name__ == '__main__':
+    main()
@@ -43,10 +43,17 @@ def should_remove_file(root, name):
 
 
 def is_generated_file(root, name):
+    if not root.endswith(os.path.join("py2c", "tree")):
+        return False
+    if name == ".node_gen-manifest.json":
+        return True
     return (
-        root.endswith(os.path.join("py2c", "tree")) and
         name.endswith(".py") and
-        name not in ["__init__.py", "node_gen.py", "visitors.py"]
+        name not in [
+            "__init__.py", "node_gen.py", "visitors.py", "store.py",
+            "serialize.py", "dump.py", "walk.py", "query.py",
+            "parallel.py", "importer.py"
+        ]
     )
 
 
@@ -1,114 +1,54 @@
-"""This is a really dirty script that is used to dump the AST.
+#!/usr/bin/env python3
+"""Dump the AST of a Python source file (or stdin), using `py2c.tree.dump`.
 """
 
-
 import ast
-from py2c.tree import Node, iter_fields as py_iter_fields
-import py2c.tree.python as py_tree
-
-
-class Indentor(object):
-    """A simple class to manage indents
-    """
-
-    def __init__(self, indent_with='    '):
-        self.indent = ""
-        self._indent_with = indent_with
-        self.skip = False
-
-    def should_skip_next(self, should=True):
-        self.skip = should
-
-    def __enter__(self):
-        self.indent = self.indent + self._indent_with
-
-    def __exit__(self, *args):
-        self.indent = self.indent[:-len(self._indent_with)]
-
-    def __str__(self):
-        if self.skip:
-            self.skip = False
-            return ""
-        else:
-            return self.indent
-
-
-def write(*args, sep="", end=""):
-    print(*args, sep=sep, end=end)
+import sys
+import argparse
+from os.path import join, realpath, dirname
 
+sys.path.insert(0, join(dirname(realpath(__file__)), ".."))
 
-def _dump(node, indentor):
-    if isinstance(node, (list, tuple)):
-        _dump_list(node, indentor)
-    elif isinstance(node, (Node, ast.AST)):
-        _dump_node(node, indentor)
-    else:
-        write(indentor, repr(node))
-
-
-def _dump_list(li, indentor):
-    if not li:
-        write("[]")
-        indentor.skip = False
-    else:
-        length = len(li)
-        write("[")
-        for i, elem in enumerate(li):
-            with indentor:
-                write("\n")
-                indentor.skip = False
-                _dump(elem, indentor)
-            if i < length - 1:
-                write(",")
-
-        should_skip = indentor.skip
-        write("\n", indentor, "]")
-        indentor.skip = should_skip
-
-
-def _dump_node(node, indentor):
-    # Initial header
-    if isinstance(node, Node):
-        module = "py_tree"
-        iter_fields = py_iter_fields
-    else:
-        module = "ast"
-        iter_fields = ast.iter_fields
-    write(indentor, "{}.{}(".format(module, node.__class__.__name__))
-
-    # Should the node be printed inline
-    in_line = isinstance(node, (py_tree.Name, ast.Name, ast.NameConstant))
-    length = len(node._fields)
-    for i, (name, value) in enumerate(iter_fields(node)):
-        with indentor:
-            if in_line:
-                indentor.skip = True
-            else:
-                write("\n")
-            write(indentor, name, "=")
-            indentor.skip = True
-            _dump(value, indentor)
-            if i < length - 1:
-                write(",")
-                if in_line:
-                    write(" ")
-    if not in_line and node._fields:
-        write("\n", indentor, ")",)
-    else:
-        write(")")
+from py2c.tree.dump import dump  # noqa
 
 
 # -----------------------------------------------------------------------------
-# The whole point of the stuff above
+# CLI stuff
 # -----------------------------------------------------------------------------
-def dump_ast(node, indent_with="   "):
-    return _dump(node, Indentor())
-
-
-# def main():
-#     import textwrap
-#     dump_ast(ast.parse(textwrap.dedent("""
-# """)))
-
-# if __name__ == '__main__':
-#     main()
+def setup_parser(parser):
+    parser.add_argument(
+        "file",
+        help="Python source file to dump the AST of (default: stdin)",
+        nargs="?", type=argparse.FileType("r"), default=sys.stdin
+    )
+    parser.add_argument(
+        "-d", "--max-depth",
+        help="Dump nodes deeper than this as 'Name(...)'",
+        type=int, default=None
+    )
+    parser.add_argument(
+        "-w", "--max-width",
+        help="Dump only these many elements of lists",
+        type=int, default=None
+    )
+    parser.add_argument(
+        "-i", "--indent",
+        help="Indentation of nested nodes",
+        default="    "
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    setup_parser(parser)
+    args = parser.parse_args(argv)
+
+    with args.file:
+        node = ast.parse(args.file.read())
+    dump(node, indent=args.indent, max_depth=args.max_depth,
+         max_width=args.max_width)
+    print()
+
+
+if __name__ == '__main__':
+    main()
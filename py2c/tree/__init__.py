@@ -6,21 +6,29 @@
 (not to be confused with type-checking of the code to be compiled)
 """
 
+import sys
+import operator
+import threading
+import contextlib
 import collections
 
-from py2c.utils import (
-    get_article, verify_attribute
-)
+from py2c.utils import get_article
 
 __all__ = [
     # Exceptions
     "NodeError", "WrongTypeError", "FieldError", "WrongAttributeValueError",
     # Custom classes
-    "identifier",
+    "identifier", "IdentifierTable", "identifier_table",
     # A field access related helper
     "fields_decorator",
+    # Construction without per-assignment validation
+    "trusted_construction",
     # The big fish
-    "Node"
+    "Node",
+    # Deduplication of finalized sub-trees
+    "InternTable",
+    # Which classes of nodes may be in the sub-trees of others
+    "can_contain",
 ]
 
 
@@ -61,18 +69,34 @@ class FinalizationError(FieldError):
 # Helper
 # -----------------------------------------------------------------------------
 def iter_fields(node):
-    for name, _, _ in node._fields:
+    for name in _get_schema(node.__class__).names:
         try:
             yield name, getattr(node, name)
         except AttributeError:
             pass
 
 
+def _iter_child_nodes(values):
+    """Yield the Nodes in the values of the fields of a finalized node
+    """
+    for value in values:
+        if isinstance(value, tuple):
+            for item in value:
+                if isinstance(item, Node):
+                    yield item
+        elif isinstance(value, Node):
+            yield value
+
+
 # -----------------------------------------------------------------------------
 # identifier object
 # -----------------------------------------------------------------------------
 class _IdentifierMetaClass(type):
     def __instancecheck__(self, obj):
+        # Names in the table have been validated already. Others are not
+        # added to it here, it's filled by the code that interns names.
+        if obj.__class__ is str and obj in _identifier_symbols:
+            return True
         return isinstance(obj, str) and obj.isidentifier()
 
     def __subclasscheck__(self, obj):
@@ -81,11 +105,133 @@ def __subclasscheck__(self, obj):
 
 class identifier(str, metaclass=_IdentifierMetaClass):
     def __new__(self, obj):
-        if isinstance(obj, str) and obj.isidentifier():
-            return obj
-        raise WrongAttributeValueError(
-            "Invalid value for identifier: {}".format(obj)
-        )
+        # Returns the shared copy of the name
+        return identifier_table.intern(obj)
+
+
+class IdentifierTable(object):
+    """Interns identifiers, validating each distinct name once
+
+    Every name is stored once, as a shared string, and given a small integer
+    symbol id (in the order the names were added), so that later passes can
+    refer to names by their symbol ids.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # name -> symbol id
+        self._symbols = {}
+        # symbol id -> name
+        self._names = []
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name.__class__ is str and name in self._symbols
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def intern(self, name):
+        """Get the shared copy of the identifier `name`, adding it if needed.
+
+        Raises:
+            WrongAttributeValueError if `name` is not a valid identifier
+        """
+        return self._names[self.symbol(name)]
+
+    def symbol(self, name):
+        """Get the symbol id of the identifier `name`, adding it if needed.
+
+        Raises:
+            WrongAttributeValueError if `name` is not a valid identifier
+        """
+        if name.__class__ is str:
+            symbol = self._symbols.get(name)
+            if symbol is not None:
+                return symbol
+        elif not isinstance(name, str):
+            raise WrongAttributeValueError(
+                "Invalid value for identifier: {}".format(name)
+            )
+        return self._add(name)
+
+    def lookup(self, name, default=None):
+        """Get the symbol id of `name`, or `default` if it's not in the table
+        """
+        if name.__class__ is not str:
+            return default
+        return self._symbols.get(name, default)
+
+    def name(self, symbol):
+        """Get the name with the symbol id `symbol`
+        """
+        return self._names[symbol]
+
+    def intern_tree(self, node):
+        """Replace the identifiers in the tree of `node` with shared copies.
+        """
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            for field in _get_schema(current.__class__).fields:
+                name, type_, _ = field
+                value = getattr(current, name, None)
+                if type_ is identifier and value is not None:
+                    if isinstance(value, (list, tuple)):
+                        value = value.__class__(map(self.intern, value))
+                    else:
+                        value = self.intern(value)
+                    # Equal values, so finalized nodes remain valid.
+                    current._set_field_value(name, value)
+                elif isinstance(value, (list, tuple)):
+                    stack.extend(
+                        elem for elem in value if isinstance(elem, Node)
+                    )
+                elif isinstance(value, Node):
+                    stack.append(value)
+
+    def _add(self, name):
+        if not name.isidentifier():
+            raise WrongAttributeValueError(
+                "Invalid value for identifier: {}".format(name)
+            )
+        # The table holds plain strings, even if given a sub-class of str.
+        name = sys.intern(str.__str__(name))
+        symbol = self._symbols.get(name)
+        if symbol is None:
+            self._names.append(name)
+            symbol = self._symbols[name] = len(self._names) - 1
+        return symbol
+
+
+# Identifiers interned so far (by `identifier`, finalization, TreeStores and
+# the readers of serialized trees), shared by the process.
+identifier_table = IdentifierTable()
+# Used directly by the checks of generated nodes.
+_identifier_symbols = identifier_table._symbols
+# Names are only added to the table by the code that interns them on it's own
+# while it has fewer than this many, so that it does not grow without bounds
+# in a long running process.
+MAX_INTERNED_IDENTIFIERS = 2 ** 16
+
+
+def _intern_identifier(name):
+    """Get the shared copy of `name` in `identifier_table`, or `name` itself if
+    it's not a valid identifier (as nodes made with trusted construction may
+    hold) or the table is full.
+    """
+    if name.__class__ is str:
+        symbol = _identifier_symbols.get(name)
+        if symbol is not None:
+            return identifier_table._names[symbol]
+    if len(identifier_table) >= MAX_INTERNED_IDENTIFIERS:
+        return name
+    try:
+        return identifier_table.intern(name)
+    except WrongAttributeValueError:
+        return name
 
 
 # -----------------------------------------------------------------------------
@@ -101,6 +247,194 @@ def fields_decorator(func):
     return class_property(classmethod(func))
 
 
+# -----------------------------------------------------------------------------
+# Compiled field schema of Node classes
+#    `_fields` may be a class_property that rebuilds the list on every access
+#    (and may refer to classes defined later in a generated module), so it is
+#    compiled once, on first use, and cached on the class itself.
+# -----------------------------------------------------------------------------
+MODIFIERS = ('NEEDED', 'OPTIONAL', 'ZERO_OR_MORE', 'ONE_OR_MORE')
+
+_Schema = collections.namedtuple(
+    "_Schema", "fields names by_name sequences identifiers"
+)
+
+
+def _compile_schema(cls):
+    """Compile the `_fields` of a Node class into a `_Schema`
+    """
+    try:
+        fields = tuple(tuple(field) for field in cls._fields)
+    except TypeError:
+        raise InvalidInitializationError(
+            "{}._fields should be an iterable of fields.".format(
+                cls.__qualname__
+            )
+        )
+
+    invalid_modifiers = [
+        (name, modifier) for name, _, modifier in fields
+        if modifier not in MODIFIERS
+    ]
+    if invalid_modifiers:
+        raise InvalidInitializationError(
+            _invalid_modifiers_err_msg(cls, invalid_modifiers)
+        )
+
+    return _Schema(
+        fields=fields,
+        names=tuple(field[0] for field in fields),
+        by_name={field[0]: field for field in fields},
+        sequences=frozenset(
+            name for name, _, modifier in fields
+            if modifier in ('ZERO_OR_MORE', 'ONE_OR_MORE')
+        ),
+        identifiers=frozenset(
+            name for name, type_, _ in fields if type_ is identifier
+        ),
+    )
+
+
+def _get_schema(cls):
+    """Get the compiled schema of a Node class, compiling it if needed.
+    """
+    # Looked up in the class's own namespace, a parent's schema is not valid
+    # for a sub-class.
+    try:
+        return cls.__dict__["_schema"]
+    except KeyError:
+        schema = cls._schema = _compile_schema(cls)
+        return schema
+
+
+# -----------------------------------------------------------------------------
+# Trusted construction
+#    Nodes built from already-valid input (like a CPython `ast` tree) need not
+#    pay for validating every assignment.
+# -----------------------------------------------------------------------------
+class _Validation(threading.local):
+    # Whether the values assigned to fields are validated, in each thread.
+    # Toggled by `trusted_construction`.
+    enabled = True
+
+
+_validation = _Validation()
+
+
+@contextlib.contextmanager
+def trusted_construction():
+    """Skip validation of the values assigned to fields, within the context.
+
+    The skipped validation can be done in bulk with `finalize(validate=True)`.
+    Only the current thread is affected.
+    """
+    previous = _validation.enabled
+    _validation.enabled = False
+    try:
+        yield
+    finally:
+        _validation.enabled = previous
+
+
+# -----------------------------------------------------------------------------
+# Reachability of Node classes
+#    Which classes of nodes may be in the sub-trees of nodes of a class, going
+#    by the types of the fields. It is worked out from the classes defined
+#    when it is first needed and forgotten when another Node class is defined.
+# -----------------------------------------------------------------------------
+class _NodeMetaClass(type):
+    """Metaclass of Node, which tracks the definition of Node classes
+    """
+    # Changed on the definition of every Node class
+    version = 0
+
+    def __init__(cls, name, bases, namespace):
+        super().__init__(name, bases, namespace)
+        _NodeMetaClass.version += 1
+        _field_classes.clear()
+        _descendant_classes.clear()
+
+
+_field_classes = {}  # Type of field -> Node classes it's values may be
+_descendant_classes = {}  # Node class -> Node classes in it's sub-trees
+
+
+def _iter_node_classes():
+    stack = [Node]
+    seen = set(stack)
+    while stack:
+        cls = stack.pop()
+        yield cls
+        for sub_class in type.__subclasses__(cls):
+            if sub_class not in seen:
+                seen.add(sub_class)
+                stack.append(sub_class)
+
+
+def _get_child_classes(cls):
+    """Get the Node classes that the fields of nodes of `cls` may hold
+    """
+    try:
+        fields = _get_schema(cls).fields
+    except NodeError:
+        # There can't be nodes of classes without valid fields, like Node
+        return set()
+
+    child_classes = set()
+    for _, type_, _ in fields:
+        try:
+            classes = _field_classes[type_]
+        except KeyError:
+            classes = _field_classes[type_] = [
+                node_class for node_class in _iter_node_classes()
+                if issubclass(node_class, type_)
+            ]
+        child_classes.update(classes)
+    return child_classes
+
+
+def _get_descendant_classes(cls):
+    """Get the Node classes of the nodes that may be in the sub-trees of
+    nodes of `cls`.
+    """
+    try:
+        return _descendant_classes[cls]
+    except KeyError:
+        pass
+
+    descendants = set()
+    stack = [cls]
+    while stack:
+        for child_class in _get_child_classes(stack.pop()) - descendants:
+            descendants.add(child_class)
+            stack.append(child_class)
+
+    descendants = _descendant_classes[cls] = frozenset(descendants)
+    return descendants
+
+
+def can_contain(node_class, target_class):
+    """Can nodes of `node_class` have nodes of `target_class` (or it's
+    sub-classes) in their sub-trees, going by the types of their fields?
+    """
+    return any(
+        issubclass(cls, target_class)
+        for cls in _get_descendant_classes(node_class)
+    )
+
+
+# -----------------------------------------------------------------------------
+# Finalization states of a Node
+#    NOTE:: node_gen's specialized __init__ hard-codes _NOT_FINALIZED.
+# -----------------------------------------------------------------------------
+_NOT_FINALIZED = 0
+_FINALIZED = 1
+_VALIDATED = 2  # Finalized with validation of all fields
+
+# Stub for the value of fields that are not set
+_MISSING = object()
+
+
 # -----------------------------------------------------------------------------
 # Re-factored out the error messages, as they create noise in the implementation
 # -----------------------------------------------------------------------------
@@ -124,9 +458,9 @@ def _missing_fields_err_msg(node, missing):
     )
 
 
-def _invalid_modifiers_err_msg(node, invalid_modifiers):
+def _invalid_modifiers_err_msg(cls, invalid_modifiers):
     return "{0}'s field{2} used invalid modifier{2}: {1}".format(
-        node.__class__.__qualname__,
+        cls.__qualname__,
         ", ".join(
             "{} -> '{}'".format(name, modifier)
             for name, modifier in invalid_modifiers
@@ -135,6 +469,12 @@ def _invalid_modifiers_err_msg(node, invalid_modifiers):
     )
 
 
+def _unhashable_err_msg(node):
+    return "unhashable {} node, it needs to be finalized first".format(
+        node.__class__.__qualname__
+    )
+
+
 def _no_field_by_name_err_msg(node, name):
     return "{} has no field {!r}".format(node.__class__.__qualname__, name)
 
@@ -161,109 +501,355 @@ def _invalid_iterable_field_value_err_msg(node, name, min_len, type_, index=None
     return msg
 
 
+# -----------------------------------------------------------------------------
+# Parents of nodes
+#    A finalized node refers to the nodes it's a child of, so that modifying
+#    it invalidates all of them. It's `_parent` slot holds the parent or, once
+#    it has been shared by more than one, a dict of the parents keyed by their
+#    ids. A parent that no longer has the node as a child (say, once the node
+#    was moved to another tree) is dropped as new parents are recorded.
+# -----------------------------------------------------------------------------
+def _add_parent(child, parent):
+    """Record `parent` as a parent of `child`.
+    """
+    current = getattr(child, "_parent", None)
+    if current is None or current is parent:
+        object.__setattr__(child, "_parent", parent)
+    elif current.__class__ is dict:
+        current[id(parent)] = parent
+        # Former parents are dropped once in a while, as the dict grows.
+        size = len(current)
+        if size >= 8 and not size & (size - 1):
+            for key, node in list(current.items()):
+                if not _has_child(node, child):
+                    del current[key]
+    elif not _has_child(current, child):
+        object.__setattr__(child, "_parent", parent)
+    else:
+        object.__setattr__(
+            child, "_parent", {id(current): current, id(parent): parent}
+        )
+
+
+def _has_child(node, child):
+    values = [
+        getattr(node, name, None)
+        for name in _get_schema(node.__class__).names
+    ]
+    return any(item is child for item in _iter_child_nodes(values))
+
+
+def _get_parents(node):
+    """The nodes that `node` is recorded to be a child of.
+    """
+    current = getattr(node, "_parent", None)
+    if current is None:
+        return []
+    elif current.__class__ is dict:
+        return list(current.values())
+    else:
+        return [current]
+
+
+# -----------------------------------------------------------------------------
+# Pickled state of nodes
+#    The parent and the hash of a node are not pickled (or copied) with it.
+# -----------------------------------------------------------------------------
+_UNPICKLED_SLOTS = frozenset(["_parent", "_hash", "__dict__", "__weakref__"])
+_state_slots = {}  # Node class -> names of it's slots that are pickled
+
+
+def _get_state_slots(cls):
+    try:
+        return _state_slots[cls]
+    except KeyError:
+        pass
+    names = []
+    for klass in reversed(cls.__mro__):
+        slots = klass.__dict__.get("__slots__", ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        for name in slots:
+            if name not in _UNPICKLED_SLOTS and name not in names:
+                names.append(name)
+    names = _state_slots[cls] = tuple(names)
+    return names
+
+
 # =============================================================================
 # Node base node
 # =============================================================================
-class Node(object):
+class Node(object, metaclass=_NodeMetaClass):
     """The base class of all nodes defined in the declarations
+
+    Sub-classes may declare `__slots__` for their fields, in which case the
+    fields are stored in the slots instead of an instance `__dict__`.
     """
+    # _finalized: One of _NOT_FINALIZED, _FINALIZED or _VALIDATED
+    # _parent: The parents of this node, when it was finalized (see above)
+    # _hash: The cached structural hash of a finalized node (or None)
+    __slots__ = ("_finalized", "_parent", "_hash")
     _special_names = []
 
     def __init__(self, *args, **kwargs):
         super(Node, self).__init__()
-        verify_attribute(self, "_fields", collections.Iterable)
+        object.__setattr__(self, "_finalized", _NOT_FINALIZED)
+        object.__setattr__(self, "_parent", None)
+        object.__setattr__(self, "_hash", None)
+        fields = _get_schema(self.__class__).fields
 
-        self.check_modifiers()
-
-        if len(args) not in [0, len(self._fields)]:
+        if len(args) not in (0, len(fields)):
             raise InvalidInitializationError(_invalid_arg_count_err_msg(self))
 
         # Setup from arguments
-        for field, value in zip(self._fields, args):
-            setattr(self, field[0], value)
+        for field, value in zip(fields, args):
+            if _validation.enabled:
+                self._validate_value_for_field(field, value)
+            self._set_field_value(field[0], value)
         for key, value in kwargs.items():
             setattr(self, key, value)
 
     def __eq__(self, other):
-        if self.__class__ != other.__class__:
+        if self is other:
+            return True
+        elif self.__class__ != other.__class__:
+            return False
+
+        # Nodes with different structural hashes cannot be equal
+        own_hash = getattr(self, "_hash", None)
+        other_hash = getattr(other, "_hash", None)
+        if None not in (own_hash, other_hash) and own_hash != other_hash:
             return False
         else:
             stub = object()
             return all(
                 getattr(other, name, stub) == getattr(self, name, stub)
-                for name, _, _ in self._fields
+                for name in _get_schema(self.__class__).names
             )
 
+    def __hash__(self):
+        value = getattr(self, "_hash", None)
+        if value is None:
+            value = self._compute_hashes()
+        return value
+
     def __repr__(self):
-        # # Should this be changed into a loop and list.append?
-        # return "{}.{}({})".format(
-        #     self.__class__.__module__.rsplit(".", 1)[1],
-        #     self.__class__.__qualname__,
-        #     ", ".join(
-        #         "{}={!r}".format(a, b) for a, b in iter_fields(self)
-        #     )
-        # )
-        return "{}({})".format(
-            self.__class__.__qualname__,
-            ", ".join(
-                "{}={!r}".format(a, b) for a, b in iter_fields(self)
-            )
-        )
+        # Dumped iteratively, so that deep trees can be represented.
+        from py2c.tree.dump import dumps
+        return dumps(self, indent=None)
 
     def __setattr__(self, name, value):
         # Special names don't pass through the field-related filters
         if name in self._special_names:  # coverage: not missing
             super().__setattr__(name, value)
 
-        for field in self._fields:
-            if name == field[0]:
+        try:
+            field = _get_schema(self.__class__).by_name[name]
+        except KeyError:
+            raise FieldError(_no_field_by_name_err_msg(self, name))
+        else:
+            if _validation.enabled:
                 self._validate_value_for_field(field, value)
-                self._set_field_value(name, value)
-                break
+            if self._finalized:
+                self._invalidate()
+            self._set_field_value(name, value)
+
+    def __delattr__(self, name):
+        if self._finalized:
+            self._invalidate()
+        super().__delattr__(name)
+
+    def __getstate__(self):
+        # Used by pickle and copy. The parent is left out, else a sub-tree
+        # would be pickled (or copied) along with the whole tree it's in.
+        slots = {}
+        for name in _get_state_slots(self.__class__):
+            value = getattr(self, name, _MISSING)
+            if value is not _MISSING:
+                slots[name] = value
+        return (getattr(self, "__dict__", None), slots)
+
+    def __setstate__(self, state):
+        # Used by pickle and copy. The state is the instance `__dict__` or a
+        # tuple of it and a dict of the values of the slots. These are set as
+        # they were, since __setattr__ rejects the internal slots.
+        if isinstance(state, tuple):
+            states = state
         else:
-            raise FieldError(_no_field_by_name_err_msg(self, name))
+            states = (state,)
+        for part in states:
+            for name, value in (part or {}).items():
+                object.__setattr__(self, name, value)
+        # Hashes of strings differ between processes, so are recomputed.
+        object.__setattr__(self, "_hash", None)
+        # The parents are not pickled; the children (restored before their
+        # parents) are given theirs again, for invalidating finalized trees.
+        if getattr(self, "_finalized", _NOT_FINALIZED):
+            values = [
+                getattr(self, name, None)
+                for name in _get_schema(self.__class__).names
+            ]
+            for child in _iter_child_nodes(values):
+                _add_parent(child, self)
+
+    @classmethod
+    def from_trusted(cls, *args, **kwargs):
+        """Construct a node without validating the values of it's fields.
+
+        Meant for input known to be valid. See `trusted_construction`.
+        """
+        with trusted_construction():
+            return cls(*args, **kwargs)
 
     def check_modifiers(self):
         """Check the modifiers of the Node's fields
         """
-        invalid_modifiers = []
-        for name, type_, modifier in self._fields:
-            if modifier not in ['NEEDED', 'OPTIONAL', 'ZERO_OR_MORE', 'ONE_OR_MORE']:
-                invalid_modifiers.append((name, modifier))
-        if invalid_modifiers:
-            raise InvalidInitializationError(
-                _invalid_modifiers_err_msg(self, invalid_modifiers)
-            )
+        # Modifiers are validated when the schema is compiled.
+        _get_schema(self.__class__)
 
-    def finalize(self):
+    def finalize(self, validate=False):
         """Finalize and check if all attributes exist
+
+        If `validate` is True, the values of all fields are validated as well,
+        which is needed for nodes made with `trusted_construction`.
+
+        Nodes that have been finalized and not modified since are skipped, so
+        re-finalizing a tree after a small change only touches the changed
+        parts of it.
+
+        The names in identifier fields are replaced with their shared copies
+        in `identifier_table` (see `MAX_INTERNED_IDENTIFIERS`).
+        """
+        level = _VALIDATED if validate else _FINALIZED
+        set_attribute = object.__setattr__
+
+        # An explicit stack, as trees may be nested deeper than the recursion
+        # limit. Nodes are marked as they are checked, in pre-order with the
+        # children taken right to left; the reverse of that is the post-order,
+        # in which the first node with missing fields is reported.
+        checked = []
+        failed = None
+        stack = [self]
+        pop, extend = stack.pop, stack.extend
+        try:
+            while stack:
+                node = pop()
+                if node._finalized >= level:
+                    continue
+                missing, children = node._finalize_fields(validate)
+                set_attribute(node, "_finalized", level)
+                if missing:
+                    failed = (len(checked), missing)
+                checked.append(node)
+                for child in children:
+                    parent = getattr(child, "_parent", None)
+                    if parent is None:
+                        set_attribute(child, "_parent", node)
+                    elif parent is not node:
+                        _add_parent(child, node)
+                extend(children)
+        except BaseException:
+            # Say, an invalid value; the nodes checked may not be valid.
+            for node in checked:
+                node._invalidate()
+            raise
+
+        if failed is not None:
+            index, missing = failed
+            # Only the nodes before the failing one in post-order are left
+            # finalized.
+            for node in checked[:index + 1]:
+                node._invalidate()
+            raise FinalizationError(
+                _missing_fields_err_msg(checked[index], missing)
+            )
+
+    def _finalize_fields(self, validate):
+        """Finalize the fields of this node, without it's children.
+
+        Returns the names of the missing fields and the children to finalize.
         """
         missing = []
-        for name, _, modifier in self._fields:
-            if hasattr(self, name):
-                if modifier in ('ZERO_OR_MORE', 'ONE_OR_MORE'):
-                    # Not nice, but used for brevity, probably a bad idea..
-                    items = tuple(getattr(self, name))
-                    self._set_field_value(name, items)
-                elif modifier in ('NEEDED', 'OPTIONAL'):
-                    items = [getattr(self, name)]
+        children = []
+        schema = _get_schema(self.__class__)
+        for field in schema.fields:
+            name = field[0]
+            value = getattr(self, name, _MISSING)
+            # Attribute missing!
+            if value is _MISSING:
+                modifier = field[2]
+                if modifier in ('NEEDED', 'ONE_OR_MORE'):
+                    missing.append(name)
+                elif modifier == 'OPTIONAL':
+                    self._set_field_value(name, None)
                 else:
-                    assert False, "Should not have reached this branch!!"
+                    self._set_field_value(name, ())
+                continue
 
-                for item in filter(lambda x: isinstance(x, Node), items):
-                    item.finalize()
-            # Attribute missing!
-            elif modifier in ('NEEDED', 'ONE_OR_MORE'):
-                missing.append(name)
-            elif modifier == 'OPTIONAL':
-                self.__dict__[name] = None
-            elif modifier == 'ZERO_OR_MORE':
-                self.__dict__[name] = ()
-            else:
-                assert False, "Should not have reached this branch!!"
-
-        if missing:
-            raise FinalizationError(_missing_fields_err_msg(self, missing))
+            if validate:
+                self._validate_value_for_field(field, value)
+            if name in schema.identifiers:
+                # Equal names are stored once, and later nodes made with them
+                # need not validate them again.
+                if name in schema.sequences:
+                    interned = tuple(map(_intern_identifier, value))
+                    if not isinstance(value, tuple) or any(
+                            map(operator.is_not, interned, value)):
+                        self._set_field_value(name, interned)
+                else:
+                    interned = _intern_identifier(value)
+                    if interned is not value:
+                        self._set_field_value(name, interned)
+            elif name in schema.sequences:
+                # Not nice, but used for brevity, probably a bad idea..
+                if not isinstance(value, tuple):
+                    value = tuple(value)
+                    self._set_field_value(name, value)
+                for item in value:
+                    if isinstance(item, Node):
+                        children.append(item)
+            elif isinstance(value, Node):
+                children.append(value)
+
+        return missing, children
+
+    def _invalidate(self):
+        """Mark this node and it's finalized ancestors as not finalized.
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._finalized:
+                object.__setattr__(node, "_finalized", _NOT_FINALIZED)
+                object.__setattr__(node, "_hash", None)
+                stack.extend(_get_parents(node))
+
+    def _compute_hashes(self):
+        """Compute (and cache) the structural hashes of this finalized node and
+        it's descendants which do not have one yet.
+        """
+        # Children are hashed before their parents, using an explicit stack for
+        # deep trees, so that hashing a parent uses the children's cached hash.
+        stack = [(self, False)]
+        while stack:
+            node, children_hashed = stack.pop()
+            if not node._finalized:
+                raise TypeError(_unhashable_err_msg(node))
+
+            values = tuple(
+                getattr(node, name)
+                for name in _get_schema(node.__class__).names
+            )
+            if children_hashed:
+                object.__setattr__(node, "_hash", hash((node.__class__, values)))
+                continue
+
+            stack.append((node, True))
+            for child in _iter_child_nodes(values):
+                if getattr(child, "_hash", None) is None:
+                    stack.append((child, False))
+
+        return self._hash
 
     def _validate_value_for_field(self, field, value):
         """Check if 'value' is valid to assign to field
@@ -285,6 +871,10 @@ def _validate_type(self, name, type_, value):
         Raises:
             WrongTypeError if not a valid value
         """
+        # Identifiers seen before are looked up, instead of checked again.
+        if type_ is identifier and value.__class__ is str:
+            if value in _identifier_symbols:
+                return
         if not isinstance(value, type_):
             raise WrongTypeError(_invalid_field_value_type_err_msg(
                 self, name, type_, value
@@ -301,6 +891,11 @@ def _validate_field_list(self, name, value, type_, min_len):
                 self, name, min_len, type_
             ))
 
+        if type_ is identifier and all(
+            elem.__class__ is str and elem in _identifier_symbols
+            for elem in value
+        ):
+            return
         for index, elem in enumerate(value):
             if not isinstance(elem, type_):
                 raise WrongTypeError(_invalid_iterable_field_value_err_msg(
@@ -308,7 +903,8 @@ def _validate_field_list(self, name, value, type_, min_len):
                 ))
 
     def _set_field_value(self, name, value):
-        self.__dict__[name] = value
+        # Bypasses the validation in __setattr__, works with slots too.
+        object.__setattr__(self, name, value)
 
     # Make sure sub-classes don't use this
     @fields_decorator
@@ -316,3 +912,82 @@ def _fields(cls):
         raise InvalidInitializationError(
             "Node sub-classes need to define an iterable _fields attribute."
         )
+
+
+# -----------------------------------------------------------------------------
+# Hash-consing of finalized nodes
+# -----------------------------------------------------------------------------
+class InternTable(object):
+    """Deduplicates structurally equal finalized sub-trees
+
+    `intern` replaces every sub-tree of a node with a canonical, equal one
+    that is shared by all the trees interned in the table. Since interned
+    nodes are shared, they should not be modified.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._nodes = {}
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __contains__(self, node):
+        return node in self._nodes
+
+    def intern(self, node):
+        """Intern a finalized node and it's sub-trees.
+
+        Returns the canonical node equal to `node`.
+        """
+        if not node._finalized:
+            raise TypeError(_unhashable_err_msg(node))
+        # Children are interned before their parents, so that the children of
+        # a node are canonical (and compared by identity) when it's looked up.
+        # Maps id(node) -> (node, canonical node); keeping the node alive, as
+        # it's id may be reused otherwise once it is replaced in the tree.
+        canonical = {}
+        stack = [(node, False)]
+        while stack:
+            current, children_interned = stack.pop()
+            if id(current) in canonical:
+                continue
+
+            names = _get_schema(current.__class__).names
+            values = [getattr(current, name) for name in names]
+            if not children_interned:
+                stack.append((current, True))
+                for child in _iter_child_nodes(values):
+                    stack.append((child, False))
+                continue
+
+            for i, value in enumerate(values):
+                if isinstance(value, tuple):
+                    new_value = tuple(
+                        canonical[id(item)][1] if isinstance(item, Node) else item
+                        for item in value
+                    )
+                    changed = any(map(operator.is_not, new_value, value))
+                elif isinstance(value, Node):
+                    new_value = canonical[id(value)][1]
+                    changed = new_value is not value
+                else:
+                    continue
+                # Replaced with equal nodes, so the structure remains the same.
+                if changed:
+                    current._set_field_value(names[i], new_value)
+                    values[i] = new_value
+
+            if getattr(current, "_hash", None) is None:
+                object.__setattr__(
+                    current, "_hash", hash((current.__class__, tuple(values)))
+                )
+            interned = self._nodes.setdefault(current, current)
+            canonical[id(current)] = (current, interned)
+            # The children may now be shared with other trees, all of which
+            # should be invalidated when they are modified.
+            if interned is current:
+                for child in _iter_child_nodes(values):
+                    _add_parent(child, current)
+
+        return canonical[id(node)][1]
@@ -0,0 +1,202 @@
+"""Dumping of Node (and ast.AST) trees as readable text
+
+The text is produced piece by piece, walking the tree with an explicit stack,
+and written to the stream in chunks; so large and deep trees can be dumped.
+"""
+
+import ast
+import sys
+
+from py2c.tree import Node, _get_schema
+
+__all__ = ["dump", "dumps"]
+
+# Number of pieces of text joined for each write to the stream
+_CHUNK_SIZE = 2048
+
+_TREE_TYPES = (Node, ast.AST)
+_SEQUENCE_TYPES = (list, tuple)
+_BRACKETS = {list: ("[", "]"), tuple: ("(", ")")}
+_MISSING = object()
+
+
+# -----------------------------------------------------------------------------
+# Helpers
+# -----------------------------------------------------------------------------
+_class_info = {}
+
+
+def _get_info(cls):
+    """Get the name and the names of the fields of a class of nodes
+    """
+    try:
+        return _class_info[cls]
+    except KeyError:
+        pass
+    if issubclass(cls, Node):
+        info = (cls.__qualname__, _get_schema(cls).names)
+    else:
+        info = ("ast." + cls.__name__, tuple(cls._fields))
+    _class_info[cls] = info
+    return info
+
+
+def _has_fields(node):
+    return bool(_get_info(node.__class__)[1])
+
+
+def _is_simple(value):
+    """Is `value` dumped as it's repr?
+    """
+    if isinstance(value, _TREE_TYPES):
+        return False
+    return not (isinstance(value, _SEQUENCE_TYPES) and value)
+
+
+def _is_nested(value):
+    """Does `value` need more than one line, when dumped with indentation?
+
+    Nodes without fields (like `ast.Load()`) are as simple as other values.
+    """
+    if isinstance(value, _TREE_TYPES):
+        return _has_fields(value)
+    if isinstance(value, _SEQUENCE_TYPES):
+        return any(
+            isinstance(elem, _TREE_TYPES) and _has_fields(elem)
+            for elem in value
+        )
+    return False
+
+
+def _dump_into(out, root, indent, max_depth, max_width, flush=None):
+    """Append the pieces of text of the dump of `root` to the list `out`
+
+    `flush` is called with `out` whenever it has grown long.
+    """
+    append = out.append
+    if _is_simple(root):
+        append(repr(root))
+        return
+    missing = _MISSING
+    # Items are either text or a (value, depth, prefix) to dump, where prefix
+    # is the indentation of the line that the value's dump ends on.
+    stack = [(root, 0, "")]
+    pop, extend = stack.pop, stack.extend
+    while stack:
+        item = pop()
+        if item.__class__ is str:
+            append(item)
+            continue
+        value, depth, prefix = item
+        if flush is not None and len(out) >= _CHUNK_SIZE:
+            flush(out)
+
+        if isinstance(value, _TREE_TYPES):
+            name, names = _get_info(value.__class__)
+            if max_depth is not None and depth >= max_depth:
+                append(name + ("(...)" if names else "()"))
+                continue
+            # Missing fields are skipped
+            fields = [
+                (field, field_value) for field, field_value in zip(
+                    names, [getattr(value, field, missing) for field in names]
+                ) if field_value is not missing
+            ]
+            if indent is None or not any(_is_nested(v) for _, v in fields):
+                pieces = [name + "("]
+                separator = ""
+                for field, field_value in fields:
+                    if _is_simple(field_value):
+                        pieces.append("{}{}={!r}".format(
+                            separator, field, field_value
+                        ))
+                    else:
+                        pieces.append(separator + field + "=")
+                        pieces.append((field_value, depth + 1, prefix))
+                    separator = ", "
+                pieces.append(")")
+            else:
+                inner = prefix + indent
+                pieces = [name + "("]
+                for field, field_value in fields:
+                    if _is_simple(field_value):
+                        pieces.append("\n{}{}={!r}".format(
+                            inner, field, field_value
+                        ))
+                    else:
+                        pieces.append("\n{}{}=".format(inner, field))
+                        pieces.append((field_value, depth + 1, inner))
+                    pieces.append(",")
+                pieces[-1] = "\n" + prefix + ")"
+        else:
+            opening, closing = _BRACKETS.get(value.__class__, ("[", "]"))
+            elems = value
+            if max_width is not None and len(value) > max_width:
+                elems = value[:max_width]
+            rest = len(value) - len(elems)
+
+            if indent is None or not _is_nested(elems):
+                pieces = [opening]
+                separator = ""
+                for elem in elems:
+                    if _is_simple(elem):
+                        pieces.append(separator + repr(elem))
+                    else:
+                        pieces.append(separator)
+                        pieces.append((elem, depth, prefix))
+                    separator = ", "
+                if rest:
+                    pieces.append(", ... ({} more)".format(rest))
+                elif len(value) == 1 and closing == ")":
+                    pieces.append(",")
+                pieces.append(closing)
+            else:
+                inner = prefix + indent
+                pieces = [opening]
+                for elem in elems:
+                    pieces.append("\n" + inner)
+                    pieces.append((elem, depth, inner))
+                    pieces.append(",")
+                if rest:
+                    pieces.append("\n{}... ({} more)".format(inner, rest))
+                elif len(value) != 1 or closing != ")":
+                    pieces.pop()
+                pieces.append("\n" + prefix + closing)
+
+        pieces.reverse()
+        extend(pieces)
+
+
+# -----------------------------------------------------------------------------
+# API
+# -----------------------------------------------------------------------------
+def dump(node, stream=None, indent="    ", max_depth=None, max_width=None):
+    """Write a dump of the tree of `node` to `stream` (sys.stdout by default)
+
+    Nodes are dumped on multiple lines, indented by `indent`, unless their
+    children are nodes without fields (like `ast.Load()`) or other values.
+    If `indent` is None, the dump is on a single line, like the `repr` of the
+    node.
+
+    Nodes deeper than `max_depth` (the root being at depth 0) are dumped as
+    `Name(...)` and only the first `max_width` elements of sequences are
+    dumped.
+    """
+    if stream is None:
+        stream = sys.stdout
+
+    def flush(out):
+        stream.write("".join(out))
+        del out[:]
+
+    out = []
+    _dump_into(out, node, indent, max_depth, max_width, flush)
+    flush(out)
+
+
+def dumps(node, indent="    ", max_depth=None, max_width=None):
+    """Get the dump of the tree of `node` as a string (see `dump`)
+    """
+    out = []
+    _dump_into(out, node, indent, max_depth, max_width)
+    return "".join(out)
@@ -0,0 +1,188 @@
+"""Importing the nodes in definition files, without generating files
+
+Once `install`-ed, importing a module "<package>.<name>" finds the definition
+file "tree_<name>.tree" in the package's directory (or "tree_<name>.tree" on
+sys.path, for a top-level module), and makes a module of the classes that
+`node_gen.generate` would generate from it. The compiled code is cached in
+__pycache__, keyed on the hash of the definition files of the directory and
+of the generator, so the definitions are only parsed again when they change.
+"""
+
+import os
+import sys
+import marshal
+import hashlib
+import importlib.abc
+import importlib.util
+
+from py2c.tree import node_gen
+
+__all__ = ["TreeFinder", "TreeLoader", "install", "uninstall"]
+
+
+# -----------------------------------------------------------------------------
+# Loading
+# -----------------------------------------------------------------------------
+class TreeLoader(importlib.abc.InspectLoader):
+    """Loads a module from a definition file, through a cache of it's code
+
+    The names in the definitions are resolved with those of the other
+    definition files in the directory, like `node_gen.generate` does. The
+    cache holds importlib's magic number, the key of the code (a hash of the
+    definition files and of the generator's key) and the marshalled code.
+    """
+
+    def __init__(self, fullname, path, options):
+        super().__init__()
+        self.name = fullname
+        self.path = path
+        # The options for the SourceGenerator
+        self._slots, self._specialized = options
+
+    def is_package(self, fullname):
+        return False
+
+    def get_filename(self, fullname):
+        return self.path
+
+    def get_source(self, fullname):
+        """Get the source generated from the definitions.
+        """
+        return self._generate(self._read_definition_files())
+
+    def get_code(self, fullname):
+        files = self._read_definition_files()
+        key = hashlib.sha256(node_gen._get_generator_key(
+            self._slots, self._specialized
+        ).encode())
+        for name, data in files:
+            key.update(b"\0" + name.encode() + b"\0" + data)
+        key = key.digest()
+        try:
+            cache_path = importlib.util.cache_from_source(self.path)
+        except NotImplementedError:
+            # The implementation does not cache bytecode
+            cache_path = None
+
+        code = None
+        if cache_path is not None:
+            code = self._load_cache(cache_path, key)
+        if code is None:
+            code = compile(self._generate(files), self.path, "exec")
+            if cache_path is not None and not sys.dont_write_bytecode:
+                self._write_cache(cache_path, key, code)
+        return code
+
+    def _read_definition_files(self):
+        """Get (name, contents) of the definition files in the directory of
+        this one, in the order of their names.
+        """
+        directory = os.path.dirname(self.path)
+        files = []
+        for name in sorted(os.listdir(directory)):
+            if name.startswith("tree_") and name.endswith(".tree"):
+                with open(os.path.join(directory, name), "rb") as f:
+                    files.append((name, f.read()))
+        return files
+
+    def _generate(self, files):
+        try:
+            modules = node_gen.resolve([
+                (name[5:-5], node_gen.Parser().parse(data.decode()))
+                for name, data in files
+            ])
+        except (node_gen.ParserError, node_gen.ResolutionError) as e:
+            raise ImportError(
+                "Could not auto-generate sources for '{}'".format(self.path),
+                name=self.name, path=self.path
+            ) from e
+
+        by_name = {
+            definition.name: definition
+            for module in modules for definition in module.definitions
+        }
+        own_name = os.path.basename(self.path)[5:-5]
+        [module] = [module for module in modules if module.name == own_name]
+        return node_gen._generate_output(
+            module, node_gen._get_external_parents(module, by_name),
+            self._slots, self._specialized
+        ).decode()
+
+    def _load_cache(self, cache_path, key):
+        header = importlib.util.MAGIC_NUMBER + key
+        try:
+            with open(cache_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if data[:len(header)] != header:
+            return None
+        try:
+            return marshal.loads(data[len(header):])
+        except (EOFError, ValueError, TypeError):
+            return None
+
+    def _write_cache(self, cache_path, key, code):
+        data = importlib.util.MAGIC_NUMBER + key + marshal.dumps(code)
+        # Written to a temporary file first, so that other processes never
+        # read half of it.
+        temp_path = "{}.{}".format(cache_path, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, cache_path)
+        except OSError:
+            # Caching is an optimization; read-only directories are fine.
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+
+
+# -----------------------------------------------------------------------------
+# Finding
+# -----------------------------------------------------------------------------
+class TreeFinder(importlib.abc.MetaPathFinder):
+    """Finds the definition files of modules, for sys.meta_path
+
+    `slots` and `specialized` are passed on to the `SourceGenerator`.
+    """
+
+    def __init__(self, slots=False, specialized=False):
+        super().__init__()
+        self._options = (slots, specialized)
+
+    def find_spec(self, fullname, path=None, target=None):
+        file_name = "tree_" + fullname.rpartition(".")[2] + ".tree"
+        for directory in (sys.path if path is None else path):
+            file_path = os.path.join(directory or os.curdir, file_name)
+            if os.path.isfile(file_path):
+                loader = TreeLoader(fullname, file_path, self._options)
+                return importlib.util.spec_from_file_location(
+                    fullname, file_path, loader=loader
+                )
+        return None
+
+
+# -----------------------------------------------------------------------------
+# API
+# -----------------------------------------------------------------------------
+def install(slots=False, specialized=False):
+    """Make the modules in definition files importable.
+
+    The finder is put before the others, so that the definitions are used
+    instead of (possibly stale) files generated from them. Returns the
+    TreeFinder installed.
+    """
+    finder = TreeFinder(slots=slots, specialized=specialized)
+    sys.meta_path.insert(0, finder)
+    return finder
+
+
+def uninstall(finder):
+    """Remove a TreeFinder installed by `install`.
+
+    Modules that were imported with it remain in sys.modules.
+    """
+    sys.meta_path.remove(finder)
@@ -7,13 +7,17 @@
 
 import os
 import re
+import builtins
+import itertools
+import json
+import hashlib
 import collections
 from textwrap import dedent
 
-import ply.lex
-import ply.yacc
-
-__all__ = ["PREFIX", "remove_comments", "ParserError", "Parser"]
+__all__ = [
+    "PREFIX", "remove_comments", "ParserError", "ResolutionError",
+    "GenerationError", "Parser", "PlyParser", "resolve"
+]
 
 PREFIX = dedent("""
     # -----------------------------------------------------------------------------
@@ -26,6 +30,7 @@
     # -----------------------------------------------------------------------------
 
     from py2c.tree import Node, identifier, fields_decorator
+    from py2c.tree import _identifier_symbols, _validation
 """).strip()
 
 
@@ -37,6 +42,33 @@ class ParserError(Exception):
     """
 
 
+class ResolutionError(Exception):
+    """Errors raised while resolving the names used in definitions
+
+    `module` is the name of the module of the definition with the error.
+    """
+
+    def __init__(self, module, message):
+        super().__init__(message)
+        self.module = module
+
+
+class GenerationError(Exception):
+    """Raised by `generate` when the sources for definition files could not be
+    generated.
+
+    `errors` is a list of (path of the definition file, exception raised), in
+    the order of the files.
+    """
+
+    def __init__(self, errors):
+        super().__init__("Could not auto-generate sources for:\n" + "\n".join(
+            "  '{}': {}: {}".format(path, e.__class__.__name__, e)
+            for path, e in errors
+        ))
+        self.errors = errors
+
+
 # -----------------------------------------------------------------------------
 # Helpers
 # -----------------------------------------------------------------------------
@@ -46,6 +78,16 @@ def remove_comments(text):
     return re.sub(r"(?m)\#.*($|\n)", "", text)
 
 
+def _prettify_tuple(fields):
+    if not fields:
+        return "()"
+    lines = ["("]
+    for name, type_, modifier in fields:
+        lines.append("    ({!r}, {}, {!r}),".format(name, type_, modifier))
+    lines.append(")")
+    return "\n".join(lines)
+
+
 def _prettify_list(li):
     indent = " "*4
     if li == []:
@@ -61,20 +103,307 @@ def _prettify_list(li):
         return "\n".join(lines)
 
 
+# -----------------------------------------------------------------------------
+# Specialized methods
+#    Straight-line versions of Node's generic methods, for a known list of
+#    fields. They fall back to the generic methods in the uncommon cases.
+# -----------------------------------------------------------------------------
+def _specialized_init(fields):
+    lines = [
+        "    def __init__(self, *args, **kwargs):",
+        "        object.__setattr__(self, '_finalized', 0)",
+        "        object.__setattr__(self, '_parent', None)",
+        "        object.__setattr__(self, '_hash', None)",
+        "        if not args:",
+        "            for name, value in kwargs.items():",
+        "                setattr(self, name, value)",
+        "            return",
+        "        if kwargs or len(args) != {}:".format(len(fields)),
+        "            Node.__init__(self, *args, **kwargs)",
+        "            return",
+    ]
+    if fields:
+        lines.append("        if _validation.enabled:")
+    for i, (name, type_, modifier) in enumerate(fields):
+        value = "args[{}]".format(i)
+        if modifier in ("ZERO_OR_MORE", "ONE_OR_MORE"):
+            lines.append(
+                "            self._validate_field_list({!r}, {}, {}, {})".format(
+                    name, value, type_, 0 if modifier == "ZERO_OR_MORE" else 1
+                )
+            )
+            continue
+        # Identifiers seen before are looked up, instead of checked again.
+        if type_ == "identifier":
+            condition = (
+                "{0}.__class__ is not str or {0} not in _identifier_symbols"
+            )
+            if modifier == "OPTIONAL":
+                condition = "{0} is not None and (" + condition + ")"
+        elif modifier == "OPTIONAL":
+            condition = "{0} is not None and not isinstance({0}, {1})"
+        else:
+            condition = "not isinstance({0}, {1})"
+        lines.append("            if " + condition.format(value, type_) + ":")
+        lines.append("                self._validate_type({!r}, {}, {})".format(
+            name, type_, value
+        ))
+    for i, (name, _, _) in enumerate(fields):
+        lines.append("        object.__setattr__(self, {!r}, args[{}])".format(
+            name, i
+        ))
+    return "\n".join(lines)
+
+
+def _specialized_eq(fields):
+    lines = [
+        "    def __eq__(self, other):",
+        "        if self is other:",
+        "            return True",
+        "        if self.__class__ is not other.__class__:",
+        "            return False",
+    ]
+    if not fields:
+        lines.append("        return True")
+    else:
+        comparisons = [
+            "self.{0} == other.{0}".format(name) for name, _, _ in fields
+        ]
+        lines += [
+            "        try:",
+            "            # Nodes with different hashes cannot be equal",
+            "            own_hash, other_hash = self._hash, other._hash",
+            "            if own_hash is not None and other_hash is not None:",
+            "                if own_hash != other_hash:",
+            "                    return False",
+            "            return (",
+            "                " + " and\n                ".join(comparisons),
+            "            )",
+            "        except AttributeError:",
+            "            return Node.__eq__(self, other)",
+        ]
+    # Defining __eq__ would otherwise make the class unhashable
+    lines += ["", "    __hash__ = Node.__hash__"]
+    return "\n".join(lines)
+
+
 Definition = collections.namedtuple("Definition", "name parent fields")
 
 
 # -----------------------------------------------------------------------------
 # Parsing of AST nodes declaration
 # -----------------------------------------------------------------------------
+_MODIFIERS = {
+    "?": "OPTIONAL",
+    "+": "ONE_OR_MORE",
+    "*": "ZERO_OR_MORE",
+}
+_LITERALS = "()[]:*?+,"
+
+# Like PLY's lexer does, "inherit" is matched before names, even as the start
+# of a longer name.
+_TOKEN_RE = re.compile(
+    r"(?P<INHERIT>inherit)|(?P<NAME>\w+)|(?P<literal>[()\[\]:*?+,])"
+    r"|(?P<newline>\n)|[ \t]+"
+)
+# Marks that the token after the last one taken has not been read yet
+_UNREAD = object()
+
+
+class _Token(collections.namedtuple("_Token", "type value lineno lexpos")):
+    """A token of the definitions, shown like PLY's LexToken in errors
+    """
+
+    def __str__(self):
+        return "LexToken({},{!r},{},{})".format(*self)
+
+
+def _tokenize(text):
+    """Yield the tokens in `text`, lazily, so that errors in the text are
+    reported no earlier than the parser would need the token.
+    """
+    lineno = 1
+    pos = 0
+    end = len(text)
+    match = _TOKEN_RE.match
+    while pos < end:
+        m = match(text, pos)
+        if m is None:
+            raise ParserError(
+                "Cannot generate tokens from: " + repr(text[pos:])
+            )
+        kind = m.lastgroup
+        if kind == "newline":
+            lineno += 1
+        elif kind == "literal":
+            yield _Token(m.group(), m.group(), lineno, pos)
+        elif kind is not None:
+            yield _Token(kind, m.group(), lineno, pos)
+        pos = m.end()
+
+
+def _get_definition(name, parent, fields, seen_node_names):
+    """Check a declaration of a node and get it's Definition.
+    """
+    if name in seen_node_names:
+        raise ParserError(
+            "{!r} has multiple declarations".format(name)
+        )
+    seen_node_names.add(name)
+
+    if fields != 'inherit':
+        # Check for duplicate fields
+        seen_fields = []
+        duplicated_fields = []
+        for field_name, _, _ in fields:
+            if field_name in seen_fields:
+                duplicated_fields.append(field_name)
+            else:
+                seen_fields.append(field_name)
+
+        if duplicated_fields:
+            msg = "{!r} has multiple attribute{} named {!r}"
+            raise ParserError(msg.format(
+                name,
+                "s" if len(duplicated_fields) > 1 else "",
+                ", ".join(duplicated_fields)
+            ))
+    elif parent is None:
+        msg = (
+            "Inheriting nodes need parents to inherit from. "
+            "See definition of {!r}"
+        )
+        raise ParserError(msg.format(name))
+
+    return Definition(name, parent, fields)
+
+
 class Parser(object):
     """Parses the definitions in the definition files
+
+    A hand-written recursive-descent parser for the grammar of `PlyParser`,
+    that needs no tables to be built when it's created. It gives the same
+    definitions, and raises the same errors on the same tokens, as
+    `PlyParser` does.
     """
 
     def __init__(self):
         super(Parser, self).__init__()
+        self._reset()
+
+    def _reset(self):
+        self.seen_node_names = set()
+        self._tokens = iter(())
+        self._token = _UNREAD
+
+    # -------------------------------------------------------------------------
+    # API
+    # -------------------------------------------------------------------------
+    def parse(self, text):
+        """Parses the definition text into a data representation of it.
+        """
+        self._reset()
+        self._tokens = _tokenize(remove_comments(text))
+
+        declarations = []
+        while self._peek() is not None:
+            declarations.append(self._parse_declaration())
+        return tuple(declarations)
+
+    # -------------------------------------------------------------------------
+    # Tokens
+    #    A token is only read when it's needed, so that errors are raised in
+    #    the same order as the LALR parser of `PlyParser` raises them.
+    # -------------------------------------------------------------------------
+    def _peek(self):
+        if self._token is _UNREAD:
+            self._token = next(self._tokens, None)
+        return self._token
+
+    def _at(self, token_type):
+        token = self._peek()
+        return token is not None and token.type == token_type
+
+    def _take(self, token_type):
+        if not self._at(token_type):
+            self._error()
+        value = self._token.value
+        self._token = _UNREAD
+        return value
+
+    def _error(self):
+        raise ParserError("Got unexpected token: " + str(self._peek()))
+
+    # -------------------------------------------------------------------------
+    # Parsing
+    # -------------------------------------------------------------------------
+    def _parse_declaration(self):
+        # declaration : NAME parent_class_opt colon_fields_opt
+        name = self._take("NAME")
+
+        parent = None
+        if self._at("("):
+            self._take("(")
+            parent = self._take("NAME")
+            self._take(")")
+
+        if self._at(":"):
+            self._take(":")
+            fields = self._parse_fields()
+        else:
+            fields = []
+
+        # Only another declaration (or the end) can follow, which is checked
+        # before the declaration is, like PLY's parser does.
+        if self._peek() is not None and not self._at("NAME"):
+            self._error()
+
+        return _get_definition(name, parent, fields, self.seen_node_names)
+
+    def _parse_fields(self):
+        # fields : '[' field_list ']' | INHERIT
+        if self._at("INHERIT"):
+            return self._take("INHERIT")
+
+        self._take("[")
+        fields = []
+        if not self._at("]"):
+            fields.append(self._parse_field())
+            while self._at(","):
+                self._take(",")
+                if self._at("]"):
+                    break
+                fields.append(self._parse_field())
+        self._take("]")
+        return fields
+
+    def _parse_field(self):
+        # field : NAME modifier NAME
+        type_ = self._take("NAME")
+        token = self._peek()
+        if token is not None and token.type in _MODIFIERS:
+            modifier = _MODIFIERS[self._take(token.type)]
+        else:
+            modifier = "NEEDED"
+        return (self._take("NAME"), type_, modifier)
+
+
+class PlyParser(object):
+    """Parses the definitions in the definition files, with PLY
+
+    The lexer and LALR parser are built every time it's created, which takes
+    much longer than the parsing. `Parser` is used instead; this is kept as
+    the reference for the grammar.
+    """
+
+    def __init__(self):
+        super(PlyParser, self).__init__()
+        # Imported here, as building the parsers is the only use of PLY
+        import ply.lex
+        import ply.yacc
+
         self.tokens = ("INHERIT", "NAME",)
-        self.literals = "()[]:*?+,"
+        self.literals = _LITERALS
 
         # Tokens for lexer
         self.t_INHERIT = r"inherit"
@@ -130,38 +459,7 @@ def p_zero_or_more_declaration(self, p):
 
     def p_declaration(self, p):
         "declaration : NAME parent_class_opt colon_fields_opt"
-        name, parent, fields = (p[1], p[2], p[3])
-        if name in self.seen_node_names:
-            raise ParserError(
-                "{!r} has multiple declarations".format(name)
-            )
-        self.seen_node_names.add(name)
-
-        if fields != 'inherit':
-            # Check for duplicate fields
-            seen_fields = []
-            duplicated_fields = []
-            for field_name, _, _ in fields:
-                if field_name in seen_fields:
-                    duplicated_fields.append(field_name)
-                else:
-                    seen_fields.append(field_name)
-
-            if duplicated_fields:
-                msg = "{!r} has multiple attribute{} named {!r}"
-                raise ParserError(msg.format(
-                    name,
-                    "s" if len(duplicated_fields) > 1 else "",
-                    ", ".join(duplicated_fields)
-                ))
-        elif parent is None:
-            msg = (
-                "Inheriting nodes need parents to inherit from. "
-                "See definition of {!r}"
-            )
-            raise ParserError(msg.format(name))
-
-        p[0] = Definition(name, parent, fields)
+        p[0] = _get_definition(p[1], p[2], p[3], self.seen_node_names)
 
     def p_parent_class_opt(self, p):
         """parent_class_opt : '(' NAME ')'
@@ -219,14 +517,160 @@ def p_modifier(self, p):
                     | '+'
                     | '*'
         """
-        if p[1] == "+":
-            p[0] = "ONE_OR_MORE"
-        elif p[1] == "*":
-            p[0] = "ZERO_OR_MORE"
-        elif p[1] == "?":
-            p[0] = "OPTIONAL"
-        else:
-            p[0] = "NEEDED"
+        p[0] = _MODIFIERS.get(p[1], "NEEDED")
+
+
+# -----------------------------------------------------------------------------
+# Resolution of the names used in the definitions of many files
+# -----------------------------------------------------------------------------
+ResolvedModule = collections.namedtuple(
+    "ResolvedModule", "name definitions imports"
+)
+
+# Names that the generated modules have, besides the classes defined
+_KNOWN_NAMES = frozenset(["Node", "identifier"]) | frozenset(
+    name for name, value in vars(builtins).items() if isinstance(value, type)
+)
+
+
+def _get_parents(name, by_name):
+    """Get the names of the ancestors of a class, nearest first, that are
+    defined in the definitions.
+    """
+    parents = []
+    parent = by_name[name][1].parent
+    while parent in by_name:
+        if parent == name or parent in parents:
+            raise ResolutionError(by_name[name][0], (
+                "{!r} is it's own ancestor, through {}"
+            ).format(name, ", ".join(repr(p) for p in parents + [parent])))
+        parents.append(parent)
+        parent = by_name[parent][1].parent
+    return parents
+
+
+def _flatten(definition, parents, by_name):
+    """Get a definition with the fields it inherits (from the nearest of it's
+    `parents` that has fields) put in it.
+    """
+    if definition.fields != "inherit":
+        return definition
+    for name in parents:
+        fields = by_name[name][1].fields
+        if fields != "inherit":
+            return definition._replace(fields=fields)
+    raise ResolutionError(by_name[definition.name][0], (
+        "{!r} inherits it's fields from 'Node', which has none"
+    ).format(definition.name))
+
+
+def _order_definitions(definitions):
+    """Order the definitions of a module so that parents come before their
+    sub-classes, keeping the order they are in otherwise.
+    """
+    remaining = collections.OrderedDict(
+        (definition.name, definition) for definition in definitions
+    )
+    ordered = []
+
+    def add(definition):
+        del remaining[definition.name]
+        if definition.parent in remaining:
+            add(remaining[definition.parent])
+        ordered.append(definition)
+
+    while remaining:
+        add(next(iter(remaining.values())))
+    return tuple(ordered)
+
+
+def _check_imports(resolved):
+    """Check that the modules do not import each other, directly or not.
+    """
+    imported = {
+        module.name: [name for name, _ in module.imports]
+        for module in resolved
+    }
+    for module in resolved:
+        path = [module.name]
+        stack = [iter(imported[module.name])]
+        while stack:
+            for name in stack[-1]:
+                if name == module.name:
+                    raise ResolutionError(module.name, (
+                        "Modules import each other: {}"
+                    ).format(", ".join(repr(p) for p in path + [name])))
+                if name not in path:
+                    path.append(name)
+                    stack.append(iter(imported[name]))
+                break
+            else:
+                stack.pop()
+                path.pop()
+
+
+def resolve(modules):
+    """Resolve the parents and field types of the definitions of modules.
+
+    `modules` is a list of (module name, definitions from the Parser) pairs.
+    Returns a list of ResolvedModule in the same order. Their definitions
+    have the fields they inherit put in them (instead of "inherit"), and
+    parents come before their sub-classes. Their imports are (module name,
+    names) pairs, of the names used from the other modules.
+
+    Parents need to be defined in one of the modules (or be `Node`), and the
+    types of fields too (or be built-in types or `identifier`); else a
+    ResolutionError is raised.
+    """
+    by_name = {}
+    for module_name, definitions in modules:
+        for definition in definitions:
+            if definition.name in by_name:
+                raise ResolutionError(module_name, (
+                    "{!r} is declared in both {!r} and {!r}"
+                ).format(
+                    definition.name, by_name[definition.name][0], module_name
+                ))
+            by_name[definition.name] = (module_name, definition)
+
+    resolved = []
+    for module_name, definitions in modules:
+        flattened = []
+        for definition in definitions:
+            parent = definition.parent
+            if parent not in by_name and parent not in (None, "Node"):
+                raise ResolutionError(module_name, (
+                    "{!r} has an unknown parent {!r}"
+                ).format(definition.name, parent))
+            parents = _get_parents(definition.name, by_name)
+            definition = _flatten(definition, parents, by_name)
+            for field_name, type_, _ in definition.fields:
+                if type_ not in by_name and type_ not in _KNOWN_NAMES:
+                    raise ResolutionError(module_name, (
+                        "Field {!r} of {!r} has an unknown type {!r}"
+                    ).format(field_name, definition.name, type_))
+            flattened.append(definition)
+
+        imports = collections.defaultdict(set)
+        for definition in flattened:
+            used = [definition.parent] + [
+                type_ for _, type_, _ in definition.fields
+            ]
+            for name in used:
+                if name in by_name and by_name[name][0] != module_name:
+                    imports[by_name[name][0]].add(name)
+
+        resolved.append(ResolvedModule(
+            module_name,
+            _order_definitions(flattened),
+            tuple(
+                (name, tuple(sorted(names)))
+                for name, names in sorted(imports.items())
+            )
+        ))
+
+    _check_imports(resolved)
+    return resolved
 
 
 # -----------------------------------------------------------------------------
@@ -234,44 +678,279 @@ def p_modifier(self, p):
 # -----------------------------------------------------------------------------
 class SourceGenerator(object):
     """Generates the code from the Parser's parsed data
+
+    Arguments:
+        slots
+            If True, the generated classes declare `__slots__` for their
+            fields, so that instances are stored without a `__dict__`.
+        specialized
+            If True, the generated classes get straight-line `__init__` and
+            `__eq__` methods for their fields. Sub-classes are expected to
+            redeclare (or inherit) the fields, like the ones generated here
+            do.
+        flatten
+            If True, the `_fields` of every class are assigned as a tuple,
+            after all the classes are defined (so that they may refer to
+            classes defined later). The definitions should be resolved, with
+            `resolve`, so that none of them inherits it's fields.
     """
 
-    def __init__(self):
+    def __init__(self, slots=False, specialized=False, flatten=False):
         super(SourceGenerator, self).__init__()
+        self.slots = slots
+        self.specialized = specialized
+        self.flatten = flatten
 
     # -------------------------------------------------------------------------
     # API
     # -------------------------------------------------------------------------
-    def generate_class(self, definition):
+    def generate_class(self, definition, inherited_slots=()):
         """Generates source code for a class from a `Definition`.
+
+        `inherited_slots` are the names of the slots that are already declared
+        by the parents of the class; they are not declared again.
         """
         class_declaration = "class {}({}):\n".format(
             definition.name, definition.parent or "object"
         )
-        if definition.fields == "inherit":
-            field_declaration = "    pass"
-        else:
-            field_declaration = (
-                "    @fields_decorator\n"
-                "    def _fields(cls):\n"
-                "        return {}"
-            ).format(_prettify_list(definition.fields))
-        return class_declaration + field_declaration
-
-    def generate_sources(self, data):
+        declarations = []
+        if self.slots:
+            declarations.append("    __slots__ = {!r}".format(
+                self._get_slots(definition, inherited_slots)
+            ))
+        if definition.fields != "inherit":
+            if not self.flatten:
+                declarations.append((
+                    "    @fields_decorator\n"
+                    "    def _fields(cls):\n"
+                    "        return {}"
+                ).format(_prettify_list(definition.fields)))
+            if self.specialized:
+                declarations.append(_specialized_init(definition.fields))
+                declarations.append(_specialized_eq(definition.fields))
+        if not declarations:
+            declarations.append("    pass")
+        return class_declaration + "\n\n".join(declarations)
+
+    def generate_fields(self, definition):
+        """Generates source code assigning the `_fields` of a class, as a
+        tuple, from a resolved `Definition`.
+        """
+        return "{}._fields = {}".format(
+            definition.name, _prettify_tuple(definition.fields)
+        )
+
+    def generate_sources(self, data, parents=()):
         """Generates source code from the data generated by `Parser`
+
+        `parents` are the definitions of the ancestors of the classes that
+        are defined in other modules, for the slots they declare.
         """
-        classes = []
-        for node in data:
-            classes.append(self.generate_class(node))
+        # Slots declared by (and for) each class, for it's sub-classes
+        declared_slots = {}
+        for node in itertools.chain(parents, data):
+            inherited_slots = declared_slots.get(node.parent, ())
+            declared_slots[node.name] = (
+                tuple(inherited_slots) + self._get_slots(node, inherited_slots)
+            )
+
+        classes = [
+            self.generate_class(node, declared_slots.get(node.parent, ()))
+            for node in data
+        ]
+        if self.flatten and data:
+            classes.append("\n".join(
+                self.generate_fields(node) for node in data
+            ))
 
         # Join classes and ensure newline at EOF
         return "\n\n\n".join(classes)
 
+    def _get_slots(self, definition, inherited_slots):
+        if definition.fields == "inherit":
+            return ()
+        return tuple(
+            name for name, _, _ in definition.fields
+            if name not in inherited_slots
+        )
+
+
+# -----------------------------------------------------------------------------
+# Generation of files
+#    A manifest in the output directory records the hashes of each definition
+#    file and of the output generated from it, along with a key for the
+#    generator, so that only the files that changed are generated again.
+# -----------------------------------------------------------------------------
+MANIFEST_NAME = ".node_gen-manifest.json"
+
+
+def _get_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _get_file_hash(path):
+    try:
+        with open(path, "rb") as f:
+            return _get_hash(f.read())
+    except OSError:
+        return None
+
+
+def _get_generator_key(slots, specialized):
+    """Get a key for what, besides the definitions, the outputs depend on;
+    the source of this module (as it's version) and the options.
+    """
+    with open(__file__, "rb") as f:
+        version = _get_hash(f.read())
+    return "{} slots={} specialized={}".format(version, slots, specialized)
+
+
+def _load_manifest(path, generator):
+    """Load the entries of a manifest, if it was written by the same
+    generator.
+    """
+    try:
+        with open(path, "rt") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict):
+        return {}
+    if manifest.get("generator") != generator:
+        return {}
+    return manifest.get("files", {})
+
+
+def _write_manifest(path, generator, entries):
+    with open(path, "wt") as f:
+        json.dump(
+            {"generator": generator, "files": entries}, f,
+            indent=4, sort_keys=True
+        )
+        f.write("\n")
+
+
+def _dump_definitions(definitions):
+    """Convert definitions to lists, for the manifest.
+    """
+    return [
+        [name, parent, fields if fields == "inherit" else [
+            list(field) for field in fields
+        ]]
+        for name, parent, fields in definitions
+    ]
+
+
+def _load_definitions(data):
+    """Convert definitions from the manifest back to `Definition`s.
+    """
+    return tuple(
+        Definition(name, parent, fields if fields == "inherit" else [
+            tuple(field) for field in fields
+        ])
+        for name, parent, fields in data
+    )
+
+
+def _get_external_parents(module, by_name):
+    """Get the definitions of the ancestors of the classes of a module that
+    are defined in the other modules, ancestors first.
+    """
+    own_names = set(definition.name for definition in module.definitions)
+    parents = []
+    for definition in module.definitions:
+        chain = []
+        parent = definition.parent
+        while parent in by_name:
+            if parent not in own_names:
+                chain.append(by_name[parent])
+            parent = by_name[parent].parent
+        for parent in reversed(chain):
+            if parent not in parents:
+                parents.append(parent)
+    return tuple(parents)
+
+
+def _parse_definitions(text):
+    """Parse the text of a definition file, in a worker process.
+    """
+    return Parser().parse(text)
+
+
+def _generate_output(module, parents, slots, specialized):
+    """Generate the contents of an output file from a ResolvedModule, in a
+    worker process.
+    """
+    src_gen = SourceGenerator(
+        slots=slots, specialized=specialized, flatten=True
+    )
+    header = PREFIX
+    for name, names in module.imports:
+        header += "\nfrom .{} import {}".format(name, ", ".join(names))
+    sources = src_gen.generate_sources(module.definitions, parents)
+    return (header + "\n\n\n" + sources + "\n").encode()
+
+
+def _map(function, arguments, processes):
+    """Call `function` with each of the tuples of `arguments`, in a pool of
+    `processes` processes if that's more than one (and so are the arguments).
+
+    Returns a list of (result, exception raised), in the order of the
+    arguments.
+    """
+    if processes is None or processes < 2 or len(arguments) < 2:
+        results = []
+        for args in arguments:
+            try:
+                result = function(*args)
+            except Exception as e:
+                results.append((None, e))
+            else:
+                results.append((result, None))
+        return results
+
+    # Imported here, as it's slow to import, for the users of the Parser
+    import concurrent.futures
+
+    with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+        futures = [executor.submit(function, *args) for args in arguments]
+        concurrent.futures.wait(futures)
+    return [
+        (None, future.exception()) if future.exception() is not None
+        else (future.result(), None)
+        for future in futures
+    ]
+
 
 # API
-def generate(source_dir, output_dir=None, update=False):  # coverage: not missing
+def generate(source_dir, output_dir=None, update=False, slots=False,  # coverage: not missing
+             specialized=False, processes=None):
     """Generate sources for the Nodes definition files in `source_dir`
+
+    The names used in the definitions of all the files are resolved (see
+    `resolve`) before any source is generated, and the modules generated
+    declare the fields of every class as a tuple. Names used from other
+    files are imported relative to the module; so `output_dir` should be a
+    package.
+
+    Only the definition files that changed since they were last generated
+    are parsed again, going by a manifest in `output_dir`; the others'
+    definitions are kept in it. Only the modules whose definitions (or the
+    definitions they use from other files) changed, or whose outputs changed
+    or are missing, are generated again. Outputs that come out the same as
+    the existing ones are not written again, keeping their mtimes. If
+    `update` is True, all the files are parsed and generated again.
+
+    The files are parsed and generated in this process, or in a pool of
+    `processes` processes when that's more than one. A pool is only used when
+    asked for, as making one re-imports the `__main__` module in the new
+    processes where they are not forked, which scripts like `setup.py` are
+    not guarded for. The outputs are written in the order of the files'
+    names. The errors for all the files that could not be generated are
+    raised together, as a GenerationError, after the others are written.
+
+    `slots` and `specialized` are passed on to the `SourceGenerator`.
+    Returns the paths of the output files that were written.
     """
     if output_dir is None:
         output_dir = source_dir
@@ -281,38 +960,101 @@ def report(*args):
         print("[py2c.tree.node_gen]", *args)
 
     # Discover files
-    files_to_convert = [
+    files_to_convert = sorted(
         fname for fname in os.listdir(os.path.realpath(source_dir))
         if fname.endswith(".tree") and fname.startswith("tree_")
-    ]
+    )
 
-    # Writing the node-declaration files
-    parser = Parser()
-    src_gen = SourceGenerator()
+    manifest_name = os.path.join(output_dir, MANIFEST_NAME)
+    generator = _get_generator_key(slots, specialized)
+    old_entries = _load_manifest(manifest_name, generator)
+    entries = {}
 
+    # Parsing the files that changed
+    to_parse = []
     for fname in files_to_convert:
         infile_name = os.path.join(source_dir, fname)
-        outfile_name = os.path.join(output_dir, fname[5:-5] + ".py")
-        if os.path.exists(outfile_name) and not update:
-            continue
-
-        with open(infile_name, "rt") as infile:
-            text = infile.read()
+        with open(infile_name, "rb") as infile:
+            data = infile.read()
 
-        try:
+        entry = entries[fname] = {"source": _get_hash(data)}
+        old_entry = old_entries.get(fname, {})
+        if (not update and old_entry.get("source") == entry["source"] and
+                "definitions" in old_entry):
+            entry["definitions"] = old_entry["definitions"]
+        else:
             report("[Py2C] Loading '{}'".format(infile_name))
-            sources = src_gen.generate_sources(parser.parse(text))
-        except Exception:
-            raise Exception(
-                "Could not auto-generate sources for '{}'".format(infile_name)
-            )
+            to_parse.append((fname, infile_name, data.decode()))
+
+    results = _map(
+        _parse_definitions, [(text,) for _, _, text in to_parse], processes
+    )
+    errors = []
+    for (fname, infile_name, _), (definitions, error) in zip(
+            to_parse, results):
+        if error is not None:
+            errors.append((infile_name, error))
         else:
+            entries[fname]["definitions"] = _dump_definitions(definitions)
+    if errors:
+        raise GenerationError(errors)
+
+    # Resolving the names used across the files
+    try:
+        modules = resolve([
+            (fname[5:-5], _load_definitions(entries[fname]["definitions"]))
+            for fname in files_to_convert
+        ])
+    except ResolutionError as e:
+        infile_name = os.path.join(source_dir, "tree_" + e.module + ".tree")
+        raise GenerationError([(infile_name, e)])
+    by_name = {
+        definition.name: definition
+        for module in modules for definition in module.definitions
+    }
+
+    # Generating the modules that changed
+    pending = []
+    for fname, module in zip(files_to_convert, modules):
+        outfile_name = os.path.join(output_dir, fname[5:-5] + ".py")
+        parents = _get_external_parents(module, by_name)
+
+        entry = entries[fname]
+        entry["inputs"] = _get_hash(repr((module, parents)).encode())
+        entry["output"] = _get_file_hash(outfile_name)
+        if (update or entry["output"] is None or
+                old_entries.get(fname) != entry):
+            pending.append((fname, outfile_name, module, parents))
+
+    results = _map(_generate_output, [
+        (module, parents, slots, specialized)
+        for _, _, module, parents in pending
+    ], processes)
+
+    # Writing the node-declaration files
+    written = []
+    for (fname, outfile_name, _, _), (output, error) in zip(
+            pending, results):
+        entry = entries[fname]
+        if error is not None:
+            errors.append((os.path.join(source_dir, fname), error))
+            # Generated again next time
+            del entries[fname]
+            continue
+
+        output_hash = _get_hash(output)
+        if output_hash != entry["output"]:
             report("[Py2C] Writing '{}'".format(outfile_name))
-            with open(outfile_name, "w+t") as outfile:
-                outfile.write(PREFIX)
-                outfile.write("\n\n\n")
-                outfile.write(sources)
-                outfile.write("\n")
+            with open(outfile_name, "wb") as outfile:
+                outfile.write(output)
+            written.append(outfile_name)
+        entry["output"] = output_hash
+
+    if entries != old_entries:
+        _write_manifest(manifest_name, generator, entries)
+    if errors:
+        raise GenerationError(errors)
+    return written
 
 if __name__ == '__main__':
     generate("", "", True)
@@ -0,0 +1,136 @@
+"""Visiting the top-level statements of trees in parallel
+
+Many analyses (and transformations) of a module handle it's top-level
+statements independently of each other. `visit_in_parallel` visits chunks of
+them with visitors of their own, in a pool of processes, and merges the
+results back in the order of the statements; so they do not depend on which
+process finishes first.
+"""
+
+import os
+import multiprocessing
+import concurrent.futures
+
+from py2c.tree.visitors import (
+    Access, RecursiveNodeTransformer, _Changes, _splice
+)
+
+__all__ = ["visit_in_parallel"]
+
+# Number of chunks of statements per process, to even out their work
+_CHUNKS_PER_PROCESS = 4
+
+# The nodes being visited, which processes forked for the visit inherit
+# instead of being sent them
+_inherited_nodes = None
+
+
+def _forks():
+    """Are new processes made by forking this one?
+    """
+    get_start_method = getattr(multiprocessing, "get_start_method", None)
+    if get_start_method is None:
+        # Python 3.3 forks on POSIX
+        return os.name == "posix"
+    return get_start_method() == "fork"
+
+
+def _visit_chunk(visitor_factory, parent_class, field, indices, nodes=None):
+    """Visit nodes with a new visitor, in a worker process.
+
+    Returns the visitor, with what it found, and the nodes (or their
+    replacements, from transformers).
+    """
+    if nodes is None:
+        nodes = [_inherited_nodes[i] for i in indices]
+    visitor = visitor_factory()
+    # Only the class of the parent is needed for access paths, and the
+    # parent is not sent to the process.
+    root = (parent_class.__new__(parent_class), None, None, None, 0)
+    transforms = isinstance(visitor, RecursiveNodeTransformer)
+    if transforms:
+        visitor.changed = False
+
+    results = []
+    for index, node in zip(indices, nodes):
+        if visitor.track_access_path:
+            visitor._access_path[:] = [Access(parent_class, field, index)]
+        visitor._cursor = (node, root, field, index, 1)
+        retval = visitor._visit(node)
+        if transforms:
+            if retval is not node:
+                visitor.changed = True
+            results.append(retval)
+    visitor._cursor = None
+    del visitor._access_path[:]
+    return visitor, results
+
+
+def visit_in_parallel(visitor_factory, node, field="body", processes=None,
+                      executor=None):
+    """Visit the nodes in a field of `node` (like the statements of a Module)
+    with visitors made by `visitor_factory` (like a visitor class), in a pool
+    of processes.
+
+    Returns a visitor made in this process, into which what the others found
+    is merged with it's `merge` method, in the order of the nodes. The
+    factory, the nodes and the visitors are pickled, so their classes should
+    be importable. The nodes replaced by transformers are put in `node`, in
+    place of the originals; other changes made by the processes are lost.
+
+    `executor` may be a concurrent.futures process pool to use (and reuse),
+    instead of a pool of `processes` made for the call. It's work is split
+    between `processes` (or the number of CPUs) processes. The processes of a
+    pool made for the call are forked (where they can be) once the nodes are
+    known, so the nodes are not sent to them.
+    """
+    global _inherited_nodes
+    visitor = visitor_factory()
+    values = getattr(node, field)
+    base_class = visitor.base_class
+    transforms = isinstance(visitor, RecursiveNodeTransformer)
+    if transforms and not isinstance(values, list):
+        raise TypeError(
+            "Transformers can only replace the nodes of lists, not {}".format(
+                values.__class__.__name__
+            )
+        )
+    indices = [
+        i for i, value in enumerate(values) if isinstance(value, base_class)
+    ]
+
+    own_executor = executor is None
+    inherit = own_executor and _forks()
+    if own_executor:
+        executor = concurrent.futures.ProcessPoolExecutor(processes)
+    try:
+        workers = processes or multiprocessing.cpu_count()
+        size = max(1, -(-len(indices) // (workers * _CHUNKS_PER_PROCESS)))
+        chunks = [indices[i:i + size] for i in range(0, len(indices), size)]
+        if inherit:
+            # The processes are forked as the chunks are submitted
+            _inherited_nodes = values
+        futures = [
+            executor.submit(
+                _visit_chunk, visitor_factory, node.__class__, field, chunk,
+                None if inherit else [values[i] for i in chunk]
+            )
+            for chunk in chunks
+        ]
+        results = [future.result() for future in futures]
+    finally:
+        _inherited_nodes = None
+        if own_executor:
+            executor.shutdown()
+
+    if transforms:
+        visitor.changed = False
+    changes = _Changes(values)
+    for chunk, (copy, replacements) in zip(chunks, results):
+        visitor.merge(copy)
+        if transforms:
+            visitor.changed = visitor.changed or copy.changed
+            changes.update(zip(chunk, replacements))
+    if transforms and changes:
+        _splice(changes, base_class)
+    return visitor
@@ -0,0 +1,249 @@
+"""Matching of Node trees against patterns
+
+A pattern describes the shape of nodes, like "a Call whose func is the Name
+'len'", which is written as:
+
+    Pattern(Call, func=Pattern(Name, id="len"))
+
+Fields that are not given may have any value. The values of the fields given
+may be nested patterns, `ANY`, a `Capture` (to get the value matched), lists
+(or tuples) of those, or other values that the field's value should be equal
+to.
+
+Patterns are compiled once into matcher functions, which are used to match
+nodes or find them in trees. Searching a tree walks it, skipping the
+sub-trees that can't contain nodes of the pattern's class; many searches of
+the same tree can use a NodeIndex of it, to only look at such nodes.
+"""
+
+import heapq
+
+from py2c.tree import FieldError, _get_schema
+from py2c.tree.walk import walk
+
+__all__ = ["ANY", "Capture", "Pattern", "compile_pattern", "NodeIndex"]
+
+_SEQUENCE_TYPES = (list, tuple)
+_MISSING = object()
+
+
+# -----------------------------------------------------------------------------
+# Patterns
+# -----------------------------------------------------------------------------
+class _Any(object):
+    """Matches any value of a field that is set
+    """
+
+    def __repr__(self):
+        return "ANY"
+
+
+ANY = _Any()
+
+
+class Capture(object):
+    """Matches what `pattern` matches, and gives the value matched as `name`
+    """
+
+    def __init__(self, name, pattern=ANY):
+        super().__init__()
+        self.name = name
+        self.pattern = pattern
+
+    def __repr__(self):
+        return "Capture({!r}, {!r})".format(self.name, self.pattern)
+
+
+class Pattern(object):
+    """Matches nodes of `node_class` (or it's sub-classes), whose fields
+    match the patterns given for them.
+    """
+
+    def __init__(self, node_class, **fields):
+        super().__init__()
+        names = _get_schema(node_class).by_name
+        for name in fields:
+            if name not in names:
+                raise FieldError("{} has no field {!r}".format(
+                    node_class.__qualname__, name
+                ))
+        self.node_class = node_class
+        self.fields = fields
+
+    def __repr__(self):
+        return "Pattern({})".format(", ".join(
+            [self.node_class.__qualname__] + [
+                "{}={!r}".format(name, value)
+                for name, value in sorted(self.fields.items())
+            ]
+        ))
+
+
+# -----------------------------------------------------------------------------
+# Compilation of patterns
+#    Each part of a pattern is compiled into a function that takes a value
+#    and a dict, which it adds the captured values to, and returns whether
+#    the value matched.
+# -----------------------------------------------------------------------------
+def _match_any(value, captures):
+    return value is not _MISSING
+
+
+def _compile(pattern):
+    if pattern is ANY:
+        return _match_any
+    elif isinstance(pattern, Pattern):
+        return _compile_node(pattern)
+    elif isinstance(pattern, Capture):
+        return _compile_capture(pattern)
+    elif isinstance(pattern, _SEQUENCE_TYPES):
+        return _compile_sequence(pattern)
+    else:
+        return _compile_value(pattern)
+
+
+def _compile_node(pattern):
+    node_class = pattern.node_class
+    fields = tuple(
+        (name, _compile(value))
+        for name, value in sorted(pattern.fields.items())
+    )
+
+    def match(node, captures):
+        if not isinstance(node, node_class):
+            return False
+        for name, match_field in fields:
+            if not match_field(getattr(node, name, _MISSING), captures):
+                return False
+        return True
+    return match
+
+
+def _compile_capture(pattern):
+    name = pattern.name
+    match_value = _compile(pattern.pattern)
+
+    def match(value, captures):
+        if match_value(value, captures):
+            captures[name] = value
+            return True
+        return False
+    return match
+
+
+def _compile_sequence(pattern):
+    items = tuple(_compile(item) for item in pattern)
+    length = len(items)
+
+    def match(value, captures):
+        if not isinstance(value, _SEQUENCE_TYPES) or len(value) != length:
+            return False
+        for match_item, item in zip(items, value):
+            if not match_item(item, captures):
+                return False
+        return True
+    return match
+
+
+def _compile_value(pattern):
+    def match(value, captures):
+        return value is not _MISSING and value == pattern
+    return match
+
+
+class CompiledPattern(object):
+    """A Pattern compiled into a matcher function
+    """
+
+    def __init__(self, pattern):
+        super().__init__()
+        self.pattern = pattern
+        self.node_class = pattern.node_class
+        self._match = _compile_node(pattern)
+
+    def match(self, node):
+        """Match a node against the pattern.
+
+        Returns a dict of the values captured if it matched, else None.
+        """
+        captures = {}
+        if self._match(node, captures):
+            return captures
+        return None
+
+    def finditer(self, node):
+        """Yield (node, captures) for the nodes in the tree of `node` that
+        match the pattern, in pre-order.
+
+        `node` may be a NodeIndex of the tree instead.
+        """
+        if isinstance(node, NodeIndex):
+            candidates = node.nodes_of(self.node_class)
+        else:
+            candidates = walk(node, types=self.node_class)
+
+        match = self._match
+        for candidate in candidates:
+            captures = {}
+            if match(candidate, captures):
+                yield candidate, captures
+
+    def findall(self, node):
+        """Get a list of the nodes in the tree of `node` (or a NodeIndex)
+        that match the pattern, in pre-order.
+        """
+        return [found for found, _ in self.finditer(node)]
+
+
+def compile_pattern(pattern):
+    """Compile a Pattern, for matching nodes with.
+    """
+    if not isinstance(pattern, Pattern):
+        raise TypeError("Expected a Pattern, got {!r}".format(pattern))
+    return CompiledPattern(pattern)
+
+
+# -----------------------------------------------------------------------------
+# Indexes of trees
+# -----------------------------------------------------------------------------
+class NodeIndex(object):
+    """The nodes of a tree by their class, for searching it many times
+
+    The index is of the tree as it was when the index was created; it has to
+    be created again if the tree is changed.
+    """
+
+    def __init__(self, node):
+        super().__init__()
+        # Node class -> [(position in pre-order, node)]
+        self._by_class = {}
+        # Node class -> The classes in the tree that are it's sub-classes
+        self._sub_classes = {}
+
+        by_class = self._by_class
+        for position, node in enumerate(walk(node)):
+            try:
+                by_class[node.__class__].append((position, node))
+            except KeyError:
+                by_class[node.__class__] = [(position, node)]
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._by_class.values())
+
+    def nodes_of(self, node_class):
+        """Yield the nodes of `node_class` (or it's sub-classes) in the tree,
+        in pre-order.
+        """
+        try:
+            classes = self._sub_classes[node_class]
+        except KeyError:
+            classes = self._sub_classes[node_class] = [
+                cls for cls in self._by_class if issubclass(cls, node_class)
+            ]
+
+        if len(classes) == 1:
+            entries = self._by_class[classes[0]]
+        else:
+            entries = heapq.merge(*[self._by_class[cls] for cls in classes])
+        for _, node in entries:
+            yield node
@@ -0,0 +1,604 @@
+"""A compact binary serialization format for finalized Node trees
+
+Pickling a Node tree stores the full path of a node's class and the names of
+it's fields for every node. This format stores them once per stream instead:
+
+    stream  := MAGIC version:varint tree*
+    tree    := record+  (in pre-order; complete when all children are read)
+    record  := class item*  (the items of the fields, in order)
+    class   := 0 module:string qualname:string layout
+             | k (k >= 1) the (k - 1)th class of the stream
+    layout  := count:varint (0 | 1)*  (1 for the sequence fields)
+    item    := 0  a child node, whose record comes later
+             | 1 scalar  (which is added to the scalar table)
+             | k (k >= 2) the (k - 2)th scalar of the stream
+
+A sequence field is encoded as it's length followed by it's items. Integers
+are varints (zig-zag encoded for scalars) and strings are length-prefixed
+UTF-8. Equal scalars (like repeated identifiers) are stored once per stream.
+
+The class and scalar tables are shared by all the trees in a stream, so they
+are written as they are first used, which allows streaming the trees.
+
+`dump` writes a tree as a stream of it's own, prefixed with it's length (a
+varint), so that `load` reads exactly that tree and leaves the file after it.
+"""
+
+import io
+import struct
+import pickle
+import importlib
+
+from py2c.tree import (
+    Node, identifier, trusted_construction, _get_schema, _intern_identifier,
+    _FINALIZED
+)
+
+__all__ = [
+    "SerializationError", "TreeWriter", "TreeReader", "SerializedTree",
+    "dump", "dumps", "load", "loads",
+]
+
+MAGIC = b"PY2CTREE"
+VERSION = 1
+
+# Python 3.8+
+_PickleBuffer = getattr(pickle, "PickleBuffer", None)
+
+_double = struct.Struct("<d")
+
+# No item (or length) without a length-prefix takes more bytes than this.
+_MARGIN = 32
+_BUFFER_SIZE = 2 ** 16
+
+_SEQUENCE_MODIFIERS = ('ZERO_OR_MORE', 'ONE_OR_MORE')
+
+# Item tags
+_CHILD = 0
+_NEW_SCALAR = 1
+_SCALAR_BASE = 2
+
+# Scalar tags
+_NONE, _TRUE, _FALSE = b"NTF"
+_INT, _BIG_INT, _FLOAT, _STR, _BYTES = b"iIfsb"
+
+
+# -----------------------------------------------------------------------------
+# Exceptions
+# -----------------------------------------------------------------------------
+class SerializationError(Exception):
+    """Errors raised while serializing or deserializing Node trees
+    """
+
+
+_TRUNCATED_ERR_MSG = "The stream ended in the middle of a tree"
+
+
+# -----------------------------------------------------------------------------
+# Helpers
+# -----------------------------------------------------------------------------
+def _encode_varint(value):
+    encoded = bytearray()
+    while value > 0x7f:
+        encoded.append((value & 0x7f) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def _read_varint(data, pos):
+    result = data[pos]
+    pos += 1
+    if result < 0x80:
+        return result, pos
+    result &= 0x7f
+    shift = 7
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _encode_string(value):
+    encoded = value.encode("utf-8")
+    return _encode_varint(len(encoded)) + encoded
+
+
+def _encode_scalar(value):
+    # bool is a sub-class of int, so is checked before it.
+    if value is None:
+        return bytes([_NONE])
+    elif value is True:
+        return bytes([_TRUE])
+    elif value is False:
+        return bytes([_FALSE])
+    elif isinstance(value, int):
+        if -2 ** 63 <= value < 2 ** 63:
+            return bytes([_INT]) + _encode_varint((value << 1) ^ (value >> 63))
+        encoded = value.to_bytes(
+            (value.bit_length() + 8) // 8, "little", signed=True
+        )
+        return bytes([_BIG_INT]) + _encode_varint(len(encoded)) + encoded
+    elif isinstance(value, float):
+        return bytes([_FLOAT]) + _double.pack(value)
+    elif isinstance(value, str):
+        return bytes([_STR]) + _encode_string(value)
+    elif isinstance(value, bytes):
+        return bytes([_BYTES]) + _encode_varint(len(value)) + value
+    else:
+        raise SerializationError(
+            "Cannot serialize values of type {}".format(
+                value.__class__.__qualname__
+            )
+        )
+
+
+def _scalar_key(value):
+    # Keyed by type, so that 1, 1.0 and True are not the same scalar, and
+    # floats by their bytes, so that 0.0 and -0.0 are not either.
+    if value.__class__ is float:
+        return (float, _double.pack(value))
+    return (value.__class__, value)
+
+
+def _get_layout(cls):
+    return tuple(
+        modifier in _SEQUENCE_MODIFIERS
+        for _, _, modifier in _get_schema(cls).fields
+    )
+
+
+def _resolve_class(module_name, qualname):
+    try:
+        obj = importlib.import_module(module_name)
+        for name in qualname.split("."):
+            obj = getattr(obj, name)
+    except (ImportError, AttributeError):
+        raise SerializationError(
+            "Could not find class {}.{}".format(module_name, qualname)
+        )
+    if not (isinstance(obj, type) and issubclass(obj, Node)):
+        raise SerializationError(
+            "{}.{} is not a Node class".format(module_name, qualname)
+        )
+    return obj
+
+
+# -----------------------------------------------------------------------------
+# Writing
+# -----------------------------------------------------------------------------
+class TreeWriter(object):
+    """Writes Node trees to a binary stream, in the compact format.
+
+    The data is buffered; it is written to the stream when the buffer fills
+    up, on `flush` and on leaving the writer as a context manager.
+    """
+
+    def __init__(self, stream, buffer_size=_BUFFER_SIZE):
+        super().__init__()
+        self._stream = stream
+        self._buffer_size = buffer_size
+        self._buffer = bytearray(MAGIC + _encode_varint(VERSION))
+        # class -> (encoded reference, ((field name, is sequence), ...))
+        self._classes = {}
+        # scalar key -> encoded reference
+        self._scalars = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+    def write(self, node):
+        """Write the tree of `node`, finalizing it first.
+        """
+        node.finalize()
+
+        buffer = self._buffer
+        classes = self._classes
+        scalars = self._scalars
+        child = bytes([_CHILD])
+
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            cls = node.__class__
+            try:
+                reference, fields = classes[cls]
+            except KeyError:
+                # The first use of a class is it's definition.
+                self._add_class(cls)
+                reference, fields = b"", classes[cls][1]
+            buffer += reference
+
+            children = []
+            for name, is_sequence in fields:
+                value = getattr(node, name)
+                if is_sequence:
+                    buffer += _encode_varint(len(value))
+                else:
+                    value = (value,)
+                for elem in value:
+                    if isinstance(elem, Node):
+                        buffer += child
+                        children.append(elem)
+                        continue
+                    try:
+                        key = _scalar_key(elem)
+                        buffer += scalars[key]
+                    except KeyError:
+                        buffer += self._add_scalar(key, elem)
+                    except TypeError:  # Unhashable
+                        raise SerializationError(
+                            "Cannot serialize values of type {}".format(
+                                elem.__class__.__qualname__
+                            )
+                        )
+            stack.extend(reversed(children))
+
+            if len(buffer) >= self._buffer_size:
+                self.flush()
+                buffer = self._buffer
+
+    def flush(self):
+        """Write the buffered data to the stream.
+        """
+        if self._buffer:
+            self._stream.write(self._buffer)
+            self._buffer = bytearray()
+
+    def _add_class(self, cls):
+        layout = _get_layout(cls)
+        self._buffer += b"".join([
+            _encode_varint(0),
+            _encode_string(cls.__module__),
+            _encode_string(cls.__qualname__),
+            _encode_varint(len(layout)),
+            bytes(layout),
+        ])
+        self._classes[cls] = (
+            _encode_varint(len(self._classes) + 1),
+            tuple(zip(_get_schema(cls).names, layout))
+        )
+
+    def _add_scalar(self, key, value):
+        encoded = bytes([_NEW_SCALAR]) + _encode_scalar(value)
+        self._scalars[key] = _encode_varint(len(self._scalars) + _SCALAR_BASE)
+        return encoded
+
+
+# -----------------------------------------------------------------------------
+# Reading
+# -----------------------------------------------------------------------------
+class TreeReader(object):
+    """Reads Node trees from a binary stream written by a TreeWriter.
+
+    The trees are finalized Nodes; their classes are imported by name.
+    """
+
+    def __init__(self, stream, chunk_size=_BUFFER_SIZE):
+        super().__init__()
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._data = b""
+        self._pos = 0
+        # (class, ((is sequence, is identifier), ...))
+        self._classes = []
+        self._scalars = []
+        self._read_header()
+
+    @classmethod
+    def _from_buffer(cls, data):
+        # Reads directly from a bytes-like object, without copying it.
+        if not isinstance(data, bytes):
+            data = memoryview(data).cast("B")
+        reader = cls.__new__(cls)
+        reader._stream = None
+        reader._data = data
+        reader._pos = 0
+        reader._classes = []
+        reader._scalars = []
+        reader._read_header()
+        return reader
+
+    def __iter__(self):
+        while True:
+            try:
+                yield self.read()
+            except EOFError:
+                return
+
+    def read(self):
+        """Read the next tree from the stream.
+
+        Raises EOFError if there are no more trees in the stream.
+        """
+        data, pos = self._refill(self._data, self._pos, _MARGIN)
+        if pos == len(data):
+            raise EOFError("No more trees in the stream")
+
+        classes, scalars = self._classes, self._scalars
+        # (class, values, number of children)
+        records = []
+        pending = 1
+        limit = len(data) - _MARGIN
+        try:
+            while pending:
+                if pos > limit:
+                    data, pos = self._refill(data, pos, _MARGIN)
+                    limit = len(data) - _MARGIN
+                class_id, pos = _read_varint(data, pos)
+                if class_id == 0:
+                    data, pos = self._read_class(data, pos)
+                    class_id = len(classes)
+                cls, fields = classes[class_id - 1]
+
+                values = []
+                num_children = 0
+                for is_sequence, is_identifier in fields:
+                    if pos > limit:
+                        data, pos = self._refill(data, pos, _MARGIN)
+                        limit = len(data) - _MARGIN
+                    # Values of sequences are collected in a list, others are
+                    # added to the values directly.
+                    if is_sequence:
+                        length, pos = _read_varint(data, pos)
+                        target = []
+                        values.append(target)
+                    else:
+                        length = 1
+                        target = values
+
+                    for _ in range(length):
+                        if pos > limit:
+                            data, pos = self._refill(data, pos, _MARGIN)
+                            limit = len(data) - _MARGIN
+                        # Most items are a single byte.
+                        item = data[pos]
+                        pos += 1
+                        if item & 0x80:
+                            item, pos = _read_varint(data, pos - 1)
+                        if item >= _SCALAR_BASE:
+                            target.append(scalars[item - _SCALAR_BASE])
+                        elif item == _CHILD:
+                            target.append(_CHILD_PLACEHOLDER)
+                            num_children += 1
+                        else:
+                            data, pos = self._read_scalar(data, pos)
+                            limit = len(data) - _MARGIN
+                            # Names are replaced with their shared copies,
+                            # once per stream, in the table of scalars.
+                            if is_identifier and scalars[-1] is not None:
+                                scalars[-1] = _intern_identifier(scalars[-1])
+                            target.append(scalars[-1])
+
+                records.append((cls, values, num_children))
+                pending += num_children - 1
+        except (IndexError, struct.error):
+            raise SerializationError(_TRUNCATED_ERR_MSG)
+
+        self._data, self._pos = data, pos
+        return self._build(records)
+
+    # -------------------------------------------------------------------------
+    # Internals
+    # -------------------------------------------------------------------------
+    def _refill(self, data, pos, size):
+        """Get at least `size` bytes after `pos`, if the stream has them.
+
+        Returns the new data and position in it.
+        """
+        available = len(data) - pos
+        if available >= size or self._stream is None:
+            return data, pos
+
+        chunks = [data[pos:]]
+        while available < size:
+            chunk = self._stream.read(max(self._chunk_size, size - available))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            available += len(chunk)
+        return b"".join(chunks), 0
+
+    def _read_bytes(self, data, pos):
+        """Read a length-prefixed byte string
+        """
+        data, pos = self._refill(data, pos, _MARGIN)
+        length, pos = _read_varint(data, pos)
+        data, pos = self._refill(data, pos, length)
+        if pos + length > len(data):
+            raise SerializationError(_TRUNCATED_ERR_MSG)
+        return data, pos + length, bytes(data[pos:pos + length])
+
+    def _read_header(self):
+        data, pos = self._refill(self._data, self._pos, len(MAGIC) + _MARGIN)
+        if bytes(data[pos:pos + len(MAGIC)]) != MAGIC:
+            raise SerializationError("Not a stream of serialized Node trees")
+        try:
+            version, pos = _read_varint(data, pos + len(MAGIC))
+        except IndexError:
+            raise SerializationError("The stream ended in it's header")
+        if version != VERSION:
+            raise SerializationError(
+                "Unsupported version of the format: {}".format(version)
+            )
+        self._data, self._pos = data, pos
+
+    def _read_class(self, data, pos):
+        data, pos, module_name = self._read_bytes(data, pos)
+        data, pos, qualname = self._read_bytes(data, pos)
+        data, pos, layout = self._read_bytes(data, pos)
+
+        module_name = module_name.decode("utf-8")
+        qualname = qualname.decode("utf-8")
+        cls = _resolve_class(module_name, qualname)
+        layout = tuple(bool(flag) for flag in layout)
+        if layout != _get_layout(cls):
+            raise SerializationError(
+                "The fields of {}.{} have changed since it was written".format(
+                    module_name, qualname
+                )
+            )
+        is_identifier = (
+            type_ is identifier for _, type_, _ in _get_schema(cls).fields
+        )
+        self._classes.append((cls, tuple(zip(layout, is_identifier))))
+        return data, pos
+
+    def _read_scalar(self, data, pos):
+        tag = data[pos]
+        pos += 1
+        if tag == _NONE:
+            value = None
+        elif tag == _TRUE:
+            value = True
+        elif tag == _FALSE:
+            value = False
+        elif tag == _INT:
+            value, pos = _read_varint(data, pos)
+            value = (value >> 1) ^ -(value & 1)
+        elif tag == _FLOAT:
+            value = _double.unpack_from(data, pos)[0]
+            pos += _double.size
+        elif tag == _STR:
+            data, pos, value = self._read_bytes(data, pos)
+            value = value.decode("utf-8")
+        elif tag == _BYTES:
+            data, pos, value = self._read_bytes(data, pos)
+        elif tag == _BIG_INT:
+            data, pos, value = self._read_bytes(data, pos)
+            value = int.from_bytes(value, "little", signed=True)
+        else:
+            raise SerializationError(
+                "Unknown type of scalar: {!r}".format(chr(tag))
+            )
+        self._scalars.append(value)
+        return data, pos
+
+    def _build(self, records):
+        # In reverse pre-order, the children of a node have been made (and
+        # pushed) right before it, it's first child being on the top.
+        #
+        # The trees were finalized when written, so the nodes are finalized
+        # as they are made, instead of by walking the tree again.
+        set_slot = object.__setattr__
+        made = []
+        with trusted_construction():
+            for cls, values, num_children in reversed(records):
+                if num_children:
+                    children = made[:-num_children - 1:-1]
+                    del made[-num_children:]
+                    node_children = children
+                    children = iter(children)
+                    for i, value in enumerate(values):
+                        if value is _CHILD_PLACEHOLDER:
+                            values[i] = next(children)
+                        elif value.__class__ is list:
+                            values[i] = tuple(
+                                next(children)
+                                if elem is _CHILD_PLACEHOLDER else elem
+                                for elem in value
+                            )
+                else:
+                    for i, value in enumerate(values):
+                        if value.__class__ is list:
+                            values[i] = tuple(value)
+                    node_children = ()
+
+                node = cls(*values)
+                set_slot(node, "_finalized", _FINALIZED)
+                for child in node_children:
+                    set_slot(child, "_parent", node)
+                made.append(node)
+
+        return made.pop()
+
+
+_CHILD_PLACEHOLDER = object()
+
+
+# -----------------------------------------------------------------------------
+# Pickling
+# -----------------------------------------------------------------------------
+class SerializedTree(object):
+    """A Node tree in the compact format, for pickling it efficiently.
+
+    With pickle protocol 5, the data is given to the `buffer_callback` as an
+    out-of-band buffer (so it can be sent without copying it).
+    """
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        super().__init__()
+        self.data = data
+
+    @classmethod
+    def from_node(cls, node):
+        return cls(dumps(node))
+
+    def to_node(self):
+        return loads(self.data)
+
+    def __reduce_ex__(self, protocol):
+        if protocol >= 5 and _PickleBuffer is not None:
+            return (self.__class__, (_PickleBuffer(self.data),))
+        return (self.__class__, (bytes(self.data),))
+
+
+# -----------------------------------------------------------------------------
+# API
+# -----------------------------------------------------------------------------
+def dump(node, stream):
+    """Write the tree of `node` to the binary `stream`, for `load`
+    """
+    data = dumps(node)
+    stream.write(_encode_varint(len(data)))
+    stream.write(data)
+
+
+def dumps(node):
+    """Get the tree of `node` serialized, as bytes
+    """
+    stream = io.BytesIO()
+    with TreeWriter(stream) as writer:
+        writer.write(node)
+    return stream.getvalue()
+
+
+def load(stream):
+    """Read a tree written by `dump` from the binary `stream`
+
+    Only the tree is read from the stream, so more of them can follow it.
+    Raises EOFError if the stream is at it's end.
+    """
+    # The length is read a byte at a time, to not read past it.
+    prefix = bytearray()
+    while not prefix or prefix[-1] & 0x80:
+        byte = stream.read(1)
+        if not byte:
+            if prefix:
+                raise SerializationError(_TRUNCATED_ERR_MSG)
+            raise EOFError("No more trees in the stream")
+        prefix += byte
+    length, _ = _read_varint(prefix, 0)
+
+    chunks = []
+    remaining = length
+    while remaining:
+        chunk = stream.read(remaining)
+        if not chunk:
+            raise SerializationError(_TRUNCATED_ERR_MSG)
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return loads(b"".join(chunks))
+
+
+def loads(data):
+    """Read a tree from a bytes-like object
+    """
+    return TreeReader._from_buffer(data).read()
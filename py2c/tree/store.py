@@ -0,0 +1,374 @@
+"""A compact, array-backed store of finalized Node trees
+
+Holding very large trees as Node objects costs a lot of memory. A TreeStore
+keeps a tree in a few compact columns instead, and provides read-only views
+of the nodes that behave like the Nodes they were made from, so code using
+`iter_fields` (like the visitors) keeps working with them.
+
+Nodes are stored in pre-order, so the root has index 0 and every sub-tree is
+a contiguous range of indices.
+"""
+
+import array
+import itertools
+
+from py2c.tree import (
+    Node, FieldError, identifier, _get_schema, _intern_identifier
+)
+
+__all__ = ["TreeStore", "NodeView"]
+
+
+# -----------------------------------------------------------------------------
+# Views of the nodes in a TreeStore
+# -----------------------------------------------------------------------------
+class NodeView(object):
+    """Mixin of the (read-only) views of the nodes in a TreeStore
+
+    A view of a node is an instance of a sub-class of this and the node's
+    class, named like the node's class. The fields are read from the store
+    when they are first accessed, and then kept by the view, so that the
+    views of it's children are the same on every access.
+    """
+    __slots__ = ()
+
+    def __init__(self, store, index):
+        object.__setattr__(self, "_store", store)
+        object.__setattr__(self, "_index", index)
+        # The values of the fields read so far, by position
+        object.__setattr__(self, "_values", None)
+
+    def __setattr__(self, name, value):
+        raise FieldError("Views of nodes in a TreeStore are read-only")
+
+    def __delattr__(self, name):
+        raise FieldError("Views of nodes in a TreeStore are read-only")
+
+    def __eq__(self, other):
+        # Views are compared like the nodes they are views of, so they are
+        # equal to those nodes too. Comparing a Node with a view calls this
+        # as well, since the view's class is a sub-class of the Node's.
+        if isinstance(other, NodeView):
+            if self._store is other._store and self._index == other._index:
+                return True
+            other_class = other._node_class
+        else:
+            other_class = other.__class__
+        if self._node_class is not other_class:
+            return False
+
+        stub = object()
+        return all(
+            getattr(other, name, stub) == getattr(self, name, stub)
+            for name in _get_schema(other_class).names
+        )
+
+    def __hash__(self):
+        return self._store._get_hash(self._index)
+
+    def __repr__(self):
+        return Node.__repr__(self)
+
+    def finalize(self, validate=False):
+        """Views are of finalized nodes, this does nothing.
+        """
+
+    def to_node(self):
+        """Make a Node (tree) equal to the node this is a view of.
+        """
+        return self._store.to_node(self._index)
+
+
+_view_classes = {}
+
+
+def _make_field_property(position, count):
+    def getter(self):
+        values = self._values
+        if values is None:
+            values = [_UNREAD] * count
+            object.__setattr__(self, "_values", values)
+        value = values[position]
+        if value is _UNREAD:
+            value = values[position] = self._store._get_field(
+                self._index, position
+            )
+        return value
+    return property(getter)
+
+
+# Stands in for the values of fields that a view has not read yet
+_UNREAD = object()
+
+
+def _get_view_class(cls):
+    """Get the class of the views of nodes of class `cls`
+    """
+    try:
+        return _view_classes[cls]
+    except KeyError:
+        pass
+
+    namespace = {
+        "__slots__": ("_store", "_index", "_values"),
+        "_node_class": cls,
+        "__qualname__": cls.__qualname__,
+        "__module__": cls.__module__,
+    }
+    names = _get_schema(cls).names
+    for position, name in enumerate(names):
+        namespace[name] = _make_field_property(position, len(names))
+
+    view_class = _view_classes[cls] = type(
+        cls.__name__, (NodeView, cls), namespace
+    )
+    return view_class
+
+
+class _HashedChild(object):
+    """Stands in for a child node (with the given hash) when hashing a node
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __hash__(self):
+        return self.value
+
+
+# -----------------------------------------------------------------------------
+# The store
+# -----------------------------------------------------------------------------
+class TreeStore(object):
+    """Stores a finalized Node tree in compact columns.
+
+    Columns (indexed by the position of the node in pre-order):
+      - kinds: index of the node's class in `classes`
+      - parents: index of the node's parent (-1 for the root)
+      - ends: index after the last node in the node's sub-tree
+      - offsets: index of the node's first item in `items`
+
+    The fields of a node are encoded in `items`, in order; a field holding a
+    sequence is encoded as it's length followed by it's elements. An item is
+    either the index of a child node (>= 0) or `-(i + 1)` for the value at
+    index `i` in `scalars` (where equal values are stored once).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.classes = []
+        self.scalars = []
+
+        self.kinds = array.array("H")
+        self.parents = array.array("i")
+        self.ends = array.array("i")
+        self.offsets = array.array("i")
+        self.items = array.array("i")
+
+        self._class_ids = {}
+        self._scalar_ids = {}
+        self._hashes = None
+
+    @classmethod
+    def from_node(cls, node):
+        """Make a TreeStore holding the tree of `node`, finalizing it first.
+        """
+        node.finalize()
+        store = cls()
+        store._add_tree(node)
+        # Only needed while adding nodes
+        store._class_ids = store._scalar_ids = None
+        return store
+
+    def __len__(self):
+        return len(self.kinds)
+
+    # -------------------------------------------------------------------------
+    # Access
+    # -------------------------------------------------------------------------
+    @property
+    def root(self):
+        return self.view(0)
+
+    def view(self, index):
+        """Get the view of the node at `index`
+        """
+        return _get_view_class(self.classes[self.kinds[index]])(self, index)
+
+    def parent_of(self, index):
+        """Get the index of the parent of the node at `index` (-1 for root)
+        """
+        return self.parents[index]
+
+    def indices_of(self, node_class, within=0):
+        """Get the indices of nodes that are instances of `node_class`
+
+        Only the nodes in the sub-tree of the node at `within` are searched.
+        """
+        kinds = frozenset(
+            kind for kind, cls in enumerate(self.classes)
+            if issubclass(cls, node_class)
+        )
+        if not kinds:
+            return []
+        start, end = within, self.ends[within]
+        # The scan runs in C, without Python code per node.
+        return list(itertools.compress(
+            range(start, end),
+            map(kinds.__contains__, self.kinds[start:end])
+        ))
+
+    def find_all(self, node_class, within=0):
+        """Get views of nodes that are instances of `node_class`
+        """
+        return [self.view(i) for i in self.indices_of(node_class, within)]
+
+    def to_node(self, index=0):
+        """Make a (finalized) Node tree equal to the sub-tree at `index`.
+        """
+        # Children come after their parents in pre-order, so making the nodes
+        # in reverse order makes children before their parents.
+        made = {}
+        for i in range(self.ends[index] - 1, index - 1, -1):
+            values = self._decode(i, lambda store, child: made.pop(child))
+            made[i] = self.classes[self.kinds[i]].from_trusted(*values)
+
+        node = made[index]
+        node.finalize()
+        return node
+
+    # -------------------------------------------------------------------------
+    # Internals
+    # -------------------------------------------------------------------------
+    def _get_class_id(self, node_class):
+        try:
+            return self._class_ids[node_class]
+        except KeyError:
+            self.classes.append(node_class)
+            class_id = self._class_ids[node_class] = len(self.classes) - 1
+            return class_id
+
+    def _get_scalar_item(self, value):
+        try:
+            key = (value.__class__, value)
+            scalar_id = self._scalar_ids.get(key)
+        except TypeError:  # Unhashable values are not de-duplicated
+            key = scalar_id = None
+        if scalar_id is None:
+            self.scalars.append(value)
+            scalar_id = len(self.scalars) - 1
+            if key is not None:
+                self._scalar_ids[key] = scalar_id
+        return -(scalar_id + 1)
+
+    def _add_tree(self, root):
+        kinds, parents, offsets, items = (
+            self.kinds, self.parents, self.offsets, self.items
+        )
+
+        # (node, index of parent, position of the item referring to the node)
+        stack = [(root, -1, -1)]
+        while stack:
+            node, parent, position = stack.pop()
+            index = len(kinds)
+            if position != -1:
+                items[position] = index
+
+            kinds.append(self._get_class_id(node.__class__))
+            parents.append(parent)
+            offsets.append(len(items))
+
+            children = []
+            for name, type_, modifier in _get_schema(node.__class__).fields:
+                value = getattr(node, name)
+                if modifier in ('ZERO_OR_MORE', 'ONE_OR_MORE'):
+                    items.append(len(value))
+                else:
+                    value = (value,)
+                for elem in value:
+                    if isinstance(elem, Node):
+                        children.append((elem, index, len(items)))
+                        items.append(0)  # Placeholder till elem is added
+                        continue
+                    # Names are stored as their shared copies, which are then
+                    # known to be valid identifiers.
+                    if type_ is identifier and elem is not None:
+                        elem = _intern_identifier(elem)
+                    items.append(self._get_scalar_item(elem))
+            stack.extend(reversed(children))
+        offsets.append(len(items))
+
+        # Children come after their parents, so a reverse pass computes the
+        # ends of all the sub-trees.
+        ends = array.array("i", range(1, len(kinds) + 1))
+        for index in range(len(kinds) - 1, 0, -1):
+            parent = parents[index]
+            if ends[index] > ends[parent]:
+                ends[parent] = ends[index]
+        self.ends = ends
+
+    def _decode(self, index, make_child):
+        """Decode the field values of the node at `index`
+
+        Child nodes are represented by the return value of `make_child` called
+        with the store and the index of the child.
+        """
+        items, scalars = self.items, self.scalars
+        position = self.offsets[index]
+
+        values = []
+        for _, _, modifier in _get_schema(self.classes[self.kinds[index]]).fields:
+            if modifier in ('ZERO_OR_MORE', 'ONE_OR_MORE'):
+                length = items[position]
+                value = tuple(
+                    make_child(self, item) if item >= 0 else scalars[-item - 1]
+                    for item in items[position + 1:position + 1 + length]
+                )
+                position += length + 1
+            else:
+                item = items[position]
+                if item >= 0:
+                    value = make_child(self, item)
+                else:
+                    value = scalars[-item - 1]
+                position += 1
+            values.append(value)
+        return values
+
+    def _get_field(self, index, position):
+        """Decode the value of the field at `position` of the node at `index`
+        """
+        items, scalars = self.items, self.scalars
+        offset = self.offsets[index]
+        fields = _get_schema(self.classes[self.kinds[index]]).fields
+        # Skip the items of the fields before it
+        for _, _, modifier in fields[:position]:
+            if modifier in ('ZERO_OR_MORE', 'ONE_OR_MORE'):
+                offset += items[offset] + 1
+            else:
+                offset += 1
+
+        if fields[position][2] in ('ZERO_OR_MORE', 'ONE_OR_MORE'):
+            length = items[offset]
+            return tuple(
+                self.view(item) if item >= 0 else scalars[-item - 1]
+                for item in items[offset + 1:offset + 1 + length]
+            )
+        item = items[offset]
+        if item >= 0:
+            return self.view(item)
+        return scalars[-item - 1]
+
+    def _get_hash(self, index):
+        # Hashes of all the nodes are computed once, children first. They are
+        # computed like Node.__hash__ does, for views to hash like the nodes.
+        if self._hashes is None:
+            hashes = [None] * len(self)
+            for i in range(len(self) - 1, -1, -1):
+                values = self._decode(
+                    i, lambda store, child: _HashedChild(hashes[child])
+                )
+                hashes[i] = hash((self.classes[self.kinds[i]], tuple(values)))
+            self._hashes = hashes
+        return self._hashes[index]
@@ -0,0 +1,141 @@
+"""Unit-tests for `py2c.tree.dump`
+"""
+
+import io
+import ast
+import sys
+import textwrap
+
+from py2c import tree
+from py2c.tree import dump
+
+from py2c.tests import Test
+from nose.tools import assert_equal, assert_true
+
+
+# =============================================================================
+# Helper classes
+# =============================================================================
+class Leaf(tree.Node):
+    _fields = [
+        ('name', tree.identifier, "NEEDED"),
+        ('value', int, "OPTIONAL"),
+    ]
+
+
+class Branch(tree.Node):
+    _fields = [
+        ('first', tree.Node, "OPTIONAL"),
+        ('rest', tree.Node, "ZERO_OR_MORE"),
+    ]
+
+
+def make_tree():
+    node = Branch(
+        Leaf("a", 1),
+        [Branch(Leaf(name="b"), [Leaf("c", 2)]), Leaf("d", 3), Branch()]
+    )
+    node.finalize()
+    return node
+
+
+# =============================================================================
+# Tests
+# =============================================================================
+class TestDump(Test):
+    """py2c.tree.dump.dump and dumps
+    """
+
+    def test_dumps_nodes_indented(self):
+        assert_equal(dump.dumps(make_tree()), textwrap.dedent("""
+            Branch(
+                first=Leaf(name='a', value=1),
+                rest=(
+                    Branch(
+                        first=Leaf(name='b', value=None),
+                        rest=(
+                            Leaf(name='c', value=2),
+                        )
+                    ),
+                    Leaf(name='d', value=3),
+                    Branch(first=None, rest=())
+                )
+            )
+        """).strip())
+
+    def test_dumps_on_single_line_like_repr(self):
+        node = make_tree()
+        text = dump.dumps(node, indent=None)
+
+        assert_equal(text, repr(node))
+        assert_equal(text, (
+            "Branch(first=Leaf(name='a', value=1), rest=(Branch(first="
+            "Leaf(name='b', value=None), rest=(Leaf(name='c', value=2),)), "
+            "Leaf(name='d', value=3), Branch(first=None, rest=())))"
+        ))
+
+    def test_skips_missing_fields(self):
+        assert_equal(dump.dumps(Leaf(name="a")), "Leaf(name='a')")
+        assert_equal(repr(Branch(rest=[Leaf("a", 1)])), (
+            "Branch(rest=[Leaf(name='a', value=1)])"
+        ))
+
+    def test_limits_depth(self):
+        text = dump.dumps(make_tree(), indent=None, max_depth=2)
+
+        assert_equal(text, (
+            "Branch(first=Leaf(name='a', value=1), rest=(Branch(first="
+            "Leaf(...), rest=(Leaf(...),)), Leaf(name='d', value=3), "
+            "Branch(first=None, rest=())))"
+        ))
+        assert_equal(dump.dumps(make_tree(), max_depth=0), "Branch(...)")
+
+    def test_limits_width(self):
+        node = Branch(None, [Leaf(name=name) for name in "abcde"])
+        text = dump.dumps(node, indent=None, max_width=2)
+
+        assert_equal(text, (
+            "Branch(first=None, rest=[Leaf(name='a'), Leaf(name='b'), "
+            "... (3 more)])"
+        ))
+
+    def test_dumps_ast_nodes(self):
+        node = ast.parse("print(x)").body[0]
+
+        assert_equal(dump.dumps(node, max_width=1), textwrap.dedent("""
+            ast.Expr(
+                value=ast.Call(
+                    func=ast.Name(id='print', ctx=ast.Load()),
+                    args=[
+                        ast.Name(id='x', ctx=ast.Load())
+                    ],
+                    keywords=[]
+                )
+            )
+        """).strip())
+
+    def test_dumps_other_values(self):
+        assert_equal(dump.dumps(1), "1")
+        assert_equal(dump.dumps([1, "a"]), "[1, 'a']")
+
+    def test_writes_to_stream_in_chunks(self):
+        node = Branch(None, [make_tree() for _ in range(200)])
+        stream = io.StringIO()
+        dump.dump(node, stream)
+
+        assert_equal(stream.getvalue(), dump.dumps(node))
+
+    def test_dumps_trees_deeper_than_recursion_limit(self):
+        node = Leaf(name="a")
+        for _ in range(sys.getrecursionlimit() * 2):
+            node = Branch(node, [])
+
+        text = repr(node)
+        assert_true(text.startswith("Branch(first=Branch(first="))
+        assert_true(text.endswith(", rest=[]), rest=[])"))
+        assert_equal(text.count("Leaf(name='a'), rest=[])"), 1)
+
+if __name__ == '__main__':
+    from py2c.tests import runmodule
+
+    runmodule()
@@ -0,0 +1,96 @@
+"""Unit-tests for `py2c.tree.importer`
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import importlib
+
+from py2c.tree import node_gen, importer
+
+from py2c.tests import Test
+from nose.tools import assert_equal, assert_raises, assert_true
+
+
+class TestImporter(Test):
+    """py2c.tree.importer
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        # Named after the directory, so that tests don't share packages
+        self.package = "py2c_test_" + os.path.basename(self.directory)
+        os.mkdir(os.path.join(self.directory, self.package))
+        self.write_file("__init__.py", "")
+        self.write_file("tree_nodes.tree", "A(Node): [int a]\nB(A): inherit")
+
+        sys.path.insert(0, self.directory)
+        self.finder = importer.install()
+        self.dont_write_bytecode = sys.dont_write_bytecode
+        sys.dont_write_bytecode = False
+
+    def tearDown(self):
+        sys.dont_write_bytecode = self.dont_write_bytecode
+        importer.uninstall(self.finder)
+        sys.path.remove(self.directory)
+        for name in list(sys.modules):
+            if name.startswith(self.package):
+                del sys.modules[name]
+        shutil.rmtree(self.directory)
+
+    def write_file(self, name, text):
+        path = os.path.join(self.directory, self.package, name)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def import_nodes(self):
+        name = self.package + ".nodes"
+        sys.modules.pop(name, None)
+        return importlib.import_module(name)
+
+    def test_imports_modules_from_definitions(self):
+        module = self.import_nodes()
+
+        assert_equal(module.B(1).a, 1)
+        assert_true(module.__file__.endswith("tree_nodes.tree"))
+        assert_true(issubclass(module.B, module.A))
+
+    def test_resolves_names_across_definition_files(self):
+        self.write_file("tree_more.tree", "C(B): inherit")
+
+        module = importlib.import_module(self.package + ".more")
+        assert_equal(module.C._fields, (("a", int, "NEEDED"),))
+        nodes = importlib.import_module(self.package + ".nodes")
+        assert_true(issubclass(module.C, nodes.B))
+
+    def test_caches_generated_code(self):
+        self.import_nodes()
+
+        parser_class = node_gen.Parser
+        node_gen.Parser = None
+        try:
+            module = self.import_nodes()
+        finally:
+            node_gen.Parser = parser_class
+        assert_equal(module.A(1).a, 1)
+
+    def test_generates_code_again_for_changed_definitions(self):
+        self.import_nodes()
+        self.write_file("tree_nodes.tree", "C(Node): [str c]")
+
+        module = self.import_nodes()
+        assert_equal(module.C("x").c, "x")
+        assert_true(not hasattr(module, "A"))
+
+    def test_reports_errors_in_definitions(self):
+        self.write_file("tree_nodes.tree", "A: inherit")
+
+        with assert_raises(ImportError) as context:
+            self.import_nodes()
+        assert_true(isinstance(context.exception.__cause__,
+                               node_gen.ParserError))
+
+    def test_does_not_find_other_modules(self):
+        with assert_raises(ImportError):
+            importlib.import_module(self.package + ".missing")
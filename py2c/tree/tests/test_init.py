@@ -1,11 +1,14 @@
 """Unit-tests for `py2c.tree`
 """
 
+import sys
+import threading
+
 from py2c import tree
 
 from nose.tools import (
     assert_raises,
-    assert_equal, assert_not_equal,
+    assert_equal, assert_not_equal, assert_is, assert_is_not,
     assert_is_instance, assert_not_is_instance,
 )
 from py2c.tests import Test, data_driven_test
@@ -67,6 +70,14 @@ class NodeWithANodeField(tree.Node):
     ]
 
 
+class NodeWithNodesListField(tree.Node):
+    """Node with a list of nodes as children
+    """
+    _fields = [
+        ('children', tree.Node, "ZERO_OR_MORE"),
+    ]
+
+
 class InvalidModifierNode(tree.Node):
     """Node with invalid modifier
     """
@@ -75,7 +86,71 @@ class InvalidModifierNode(tree.Node):
     ]
 
 
+class SlottedNode(tree.Node):
+    """Node that stores it's fields in slots
+    """
+    __slots__ = ('f1', 'f2')
+    _fields = [
+        ('f1', int, "NEEDED"),
+        ('f2', int, "ZERO_OR_MORE"),
+    ]
+
+
+class ChainNode(tree.Node):
+    """Node that can be chained to make deep trees
+    """
+    _fields = [
+        ('child', tree.Node, "OPTIONAL"),
+    ]
+
+
+class FinalizationCountingNode(tree.Node):
+    """Node that records the nodes which have their fields finalized
+    """
+    finalized = []
+    _fields = [
+        ('children', tree.Node, "ZERO_OR_MORE"),
+    ]
+
+    def _finalize_fields(self, validate):
+        FinalizationCountingNode.finalized.append(self)
+        return super()._finalize_fields(validate)
+
+
+class FieldsCountingNode(tree.Node):
+    """Node that counts how many times its fields are computed
+    """
+    times_computed = 0
+
+    @tree.fields_decorator
+    def _fields(cls):
+        FieldsCountingNode.times_computed += 1
+        return [
+            ('f1', int, "NEEDED"),
+        ]
+
+
+class InheritingFieldsCountingNode(FieldsCountingNode):
+    """A node that inherits it's fields from FieldsCountingNode
+    """
+
+
+class IdentifierNode(tree.Node):
+    """Node with identifier fields
+    """
+    _fields = [
+        ('name', tree.identifier, "NEEDED"),
+        ('children', object, "ZERO_OR_MORE"),
+        ('alias', tree.identifier, "OPTIONAL"),
+    ]
+
+
 # -----------------------------------------------------------------------------
+class StrSubClass(str):
+    """A subclass of str, which is not an identifier sub-class
+    """
+
+
 class SubClass(tree.identifier):
     """A subclass of identifier.
 
@@ -191,6 +266,376 @@ def test_repr(self, node, expect):
         assert_equal(repr(node), expect)
 
 
+# -----------------------------------------------------------------------------
+# Slotted storage tests
+# -----------------------------------------------------------------------------
+class TestSlottedNode(Test):
+    """py2c.tree.Node sub-classes with __slots__
+    """
+
+    def test_does_not_have_a_dict(self):
+        node = SlottedNode(1, [2])
+
+        assert not hasattr(node, "__dict__")
+        assert_equal((node.f1, node.f2), (1, [2]))
+
+    def test_does_validate_assignment(self):
+        node = SlottedNode()
+
+        with assert_raises(tree.WrongTypeError):
+            node.f1 = ""
+        with assert_raises(tree.FieldError):
+            node.f3 = 1
+
+    def test_does_finalize(self):
+        node = SlottedNode(f1=1)
+        node.finalize()
+
+        assert_equal((node.f1, node.f2), (1, ()))
+
+    def test_does_compare_and_repr(self):
+        assert_equal(SlottedNode(1, [2]), SlottedNode(1, [2]))
+        assert_not_equal(SlottedNode(1, [2]), SlottedNode(1, [3]))
+        assert_equal(repr(SlottedNode(f1=1)), "SlottedNode(f1=1)")
+
+
+# -----------------------------------------------------------------------------
+# Trusted construction tests
+# -----------------------------------------------------------------------------
+class TestTrustedConstruction(Test):
+    """py2c.tree.trusted_construction and py2c.tree.Node.from_trusted
+    """
+
+    def test_does_not_validate_in_context(self):
+        with tree.trusted_construction():
+            node = AllIntModifiersNode("1", None, [""], [""])
+            node.f1 = ""
+
+        assert_equal(node.f1, "")
+
+    def test_does_validate_after_context(self):
+        with tree.trusted_construction():
+            pass
+
+        with assert_raises(tree.WrongTypeError):
+            BasicNode("")
+
+    def test_does_validate_after_context_raises(self):
+        with assert_raises(ValueError):
+            with tree.trusted_construction():
+                raise ValueError()
+
+        with assert_raises(tree.WrongTypeError):
+            BasicNode("")
+
+    def test_does_not_allow_unknown_fields(self):
+        with assert_raises(tree.FieldError):
+            BasicNode.from_trusted(f2=1)
+
+    def test_does_validate_in_other_threads(self):
+        errors = []
+
+        def construct():
+            try:
+                BasicNode("")
+            except tree.WrongTypeError as error:
+                errors.append(error)
+
+        with tree.trusted_construction():
+            thread = threading.Thread(target=construct)
+            thread.start()
+            thread.join()
+            BasicNode("")
+
+        assert_equal(len(errors), 1)
+
+    def test_does_not_validate_when_constructing_from_trusted(self):
+        node = NodeWithANodeField.from_trusted(BasicNode.from_trusted(""))
+
+        assert_equal(node.child.f1, "")
+        with assert_raises(tree.WrongTypeError):
+            BasicNode("")
+
+    def test_does_validate_on_finalization_with_validate(self):
+        node = NodeWithANodeField.from_trusted(BasicNode.from_trusted(""))
+
+        with assert_raises(tree.WrongTypeError) as context:
+            node.finalize(validate=True)
+        self.assert_error_message_contains(context.exception, ["BasicNode.f1"])
+
+    def test_does_not_validate_on_finalization_without_validate(self):
+        node = NodeWithANodeField.from_trusted(BasicNode.from_trusted(""))
+        node.finalize()
+
+        assert_equal(node.child.f1, "")
+
+
+# -----------------------------------------------------------------------------
+# Finalization tests
+# -----------------------------------------------------------------------------
+class TestIncrementalFinalization(Test):
+    """py2c.tree.Node.finalize on finalized and modified trees
+    """
+
+    def setUp(self):
+        FinalizationCountingNode.finalized = []
+
+        self.leaf = FinalizationCountingNode([])
+        self.branch = FinalizationCountingNode([self.leaf])
+        self.other_branch = FinalizationCountingNode([])
+        self.root = FinalizationCountingNode([self.branch, self.other_branch])
+
+        self.root.finalize()
+        FinalizationCountingNode.finalized = []
+
+    def test_finalizes_trees_deeper_than_recursion_limit(self):
+        depth = sys.getrecursionlimit() * 2
+        root = ChainNode()
+        for _ in range(depth):
+            root = ChainNode(root)
+        root.finalize()
+
+        node = root
+        for _ in range(depth):
+            node = node.child
+        assert_equal(node.child, None)
+
+    def test_does_not_refinalize_unmodified_tree(self):
+        self.root.finalize()
+
+        assert_equal(FinalizationCountingNode.finalized, [])
+
+    def test_refinalizes_only_modified_nodes_and_their_ancestors(self):
+        self.leaf.children = [FinalizationCountingNode([])]
+        self.root.finalize()
+
+        assert_equal(
+            FinalizationCountingNode.finalized,
+            [self.root, self.branch, self.leaf, self.leaf.children[0]]
+        )
+        assert_is_instance(self.leaf.children, tuple)
+
+    def test_refinalizes_after_deletion(self):
+        del self.leaf.children
+        self.root.finalize()
+
+        assert_equal(
+            FinalizationCountingNode.finalized,
+            [self.root, self.branch, self.leaf]
+        )
+        assert_equal(self.leaf.children, ())
+
+    def test_refinalizes_all_parents_of_shared_nodes(self):
+        other_root = FinalizationCountingNode([self.leaf])
+        other_root.finalize()
+        FinalizationCountingNode.finalized = []
+
+        self.leaf.children = [FinalizationCountingNode([])]
+        self.root.finalize()
+        other_root.finalize()
+
+        assert_equal(
+            FinalizationCountingNode.finalized, [
+                self.root, self.branch, self.leaf, self.leaf.children[0],
+                other_root
+            ]
+        )
+
+    def test_forgets_parents_of_moved_nodes(self):
+        self.branch.children = []
+        other_root = FinalizationCountingNode([self.leaf])
+        other_root.finalize()
+        self.root.finalize()
+
+        assert_equal(tree._get_parents(self.leaf), [other_root])
+
+    def test_does_check_nodes_added_after_finalization(self):
+        self.leaf.children = [BasicNode()]
+
+        with assert_raises(tree.FinalizationError) as context:
+            self.root.finalize()
+        self.assert_error_message_contains(context.exception, ["f1"])
+
+    def test_does_validate_nodes_finalized_without_validation(self):
+        node = NodeWithANodeField.from_trusted(BasicNode.from_trusted(""))
+        node.finalize()
+
+        with assert_raises(tree.WrongTypeError):
+            node.finalize(validate=True)
+        assert_not_equal(node._finalized, tree._VALIDATED)
+
+
+# -----------------------------------------------------------------------------
+# Hashing and interning tests
+# -----------------------------------------------------------------------------
+class TestStructuralHashing(Test):
+    """py2c.tree.Node.__hash__
+    """
+
+    def make_tree(self, value=1):
+        node = NodeWithNodesListField([
+            NodeWithANodeField(BasicNode(value)), BasicNode(2)
+        ])
+        node.finalize()
+        return node
+
+    def test_hashes_equal_trees_equally(self):
+        assert_equal(hash(self.make_tree()), hash(self.make_tree()))
+        assert_equal(len({self.make_tree(), self.make_tree()}), 1)
+
+    def test_hashes_different_trees_differently(self):
+        assert_equal(len({self.make_tree(1), self.make_tree(3)}), 2)
+
+    def test_does_not_hash_unfinalized_nodes(self):
+        with assert_raises(TypeError) as context:
+            hash(BasicNode(1))
+        self.assert_error_message_contains(context.exception, ["finalized"])
+
+    def test_does_not_hash_modified_nodes(self):
+        node = self.make_tree()
+        hash(node)
+        node.children[0].child.f1 = 3
+
+        with assert_raises(TypeError):
+            hash(node)
+
+    def test_rehashes_refinalized_nodes(self):
+        node = self.make_tree()
+        hash(node)
+        node.children[0].child.f1 = 3
+        node.finalize()
+
+        assert_equal(hash(node), hash(self.make_tree(3)))
+        assert_not_equal(node, self.make_tree())
+
+    def test_hashes_trees_deeper_than_recursion_limit(self):
+        node = ChainNode()
+        for _ in range(sys.getrecursionlimit() * 2):
+            node = ChainNode(node)
+        node.finalize()
+
+        hash(node)
+
+
+class TestInternTable(Test):
+    """py2c.tree.InternTable
+    """
+
+    def make_tree(self, value=1):
+        node = NodeWithNodesListField([
+            NodeWithANodeField(BasicNode(value)), BasicNode(value)
+        ])
+        node.finalize()
+        return node
+
+    def test_interns_equal_trees_as_same_node(self):
+        table = tree.InternTable()
+        node1 = table.intern(self.make_tree())
+        node2 = table.intern(self.make_tree())
+
+        assert_is(node1, node2)
+        assert node1 in table
+
+    def test_shares_equal_sub_trees(self):
+        table = tree.InternTable()
+        node = table.intern(self.make_tree())
+
+        assert_equal(node, self.make_tree())
+        assert_is(node.children[0].child, node.children[1])
+        # BasicNode(1), NodeWithANodeField(...) and NodeWithNodesListField(...)
+        assert_equal(len(table), 3)
+
+    def test_does_not_share_different_sub_trees(self):
+        table = tree.InternTable()
+        node1 = table.intern(self.make_tree(1))
+        node2 = table.intern(self.make_tree(2))
+
+        assert_is_not(node1, node2)
+        assert_equal(len(table), 6)
+
+    def test_invalidates_all_trees_sharing_a_modified_node(self):
+        table = tree.InternTable()
+        node = table.intern(self.make_tree())
+        shared = node.children[1]
+        hash(node)
+
+        shared.f1 = 2
+        assert_equal(node._finalized, tree._NOT_FINALIZED)
+        assert_equal(node.children[0]._finalized, tree._NOT_FINALIZED)
+
+        node.finalize()
+        assert_equal(hash(node), hash(self.make_tree(2)))
+
+    def test_does_not_intern_unfinalized_nodes(self):
+        with assert_raises(TypeError):
+            tree.InternTable().intern(BasicNode(1))
+
+
+# -----------------------------------------------------------------------------
+# Compiled schema tests
+# -----------------------------------------------------------------------------
+class TestSchema(Test):
+    """py2c.tree.Node's compiled field schema
+    """
+
+    def test_computes_fields_once_per_class(self):
+        # The schema may have been compiled by earlier tests, like those
+        # following the fields of all Node classes.
+        if "_schema" in FieldsCountingNode.__dict__:
+            del FieldsCountingNode._schema
+        FieldsCountingNode.times_computed = 0
+
+        node = FieldsCountingNode(1)
+        node.f1 = 2
+        FieldsCountingNode(f1=3).finalize()
+        list(tree.iter_fields(node))
+
+        assert_equal(FieldsCountingNode.times_computed, 1)
+
+    def test_does_not_share_schema_with_subclasses(self):
+        FieldsCountingNode(1)
+        node = InheritingFieldsCountingNode(1)
+
+        assert_is_not(
+            InheritingFieldsCountingNode._schema, FieldsCountingNode._schema
+        )
+        assert_equal(list(tree.iter_fields(node)), [("f1", 1)])
+
+    def test_schema_maps_names_to_fields(self):
+        AllIntModifiersNode()
+        schema = AllIntModifiersNode._schema
+
+        assert_equal(schema.names, ("f1", "f2", "f3", "f4"))
+        assert_equal(schema.by_name["f3"], ("f3", int, "ZERO_OR_MORE"))
+
+
+# -----------------------------------------------------------------------------
+# Reachability tests
+# -----------------------------------------------------------------------------
+class TestReachability(Test):
+    """py2c.tree.can_contain
+    """
+
+    def test_follows_fields_of_node_classes(self):
+        assert tree.can_contain(NodeWithANodeField, BasicNode)
+        assert not tree.can_contain(NodeWithANodeField, BasicNodeCopy)
+        assert not tree.can_contain(BasicNode, BasicNode)
+
+    def test_follows_subclasses_of_field_types(self):
+        assert tree.can_contain(NodeWithNodesListField, BasicNode)
+        assert tree.can_contain(ChainNode, ChainNode)
+        assert tree.can_contain(NodeWithNodesListField, NodeWithANodeField)
+
+    def test_sees_node_classes_defined_later(self):
+        # Caches the classes it can contain
+        assert tree.can_contain(NodeWithNodesListField, BasicNode)
+
+        class LateNode(tree.Node):
+            _fields = []
+
+        assert tree.can_contain(NodeWithNodesListField, LateNode)
+
+
 # -----------------------------------------------------------------------------
 # identifier tests
 # -----------------------------------------------------------------------------
@@ -238,6 +683,101 @@ def _issubclass(self, clazz, is_subclass):
             assert not issubclass(self.load(clazz), tree.identifier)
 
 
+class TestIdentifierTable(Test):
+    """py2c.tree.IdentifierTable
+    """
+
+    def setUp(self):
+        self.table = tree.IdentifierTable()
+
+    def test_gives_symbols_in_order_of_addition(self):
+        assert_equal(self.table.symbol("foo"), 0)
+        assert_equal(self.table.symbol("bar"), 1)
+        assert_equal(self.table.symbol("foo"), 0)
+
+        assert_equal(len(self.table), 2)
+        assert_equal(list(self.table), ["foo", "bar"])
+        assert_equal(self.table.name(1), "bar")
+
+    def test_looks_up_without_adding(self):
+        self.table.symbol("foo")
+
+        assert_equal(self.table.lookup("foo"), 0)
+        assert_equal(self.table.lookup("bar"), None)
+        assert_equal(self.table.lookup([], -1), -1)
+        assert "foo" in self.table
+        assert "bar" not in self.table
+        assert_equal(len(self.table), 1)
+
+    def test_interns_names(self):
+        name = "".join(["fo", "o"])
+        shared = self.table.intern("foo")
+
+        assert_is(self.table.intern(name), shared)
+        assert_is(type(self.table.intern(StrSubClass("foo"))), str)
+
+    def test_rejects_invalid_names(self):
+        for value in ["", "1abc", "a b", 1, None, []]:
+            with assert_raises(tree.WrongAttributeValueError):
+                self.table.symbol(value)
+        assert_equal(len(self.table), 0)
+
+    def test_interns_identifiers_in_tree(self):
+        names = ["".join(["fo", "o"]) for _ in range(3)]
+        node = IdentifierNode(names[0], [names[1], BasicNode(1)], names[2])
+        node.finalize()
+        node_hash = hash(node)
+
+        self.table.intern_tree(node)
+
+        shared = self.table.intern("foo")
+        assert_is(node.name, shared)
+        assert_is(node.alias, shared)
+        # Only the fields of identifiers are changed
+        assert_is(node.children[0], names[1])
+        assert_equal(node._finalized, tree._FINALIZED)
+        assert_equal(hash(node), node_hash)
+
+    def test_checking_identifiers_does_not_add_them_to_shared_table(self):
+        name = "a_name_not_used_anywhere_else"
+
+        assert_is_instance(name, tree.identifier)
+        IdentifierNode(name, [name], name)
+        assert_equal(tree.identifier_table.lookup(name), None)
+
+    def test_finalizing_interns_identifiers_in_shared_table(self):
+        names = ["".join(["a_finalized_", "name"]) for _ in range(2)]
+        node = IdentifierNode(names[0], [names[1]], None)
+        node.finalize(validate=True)
+
+        shared = tree.identifier_table.intern(names[0])
+        assert_is(node.name, shared)
+        assert_is(node.alias, None)
+        assert_is(node.children[0], names[1])
+
+    def test_finalizing_does_not_grow_full_shared_table(self):
+        name = "a_name_finalized_with_a_full_table"
+        limit = tree.MAX_INTERNED_IDENTIFIERS
+        tree.MAX_INTERNED_IDENTIFIERS = len(tree.identifier_table)
+        try:
+            node = IdentifierNode(name, [], name)
+            node.finalize()
+        finally:
+            tree.MAX_INTERNED_IDENTIFIERS = limit
+
+        assert_equal(tree.identifier_table.lookup(name), None)
+        assert_is(node.name, name)
+
+    def test_made_identifiers_are_added_to_shared_table(self):
+        name = "another_name_not_used_anywhere_else"
+        assert_equal(tree.identifier_table.lookup(name), None)
+
+        shared = tree.identifier(name)
+        assert_is_not(tree.identifier_table.lookup(name), None)
+        assert_is(shared, tree.identifier_table.intern(name))
+        assert_is_instance(name, tree.identifier)
+
+
 # -----------------------------------------------------------------------------
 # fields_decorator
 # -----------------------------------------------------------------------------
@@ -1,12 +1,17 @@
 """Unit-tests for `py2c.tree.node_gen`
 """
 
+import os
+import sys
+import shutil
+import tempfile
+import importlib
 from textwrap import dedent
 
 from py2c.tree import node_gen
 
 from py2c.tests import Test, data_driven_test
-from nose.tools import assert_equal, assert_raises
+from nose.tools import assert_equal, assert_not_equal, assert_raises
 
 
 # -----------------------------------------------------------------------------
@@ -22,11 +27,13 @@ class TestParser(Test):
     """py2c.tree.node_gen.Parser
     """
 
+    parser_class = node_gen.Parser
+
     @data_driven_test("node_gen-valid_cases.yaml")
     def test_valid_cases(self, in_text, node, **kwargs):
         node = self.load(node, {"Definition": node_gen.Definition})
 
-        parser = node_gen.Parser()
+        parser = self.parser_class()
 
         assert_equal(
             parser.parse(dedent(in_text)),
@@ -36,11 +43,41 @@ def test_valid_cases(self, in_text, node, **kwargs):
     @data_driven_test("node_gen-invalid_cases.yaml")
     def test_invalid_cases(self, in_text, phrases):
         with assert_raises(node_gen.ParserError) as context:
-            node_gen.Parser().parse(in_text)
+            self.parser_class().parse(in_text)
 
         self.assert_error_message_contains(context.exception, phrases)
 
 
+class TestPlyParser(TestParser):
+    """py2c.tree.node_gen.PlyParser
+    """
+
+    parser_class = node_gen.PlyParser
+
+    def check_same_result(self, text):
+        results = []
+        for parser_class in [node_gen.Parser, node_gen.PlyParser]:
+            try:
+                results.append(parser_class().parse(text))
+            except node_gen.ParserError as e:
+                results.append(e.args)
+        assert_equal(results[0], results[1])
+
+    def test_parses_like_parser(self):
+        self.check_same_result("A(Node): [int a, B+ b,]\nB(A): inherit\nC")
+        self.check_same_result("inheritance: []")
+        self.check_same_result("A: [int inherited]")
+
+    def test_raises_errors_like_parser(self):
+        # The next token is read before a declaration is checked.
+        self.check_same_result("A: [int a, int a]\n$")
+        self.check_same_result("A: []\nA: [] )")
+        self.check_same_result("A: inherit\n:")
+        self.check_same_result("A: []\nA")
+        self.check_same_result("A: [int a")
+        self.check_same_result("A: [int, a]")
+
+
 class TestSourceGenerator(Test):
     """py2c.tree.node_gen.SourceGenerator
     """
@@ -54,7 +91,341 @@ def test_valid_cases(self, out_text, node, **kwargs):
 
         assert_equal(out_text.strip(), generated.strip())
 
+    @data_driven_test("node_gen-slots_cases.yaml")
+    def test_slots_cases(self, in_text, out_text):
+        src_gen = node_gen.SourceGenerator(slots=True)
+        generated = src_gen.generate_sources(node_gen.Parser().parse(in_text))
+
+        assert_equal(out_text.strip(), generated.strip())
+
+    @data_driven_test("node_gen-specialized_cases.yaml")
+    def test_specialized_cases(self, in_text, out_text):
+        src_gen = node_gen.SourceGenerator(specialized=True)
+        generated = src_gen.generate_sources(node_gen.Parser().parse(in_text))
+
+        assert_equal(out_text.strip(), generated.strip())
+
+    @data_driven_test("node_gen-flatten_cases.yaml")
+    def test_flatten_cases(self, in_text, out_text):
+        [module] = node_gen.resolve(
+            [("module", node_gen.Parser().parse(in_text))]
+        )
+        src_gen = node_gen.SourceGenerator(flatten=True)
+        generated = src_gen.generate_sources(module.definitions)
+
+        assert_equal(out_text.strip(), generated.strip())
+
+
+class TestResolve(Test):
+    """py2c.tree.node_gen.resolve
+    """
+
+    def resolve(self, **texts):
+        return node_gen.resolve([
+            (name, node_gen.Parser().parse(text))
+            for name, text in sorted(texts.items())
+        ])
+
+    def check_error(self, phrases, **texts):
+        with assert_raises(node_gen.ResolutionError) as context:
+            self.resolve(**texts)
+        self.assert_error_message_contains(context.exception, phrases)
+
+    def test_resolves_names_across_modules(self):
+        a, b = self.resolve(
+            a="A(Node): [int a]",
+            b="C(B): inherit\nB(A): inherit\nD(Node): [A a, B* b, str c]",
+        )
+
+        assert_equal(a.imports, ())
+        assert_equal(b.imports, (("a", ("A",)),))
+        assert_equal(
+            [(d.name, d.fields) for d in b.definitions],
+            [("B", [("a", "int", "NEEDED")]), ("C", [("a", "int", "NEEDED")]),
+             ("D", [("a", "A", "NEEDED"), ("b", "B", "ZERO_OR_MORE"),
+                    ("c", "str", "NEEDED")])]
+        )
+
+    def test_does_not_allow_unknown_names(self):
+        self.check_error(["unknown", "parent", "A", "B"], a="A(B): []")
+        self.check_error(
+            ["unknown", "type", "A", "a", "B"], a="A(Node): [B a]"
+        )
+        self.check_error(["A", "inherits", "Node"], a="A(Node): inherit")
+
+    def test_does_not_allow_cycles(self):
+        self.check_error(["A", "own ancestor", "B"], a="A(B): []\nB(A): []")
+        self.check_error(
+            ["import each other", "a", "b"],
+            a="A(Node): [B b]", b="B(Node): [A a]"
+        )
+
+    def test_does_not_allow_declarations_in_many_modules(self):
+        self.check_error(
+            ["A", "declared", "a", "b"], a="A(Node): []", b="A(Node): []"
+        )
+
+
+class TestSpecializedMethods(Test):
+    """Specialized methods generated by py2c.tree.node_gen.SourceGenerator
+    """
+
+    definitions = dedent("""
+        Generic(Node): [int f1, int+ f2, int* f3, int? f4]
+        Specialized(Node): [int f1, int+ f2, int* f3, int? f4]
+        Empty(Node): []
+        Chain(Node): [Chain? child]
+    """)
+
+    def setUp(self):
+        self.context = {}
+        exec(node_gen.PREFIX, self.context)
+
+        parsed = node_gen.Parser().parse(self.definitions)
+        generic, specialized, empty, chain = parsed
+        for definition, is_specialized in [
+            (generic, False), (specialized, True), (empty, True),
+            (chain, True)
+        ]:
+            src_gen = node_gen.SourceGenerator(specialized=is_specialized)
+            exec(src_gen.generate_class(definition), self.context)
+
+    def check_same_behaviour(self, code):
+        """Check `code` behaves the same with generic and specialized nodes
+        """
+        results = []
+        for name in ["Generic", "Specialized"]:
+            try:
+                result = self.load(code.replace("Node", name))
+            except Exception as e:
+                results.append(
+                    (e.__class__, e.args[0].replace(name, "Node"))
+                )
+            else:
+                results.append(repr(result).replace(name, "Node"))
+        assert_equal(results[0], results[1])
+
+    def test_initializes_like_generic(self):
+        self.check_same_behaviour("Node(1, [2], (), None)")
+        self.check_same_behaviour("Node(f1=1, f4=2)")
+        self.check_same_behaviour("Node()")
+
+    def test_does_not_initialize_like_generic(self):
+        self.check_same_behaviour("Node(1, [2], ())")
+        self.check_same_behaviour("Node('1', [2], (), None)")
+        self.check_same_behaviour("Node(1, [], (), None)")
+        self.check_same_behaviour("Node(1, [2], [''], None)")
+        self.check_same_behaviour("Node(1, [2], (), '')")
+        self.check_same_behaviour("Node(f5=1)")
+
+    def test_does_not_validate_trusted_construction(self):
+        node = self.load("Specialized.from_trusted('1', [], None, '')")
+
+        assert_equal(node.f1, '1')
+
+    def test_compares_like_generic(self):
+        self.check_same_behaviour("Node(1, [2], (), 3) == Node(1, [2], (), 3)")
+        self.check_same_behaviour("Node(1, [2], (), 3) == Node(1, [2], (), 4)")
+        self.check_same_behaviour("Node(f1=1) == Node(f1=1)")
+        self.check_same_behaviour("Node(f1=1) == Node(f2=[1])")
+        self.check_same_behaviour("Node(f1=1) == Empty()")
+        assert self.load("Empty() == Empty()")
+
+    def test_compares_finalized_nodes_by_hash_first(self):
+        first = self.load("Specialized(1, [2], (), 3)")
+        second = self.load("Specialized(1, [2], (), 3)")
+        first.finalize()
+        second.finalize()
+        assert_equal(first, second)
+
+        # Not equal hashes, as if they were computed for other values
+        object.__setattr__(first, "_hash", 1)
+        object.__setattr__(second, "_hash", 2)
+        assert_not_equal(first, second)
+
+    def test_reprs_like_generic(self):
+        self.check_same_behaviour("Node(1, [2], (), None)")
+        self.check_same_behaviour("Node(f2=[1])")
+        assert_equal(repr(self.load("Empty()")), "Empty()")
+
+    def test_reprs_trees_deeper_than_recursion_limit(self):
+        node = self.load("Chain()")
+        for _ in range(sys.getrecursionlimit() * 2):
+            node = self.context["Chain"](node)
+
+        assert repr(node).startswith("Chain(child=Chain(child=")
+
 if __name__ == '__main__':
     from py2c.tests import runmodule
 
     runmodule()
+
+
+class TestGenerate(Test):
+    """py2c.tree.node_gen.generate
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.write_definitions("tree_a.tree", "A(Node): [int a]")
+        self.write_definitions("tree_b.tree", "B(Node): [int b]")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_definitions(self, name, text):
+        with open(os.path.join(self.directory, name), "w") as f:
+            f.write(text)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def generate(self, **kwargs):
+        written = node_gen.generate(self.directory, **kwargs)
+        return [os.path.basename(path) for path in written]
+
+    def read_output(self, name):
+        with open(self.path(name)) as f:
+            return f.read()
+
+    def age_outputs(self):
+        for name in ["a.py", "b.py"]:
+            os.utime(self.path(name), (0, 0))
+
+    def test_generates_files_and_manifest(self):
+        assert_equal(self.generate(), ["a.py", "b.py"])
+        assert os.path.exists(self.path(node_gen.MANIFEST_NAME))
+
+        assert "class A(Node):" in self.read_output("a.py")
+
+    def test_generates_only_changed_files(self):
+        self.generate()
+        self.age_outputs()
+        assert_equal(self.generate(), [])
+
+        self.write_definitions("tree_a.tree", "A(Node): [str a]")
+        assert_equal(self.generate(), ["a.py"])
+        assert_equal(os.path.getmtime(self.path("b.py")), 0)
+
+    def test_generates_missing_and_modified_outputs(self):
+        self.generate()
+        os.remove(self.path("a.py"))
+        with open(self.path("b.py"), "a") as f:
+            f.write("# Modified")
+
+        assert_equal(self.generate(), ["a.py", "b.py"])
+
+    def test_does_not_rewrite_same_outputs(self):
+        self.generate()
+        self.age_outputs()
+
+        self.write_definitions("tree_a.tree", "A(Node): [int a]  # Comment")
+        assert_equal(self.generate(), [])
+        assert_equal(self.generate(update=True), [])
+        assert_equal(os.path.getmtime(self.path("a.py")), 0)
+
+    def test_generates_again_with_other_options(self):
+        self.generate()
+
+        assert_equal(self.generate(slots=True), ["a.py", "b.py"])
+
+    def test_generates_files_in_parallel(self):
+        names = ["a.py", "b.py", "c.py"]
+        self.write_definitions("tree_c.tree", "C(B): inherit")
+        self.generate(processes=1)
+        expected = [self.read_output(name) for name in names]
+        for name in names:
+            os.remove(self.path(name))
+
+        assert_equal(self.generate(processes=2), names)
+        assert_equal([self.read_output(name) for name in names], expected)
+
+    def test_generates_files_in_this_process_by_default(self):
+        parse_definitions = node_gen._parse_definitions
+        parsed_in = []
+
+        def recording_parse_definitions(text):
+            parsed_in.append(os.getpid())
+            return parse_definitions(text)
+
+        node_gen._parse_definitions = recording_parse_definitions
+        try:
+            assert_equal(self.generate(), ["a.py", "b.py"])
+        finally:
+            node_gen._parse_definitions = parse_definitions
+        assert_equal(parsed_in, [os.getpid()] * 2)
+
+    def test_reports_errors_of_all_files(self):
+        self.write_definitions("tree_a.tree", "A: inherit")
+        self.write_definitions("tree_c.tree", "C: [int]")
+
+        for processes in [1, 2]:
+            with assert_raises(node_gen.GenerationError) as context:
+                self.generate(processes=processes)
+            errors = context.exception.errors
+            assert_equal(
+                [os.path.basename(path) for path, _ in errors],
+                ["tree_a.tree", "tree_c.tree"]
+            )
+            for _, error in errors:
+                assert isinstance(error, node_gen.ParserError)
+        # The names can't be resolved without all the definitions
+        assert not os.path.exists(self.path("b.py"))
+
+        self.write_definitions("tree_a.tree", "A(Node): [int a]")
+        self.write_definitions("tree_c.tree", "C: [int c]")
+        assert_equal(self.generate(), ["a.py", "b.py", "c.py"])
+
+    def test_reports_unresolved_names(self):
+        self.write_definitions("tree_c.tree", "C(D): inherit")
+
+        with assert_raises(node_gen.GenerationError) as context:
+            self.generate()
+        [(path, error)] = context.exception.errors
+        assert_equal(os.path.basename(path), "tree_c.tree")
+        assert isinstance(error, node_gen.ResolutionError)
+        assert not os.path.exists(self.path("a.py"))
+
+    def test_generates_modules_using_changed_definitions(self):
+        self.write_definitions("tree_c.tree", "C(B): inherit")
+        self.generate()
+
+        self.write_definitions("tree_b.tree", "B(Node): [str b]")
+        assert_equal(self.generate(), ["b.py", "c.py"])
+        assert "('b', str, 'NEEDED')" in self.read_output("c.py")
+        assert "from .b import B" in self.read_output("c.py")
+
+    def test_parses_only_changed_files(self):
+        self.generate()
+        self.write_definitions("tree_c.tree", "C(A): [int c]")
+
+        parse_definitions = node_gen._parse_definitions
+        parsed = []
+
+        def recording_parse_definitions(text):
+            parsed.append(text)
+            return parse_definitions(text)
+
+        node_gen._parse_definitions = recording_parse_definitions
+        try:
+            assert_equal(self.generate(processes=1), ["c.py"])
+        finally:
+            node_gen._parse_definitions = parse_definitions
+        assert_equal(parsed, ["C(A): [int c]"])
+
+    def test_generated_modules_import_each_other(self):
+        self.write_definitions("__init__.py", "")
+        self.write_definitions("tree_c.tree", "C(B): inherit")
+        self.generate()
+
+        directory, package = os.path.split(self.directory)
+        sys.path.insert(0, directory)
+        try:
+            module = importlib.import_module(package + ".c")
+        finally:
+            sys.path.remove(directory)
+            for name in list(sys.modules):
+                if name.startswith(package):
+                    del sys.modules[name]
+        assert_equal(module.C._fields, (("b", int, "NEEDED"),))
+        assert_equal(module.C(1).b, 1)
@@ -0,0 +1,155 @@
+"""Unit-tests for `py2c.tree.parallel`
+"""
+
+import concurrent.futures
+
+from py2c import tree
+from py2c.tree import visitors
+from py2c.tree.parallel import visit_in_parallel
+
+from py2c.tests import Test
+from nose.tools import assert_equal, assert_is, assert_raises
+
+
+# =============================================================================
+# Helper classes
+# =============================================================================
+class Module(tree.Node):
+    _fields = [
+        ('body', tree.Node, "ZERO_OR_MORE"),
+    ]
+
+
+class Name(tree.Node):
+    _fields = [
+        ('id', tree.identifier, "NEEDED"),
+    ]
+
+
+class Pair(tree.Node):
+    _fields = [
+        ('first', tree.Node, "NEEDED"),
+        ('second', tree.Node, "NEEDED"),
+    ]
+
+
+class Pass(tree.Node):
+    _fields = []
+
+
+class NameCollector(visitors.RecursiveNodeVisitor):
+
+    def __init__(self):
+        super().__init__()
+        self.names = []
+
+    def visit_Name(self, node):
+        self.names.append((node.id, self.access_path[:]))
+
+    def merge(self, other):
+        self.names.extend(other.names)
+
+
+class ParentCounter(visitors.RecursiveNodeVisitor):
+    """Records the number of parents of the (finalized) nodes it visits
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.parents = []
+
+    def generic_visit(self, node):
+        self.parents.append(len(tree._get_parents(node)))
+        super().generic_visit(node)
+
+    def merge(self, other):
+        self.parents.extend(other.parents)
+
+
+class NameRenamer(visitors.RecursiveNodeTransformer):
+    """Renames `x` to `y`, removes Pass and splits Pairs of Names
+    """
+
+    def visit_Name(self, node):
+        if node.id == "x":
+            return Name("y")
+        return node
+
+    def visit_Pass(self, node):
+        return None
+
+    def visit_Pair(self, node):
+        yield
+        if isinstance(getattr(node, "first", None), Name):
+            return [node.first, node.second]
+        return node
+
+
+def make_tree(size=20):
+    body = []
+    for i in range(size):
+        body.append(Name("n{}".format(i)))
+        body.append(Pair(Name("x"), Pair(Pass(), Name("z"))))
+        body.append(Pass())
+    return Module(body)
+
+
+# =============================================================================
+# Tests
+# =============================================================================
+class TestVisitInParallel(Test):
+    """py2c.tree.parallel.visit_in_parallel
+    """
+
+    def test_merges_results_in_order(self):
+        sequential = NameCollector()
+        sequential.visit(make_tree())
+        visitor = visit_in_parallel(NameCollector, make_tree(), processes=2)
+
+        assert_is(visitor.__class__, NameCollector)
+        assert_equal(visitor.names, sequential.names)
+
+    def test_transforms_like_sequentially(self):
+        expected = NameRenamer().visit(make_tree())
+        node = make_tree()
+        body = node.body
+        transformer = visit_in_parallel(NameRenamer, node, processes=2)
+
+        assert_is(node.body, body)
+        assert_equal(node, expected)
+        assert transformer.changed
+
+    def test_reports_unchanged_trees(self):
+        transformer = visit_in_parallel(
+            NameRenamer, Module([Name("a")]), processes=2
+        )
+
+        assert not transformer.changed
+
+    def test_reuses_executors(self):
+        with concurrent.futures.ProcessPoolExecutor(2) as executor:
+            for _ in range(2):
+                visitor = visit_in_parallel(
+                    NameCollector, make_tree(2), executor=executor
+                )
+                assert_equal(len(visitor.names), 2 * 3)
+
+    def test_sends_statements_of_finalized_trees_without_their_parents(self):
+        node = make_tree(2)
+        node.finalize()
+
+        with concurrent.futures.ProcessPoolExecutor(2) as executor:
+            for _ in range(2):
+                visitor = visit_in_parallel(
+                    ParentCounter, node, executor=executor
+                )
+                # The statements are sent without the Module, while the
+                # nodes in them are given their parents again.
+                assert_equal(visitor.parents, [0, 0, 1, 1, 1, 1, 0] * 2)
+        assert_equal(node._finalized, tree._FINALIZED)
+
+    def test_transforms_only_lists(self):
+        node = make_tree(2)
+        node.finalize()
+        with assert_raises(TypeError):
+            visit_in_parallel(NameRenamer, node, processes=2)
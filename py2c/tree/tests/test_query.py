@@ -0,0 +1,136 @@
+"""Unit-tests for `py2c.tree.query`
+"""
+
+from py2c import tree
+from py2c.tree.walk import walk
+from py2c.tree.query import (
+    ANY, Capture, Pattern, compile_pattern, NodeIndex
+)
+
+from py2c.tests import Test
+from nose.tools import assert_equal, assert_is, assert_raises
+
+
+# =============================================================================
+# Helper classes
+# =============================================================================
+class Expr(tree.Node):
+    _fields = []
+
+
+class Name(Expr):
+    _fields = [
+        ('id', tree.identifier, "NEEDED"),
+    ]
+
+
+class Num(Expr):
+    _fields = [
+        ('n', int, "NEEDED"),
+    ]
+
+
+class Call(Expr):
+    _fields = [
+        ('func', Expr, "NEEDED"),
+        ('args', Expr, "ZERO_OR_MORE"),
+    ]
+
+
+class Module(tree.Node):
+    _fields = [
+        ('body', Expr, "ZERO_OR_MORE"),
+        ('docstring', str, "OPTIONAL"),
+    ]
+
+
+def make_tree():
+    return Module(body=[
+        Call(Name("len"), [Name("x")]),
+        Call(Name("print"), [Call(Name("len"), [Num(1)])]),
+        Num(2),
+    ])
+
+
+LEN_CALL = Pattern(Call, func=Pattern(Name, id="len"))
+
+
+# =============================================================================
+# Tests
+# =============================================================================
+class TestPattern(Test):
+    """py2c.tree.query.Pattern and compile_pattern
+    """
+
+    def test_matches_class_and_fields(self):
+        pattern = compile_pattern(LEN_CALL)
+
+        assert_equal(pattern.match(Call(Name("len"), [])), {})
+        assert_is(pattern.match(Call(Name("print"), [])), None)
+        assert_is(pattern.match(Name("len")), None)
+
+    def test_matches_sub_classes(self):
+        assert_equal(compile_pattern(Pattern(Expr)).match(Num(1)), {})
+
+    def test_matches_sequences_and_any(self):
+        pattern = compile_pattern(Pattern(Call, args=[ANY, Pattern(Num)]))
+
+        assert_equal(pattern.match(Call(Name("f"), [Name("x"), Num(1)])), {})
+        assert_is(pattern.match(Call(Name("f"), [Num(1)])), None)
+        assert_is(pattern.match(Call(Name("f"), [Name("x"), Name("y")])), None)
+
+    def test_any_does_not_match_unset_fields(self):
+        pattern = compile_pattern(Pattern(Module, docstring=ANY))
+
+        assert_equal(pattern.match(Module([], "doc")), {})
+        assert_is(pattern.match(Module(body=[])), None)
+
+    def test_captures_values(self):
+        pattern = compile_pattern(Pattern(
+            Call, func=Pattern(Name, id=Capture("name")), args=Capture("args")
+        ))
+        node = Call(Name("f"), [Num(1)])
+
+        assert_equal(pattern.match(node), {"name": "f", "args": node.args})
+
+    def test_does_not_allow_unknown_fields(self):
+        with assert_raises(tree.FieldError):
+            Pattern(Call, function=ANY)
+
+    def test_compiles_only_patterns_of_nodes(self):
+        with assert_raises(TypeError):
+            compile_pattern(Capture("x"))
+
+
+class TestSearch(Test):
+    """py2c.tree.query.CompiledPattern.finditer and findall, with and
+    without a NodeIndex
+    """
+
+    def test_finds_nodes_in_pre_order(self):
+        node = make_tree()
+        expected = [node.body[0], node.body[1].args[0]]
+
+        assert_equal(compile_pattern(LEN_CALL).findall(node), expected)
+        assert_equal(
+            compile_pattern(LEN_CALL).findall(NodeIndex(node)), expected
+        )
+
+    def test_finds_captures(self):
+        pattern = compile_pattern(Pattern(Num, n=Capture("n")))
+
+        assert_equal(
+            [captures for _, captures in pattern.finditer(make_tree())],
+            [{"n": 1}, {"n": 2}]
+        )
+
+    def test_index_gives_nodes_of_sub_classes_in_pre_order(self):
+        node = make_tree()
+        index = NodeIndex(node)
+
+        assert_equal(len(index), 10)
+        assert_equal(list(index.nodes_of(Expr)), list(walk(node, types=Expr)))
+        assert_equal(list(index.nodes_of(Num)), [
+            node.body[1].args[0].args[0], node.body[2]
+        ])
+        assert_equal(list(index.nodes_of(BaseException)), [])
@@ -0,0 +1,267 @@
+"""Unit-tests for `py2c.tree.serialize`
+"""
+
+import io
+import sys
+import copy
+import pickle
+
+from py2c import tree
+from py2c.tree import serialize
+
+from py2c.tests import Test
+from nose.tools import (
+    assert_equal, assert_not_equal, assert_raises, assert_is, assert_less
+)
+
+
+# =============================================================================
+# Helper classes
+# =============================================================================
+class Leaf(tree.Node):
+    _fields = [
+        ('name', tree.identifier, "NEEDED"),
+        ('value', object, "OPTIONAL"),
+    ]
+
+
+class SlottedLeaf(tree.Node):
+    __slots__ = ('name',)
+    _fields = [
+        ('name', tree.identifier, "NEEDED"),
+    ]
+
+
+class Branch(tree.Node):
+    _fields = [
+        ('first', tree.Node, "OPTIONAL"),
+        ('rest', tree.Node, "ZERO_OR_MORE"),
+    ]
+
+
+class Outer(object):
+    class Nested(tree.Node):
+        _fields = [
+            ('values', object, "ZERO_OR_MORE"),
+        ]
+
+
+def make_tree():
+    node = Branch(
+        Leaf("a", 1),
+        [Branch(Leaf(name="b"), [SlottedLeaf("c")]), Leaf("a", 1), Branch()]
+    )
+    node.finalize()
+    return node
+
+
+# =============================================================================
+# Tests
+# =============================================================================
+class TestSerialization(Test):
+    """py2c.tree.serialize.dumps and loads
+    """
+
+    def test_round_trips_tree(self):
+        node = make_tree()
+        loaded = serialize.loads(serialize.dumps(node))
+
+        assert_equal(loaded, node)
+        assert_equal(loaded._finalized, tree._FINALIZED)
+        assert_is(loaded.rest[0].rest[0]._parent, loaded.rest[0])
+
+    def test_round_trips_scalars(self):
+        values = [
+            None, True, False, 0, 1, -1, 2 ** 63 - 1, -2 ** 63, 2 ** 100,
+            -2 ** 100, 1.5, -0.0, 0.0, "", "identifier", "☃", b"\x00\xff"
+        ]
+        node = Outer.Nested(values)
+        loaded = serialize.loads(serialize.dumps(node))
+
+        assert_equal(loaded, node)
+        assert_equal(
+            [value.__class__ for value in loaded.values],
+            [value.__class__ for value in values]
+        )
+        assert_equal(str(loaded.values[11]), "-0.0")
+
+    def test_stores_equal_scalars_once(self):
+        names = ["a_long_identifier"] * 10
+        data = serialize.dumps(
+            Branch(None, [Leaf(name=name) for name in names])
+        )
+
+        assert_equal(data.count(b"a_long_identifier"), 1)
+
+    def test_loads_identifiers_as_shared_copies(self):
+        name = "".join(["a_name_", "in_a_stream"])
+        loaded = serialize.loads(serialize.dumps(Leaf(name=name)))
+
+        assert_is(loaded.name, tree.identifier_table.intern(name))
+
+    def test_is_smaller_than_pickle(self):
+        node = Branch(None, [make_tree() for _ in range(10)])
+
+        assert_less(
+            len(serialize.dumps(node)), len(pickle.dumps(node, 4)) / 4
+        )
+
+    def test_round_trips_trees_deeper_than_recursion_limit(self):
+        node = Branch()
+        for _ in range(sys.getrecursionlimit() * 2):
+            node = Branch(node, [])
+
+        loaded = serialize.loads(serialize.dumps(node))
+
+        # Equality checks are recursive, hashing is not.
+        assert_equal(hash(loaded), hash(node))
+
+    def test_loads_from_bytes_like_objects(self):
+        data = serialize.dumps(make_tree())
+
+        assert_equal(serialize.loads(bytearray(data)), make_tree())
+        assert_equal(serialize.loads(memoryview(data)), make_tree())
+
+    def test_dumps_and_loads_many_trees_in_a_stream(self):
+        trees = [make_tree(), Leaf(name="a"), Branch(None, [make_tree()])]
+        stream = io.BytesIO()
+        for node in trees:
+            serialize.dump(node, stream)
+        stream.write(b"rest")
+
+        stream.seek(0)
+        assert_equal([serialize.load(stream) for _ in trees], trees)
+        assert_equal(stream.read(), b"rest")
+
+        stream = io.BytesIO()
+        with assert_raises(EOFError):
+            serialize.load(stream)
+
+    def test_does_not_load_truncated_trees(self):
+        stream = io.BytesIO()
+        serialize.dump(make_tree(), stream)
+        data = stream.getvalue()
+
+        for end in [1, len(data) - 1]:
+            with assert_raises(serialize.SerializationError):
+                serialize.load(io.BytesIO(data[:end]))
+
+    def test_does_not_serialize_unsupported_values(self):
+        with assert_raises(serialize.SerializationError):
+            serialize.dumps(Outer.Nested([object()]))
+        with assert_raises(serialize.SerializationError):
+            serialize.dumps(Outer.Nested([[1]]))
+
+    def test_rejects_invalid_data(self):
+        data = serialize.dumps(make_tree())
+
+        with assert_raises(serialize.SerializationError):
+            serialize.loads(b"not a tree")
+        with assert_raises(serialize.SerializationError):
+            serialize.loads(data[:-3])
+        with assert_raises(serialize.SerializationError):
+            serialize.loads(data.replace(b"SlottedLeaf", b"MissingLeaf"))
+
+
+class TestStreaming(Test):
+    """py2c.tree.serialize.TreeWriter and TreeReader
+    """
+
+    def test_streams_many_trees(self):
+        trees = [make_tree(), Leaf(name="a"), Branch(None, [make_tree()])]
+        stream = io.BytesIO()
+        with serialize.TreeWriter(stream, buffer_size=16) as writer:
+            for node in trees:
+                writer.write(node)
+
+        stream.seek(0)
+        reader = serialize.TreeReader(stream, chunk_size=3)
+
+        assert_equal(list(reader), trees)
+        with assert_raises(EOFError):
+            reader.read()
+
+    def test_shares_tables_between_trees(self):
+        stream = io.BytesIO()
+        with serialize.TreeWriter(stream) as writer:
+            writer.write(make_tree())
+            writer.flush()
+            size = len(stream.getvalue())
+            writer.write(make_tree())
+
+        assert_equal(stream.getvalue().count(b"SlottedLeaf"), 1)
+        assert_less(len(stream.getvalue()) - size, size / 2)
+
+    def test_buffers_until_flush(self):
+        stream = io.BytesIO()
+        writer = serialize.TreeWriter(stream)
+        writer.write(make_tree())
+        assert_equal(stream.getvalue(), b"")
+
+        writer.flush()
+        assert_not_equal(stream.getvalue(), b"")
+
+
+class TestPickling(Test):
+    """Pickling of Nodes and py2c.tree.serialize.SerializedTree
+    """
+
+    def test_pickles_nodes(self):
+        node = make_tree()
+
+        for protocol in range(2, pickle.HIGHEST_PROTOCOL + 1):
+            loaded = pickle.loads(pickle.dumps(node, protocol))
+            assert_equal(loaded, node)
+            assert_equal(loaded._finalized, tree._FINALIZED)
+
+    def test_copies_nodes(self):
+        node = make_tree()
+        hash(node)
+
+        copied = copy.deepcopy(node)
+        assert_equal(copied, node)
+        assert_is(copied._hash, None)
+
+        copied.rest[0].first = Leaf(name="d")
+        assert_not_equal(copied, node)
+
+    def test_pickles_and_copies_sub_trees_without_their_parents(self):
+        node = make_tree()
+        sub_tree = node.rest[0]
+
+        for loaded in [
+            pickle.loads(pickle.dumps(sub_tree, pickle.HIGHEST_PROTOCOL)),
+            copy.deepcopy(sub_tree),
+        ]:
+            assert_equal(loaded, sub_tree)
+            assert_is(getattr(loaded, "_parent", None), None)
+            # Children get their parents again, for invalidation
+            assert_is(loaded.rest[0]._parent, loaded)
+            loaded.rest[0].name = "d"
+            assert_equal(loaded._finalized, tree._NOT_FINALIZED)
+
+        # The rest of the tree is not pickled along
+        assert_less(len(pickle.dumps(sub_tree)), len(pickle.dumps(node)))
+
+    def test_pickles_serialized_tree(self):
+        serialized = serialize.SerializedTree.from_node(make_tree())
+        loaded = pickle.loads(pickle.dumps(serialized))
+
+        assert_equal(loaded.to_node(), make_tree())
+
+    def test_pickles_serialized_tree_out_of_band(self):
+        if serialize._PickleBuffer is None:  # coverage: not missing
+            return
+        serialized = serialize.SerializedTree.from_node(make_tree())
+        buffers = []
+        data = pickle.dumps(serialized, 5, buffer_callback=buffers.append)
+        loaded = pickle.loads(data, buffers=buffers)
+
+        assert_equal(len(buffers), 1)
+        assert_less(len(data), len(serialized.data))
+        assert_equal(loaded.to_node(), make_tree())
+
+if __name__ == '__main__':
+    from py2c.tests import runmodule
+
+    runmodule()
@@ -0,0 +1,193 @@
+"""Unit-tests for `py2c.tree.store`
+"""
+
+import sys
+
+from py2c import tree
+from py2c.tree import store, visitors
+
+from py2c.tests import Test
+from nose.tools import (
+    assert_equal, assert_not_equal, assert_raises, assert_is,
+    assert_is_instance
+)
+
+
+# =============================================================================
+# Helper classes
+# =============================================================================
+class Leaf(tree.Node):
+    _fields = [
+        ('name', tree.identifier, "NEEDED"),
+        ('value', int, "OPTIONAL"),
+    ]
+
+
+class SlottedLeaf(tree.Node):
+    __slots__ = ('name',)
+    _fields = [
+        ('name', tree.identifier, "NEEDED"),
+    ]
+
+
+class Branch(tree.Node):
+    _fields = [
+        ('first', tree.Node, "OPTIONAL"),
+        ('rest', tree.Node, "ZERO_OR_MORE"),
+    ]
+
+
+class VisitOrderCheckingVisitor(visitors.RecursiveNodeVisitor):
+
+    def __init__(self):
+        super().__init__()
+        self.visited = []
+
+    def generic_visit(self, node):
+        self.visited.append(node.__class__.__name__)
+        super().generic_visit(node)
+
+    def visit_Leaf(self, node):
+        self.visited.append(node.name)
+
+
+def make_tree():
+    return Branch(
+        Leaf("a", 1),
+        [Branch(Leaf(name="b"), [SlottedLeaf("c")]), Leaf("a", 1), Branch()]
+    )
+
+
+# =============================================================================
+# Tests
+# =============================================================================
+class TestTreeStore(Test):
+    """py2c.tree.store.TreeStore
+    """
+
+    def setUp(self):
+        self.node = make_tree()
+        self.store = store.TreeStore.from_node(self.node)
+
+    def test_stores_nodes_in_pre_order(self):
+        assert_equal(len(self.store), 7)
+        assert_equal(
+            [self.store.view(i).__class__.__name__ for i in range(7)],
+            [
+                "Branch", "Leaf", "Branch", "Leaf", "SlottedLeaf", "Leaf",
+                "Branch"
+            ]
+        )
+        assert_equal(list(self.store.parents), [-1, 0, 0, 2, 2, 0, 0])
+        assert_equal(list(self.store.ends), [7, 2, 5, 4, 5, 6, 7])
+
+    def test_stores_equal_scalars_once(self):
+        assert_equal(self.store.scalars.count("a"), 1)
+
+    def test_stores_identifiers_as_shared_copies(self):
+        name = "".join(["a_name_", "in_a_store"])
+        node_store = store.TreeStore.from_node(Branch(Leaf(name=name), []))
+
+        shared = tree.identifier_table.intern(name)
+        assert_is(node_store.root.first.name, shared)
+        assert_is(node_store.to_node().first.name, shared)
+
+    def test_makes_equal_node(self):
+        node = self.store.to_node()
+
+        assert_is_instance(node, Branch)
+        assert_equal(node, self.node)
+        assert_equal(self.store.to_node(2), self.node.rest[0])
+
+    def test_finds_nodes_by_class(self):
+        assert_equal(self.store.indices_of(Leaf), [1, 3, 5])
+        assert_equal(self.store.indices_of(tree.Node, within=2), [2, 3, 4])
+        assert_equal(self.store.indices_of(int), [])
+        assert_equal(
+            [view.name for view in self.store.find_all(Leaf)], ["a", "b", "a"]
+        )
+
+    def test_stores_trees_deeper_than_recursion_limit(self):
+        node = Branch()
+        for _ in range(sys.getrecursionlimit() * 2):
+            node = Branch(node, [])
+
+        deep_store = store.TreeStore.from_node(node)
+
+        # Equality checks are recursive, hashing is not.
+        assert_equal(hash(deep_store.to_node()), hash(node))
+
+
+class TestNodeView(Test):
+    """py2c.tree.store.NodeView
+    """
+
+    def setUp(self):
+        self.node = make_tree()
+        self.store = store.TreeStore.from_node(self.node)
+        self.root = self.store.root
+
+    def test_is_instance_of_node_class(self):
+        assert_is_instance(self.root, Branch)
+        assert_is_instance(self.root, store.NodeView)
+        assert_is_instance(self.root.rest[0].rest[0], SlottedLeaf)
+
+    def test_has_fields_of_node(self):
+        assert_equal(self.root.first.name, "a")
+        assert_equal(self.root.first.value, 1)
+        assert_equal(self.root.rest[0].first.value, None)
+        assert_equal(self.root.rest[2].rest, ())
+        assert_equal(
+            [name for name, _ in tree.iter_fields(self.root)], ["first", "rest"]
+        )
+
+    def test_keeps_the_views_of_children(self):
+        assert_is(self.root.first, self.root.first)
+        assert_is(self.root.rest[0], self.root.rest[0])
+        assert_is(self.root.rest[0].first, self.root.rest[0].first)
+
+    def test_is_read_only(self):
+        with assert_raises(tree.FieldError):
+            self.root.first = None
+        with assert_raises(tree.FieldError):
+            del self.root.first
+
+    def test_compares_and_hashes_like_nodes(self):
+        other = store.TreeStore.from_node(make_tree()).root
+
+        assert_equal(self.root, other)
+        assert_equal(hash(self.root), hash(other))
+        assert_equal(self.root.first, self.root.rest[1])
+        assert_not_equal(self.root.first, self.root.rest[0].first)
+
+    def test_equals_and_hashes_like_the_node_it_is_a_view_of(self):
+        views = [self.root, self.root.first] + list(self.root.rest)
+        nodes = [self.node, self.node.first] + list(self.node.rest)
+
+        for view, node in zip(views, nodes):
+            assert_equal(view, node)
+            assert_equal(node, view)
+            assert_equal(hash(view), hash(node))
+        assert_not_equal(self.root.rest[0], self.node.rest[2])
+        assert_not_equal(self.node.rest[2], self.root.rest[0])
+        assert_equal(len(set(views + nodes)), len(set(nodes)))
+
+    def test_reprs_like_nodes(self):
+        assert_equal(repr(self.root), repr(self.node))
+
+    def test_is_visited_like_nodes(self):
+        expected = VisitOrderCheckingVisitor()
+        expected.visit(self.node)
+        visitor = VisitOrderCheckingVisitor()
+        visitor.visit(self.root)
+
+        assert_equal(visitor.visited, expected.visited)
+        assert_equal(
+            visitor.visited,
+            ["Branch", "a", "Branch", "b", "SlottedLeaf", "a", "Branch"]
+        )
+
+if __name__ == '__main__':
+    from py2c.tests import runmodule
+
+    runmodule()
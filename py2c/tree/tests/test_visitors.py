@@ -1,11 +1,16 @@
 """Unit-tests for `tree.visitors`
 """
 
+import sys
+import random
+
 from py2c import tree
 from py2c.tree import visitors
 
 from py2c.tests import Test, data_driven_test
-from nose.tools import assert_equal
+from nose.tools import (
+    assert_equal, assert_is, assert_is_not, assert_raises
+)
 
 
 # TEST:: Add non-node fields
@@ -29,6 +34,11 @@ class BasicNodeDeletable(tree.Node):
     _fields = []
 
 
+class SubClassOfBasicNode(BasicNode):
+    """Visited by the visit_BasicNode method of visitors that have one
+    """
+
+
 class ParentNode(tree.Node):
     _fields = [
         ('child', tree.Node, 'OPTIONAL'),
@@ -43,6 +53,44 @@ class ParentNodeWithChildrenList(tree.Node):
     ]
 
 
+class ValueNode(tree.Node):
+    _fields = [
+        ('value', int, 'NEEDED'),
+        ('children', tree.Node, 'ZERO_OR_MORE'),
+    ]
+
+
+class AssignmentCountingNode(tree.Node):
+    """Node that counts the assignments to it's fields
+    """
+    assignments = 0
+    _fields = [
+        ('child', tree.Node, 'OPTIONAL'),
+        ('children', tree.Node, 'ZERO_OR_MORE'),
+    ]
+
+    def __setattr__(self, name, value):
+        AssignmentCountingNode.assignments += 1
+        super().__setattr__(name, value)
+
+
+class TypedLeaf(tree.Node):
+    _fields = []
+
+
+class TypedBranch(tree.Node):
+    _fields = [
+        ('leaves', TypedLeaf, 'ZERO_OR_MORE'),
+    ]
+
+
+class TypedRoot(tree.Node):
+    _fields = [
+        ('branches', TypedBranch, 'ZERO_OR_MORE'),
+        ('other', tree.Node, 'OPTIONAL'),
+    ]
+
+
 # -----------------------------------------------------------------------------
 # Concrete Visitors used for testing
 # -----------------------------------------------------------------------------
@@ -70,6 +118,86 @@ def visit_BasicNode(self, node):
         self.recorded_access_path = self.access_path[:]
 
 
+class TrackedAccessPathCheckingVisitor(AccessPathCheckingVisitor):
+    track_access_path = True
+
+
+class NestedAccessPathCheckingVisitor(AccessPathCheckingVisitor):
+    """Visits the children of ParentNodes from it's own methods
+    """
+
+    def visit_ParentNode(self, node):
+        self.generic_visit(node)
+
+    def visit_ParentNodeWithChildrenList(self, node):
+        for child in node.child:
+            self.visit(child)
+
+
+class DispatchCheckingVisitor(visitors.RecursiveNodeVisitor):
+
+    def __init__(self):
+        super().__init__()
+        self.visited = []
+
+    def generic_visit(self, node):
+        self.visited.append("generic " + node.__class__.__name__)
+        super().generic_visit(node)
+
+    def visit_BasicNode(self, node):
+        self.visited.append("BasicNode " + node.__class__.__name__)
+
+
+class SpecificDispatchCheckingVisitor(DispatchCheckingVisitor):
+
+    def visit_SubClassOfBasicNode(self, node):
+        self.visited.append("SubClassOfBasicNode")
+
+
+class HookCheckingVisitor(visitors.RecursiveNodeVisitor):
+
+    def __init__(self):
+        super().__init__()
+        self.visited = []
+
+    def visit_ParentNode(self, node):
+        self.visited.append("enter " + node.__class__.__name__)
+        yield
+        self.visited.append("leave " + node.__class__.__name__)
+
+    def visit_ParentNodeWithChildrenList(self, node):
+        self.visited.append(len(self.access_path))
+        if node.child:
+            yield
+        self.visited.append(len(self.access_path))
+
+    def visit_BasicNode(self, node):
+        self.visited.append(len(self.access_path))
+
+
+class YieldingTwiceVisitor(visitors.RecursiveNodeVisitor):
+
+    def visit_ParentNode(self, node):
+        yield
+        yield
+
+
+class PruningCheckingVisitor(visitors.RecursiveNodeVisitor):
+
+    def __init__(self):
+        super().__init__()
+        self.visited = []
+
+    def _visit_pruned(self, node):
+        self.visited.append("pruned " + node.__class__.__name__)
+
+    def visit_TypedLeaf(self, node):
+        self.visited.append("TypedLeaf")
+
+    def visit_LateLeaf(self, node):
+        self.visited.append("LateLeaf")
+
+
 class EmptyTransformer(visitors.RecursiveNodeTransformer):
     pass
 
@@ -115,6 +243,143 @@ def visit_BasicNodeWithListReplacement(self, node):
         return [BasicNode(), BasicNodeReplacement()]
 
 
+class RaisingTransformer(TransformationCheckingTransformer):
+    """Raises a ValueError on the nodes it would delete
+    """
+    track_access_path = True
+
+    def visit_BasicNodeDeletable(self, node):
+        raise ValueError()
+
+
+class HookTransformer(visitors.RecursiveNodeTransformer):
+
+    def visit_ParentNode(self, node):
+        yield
+        # The children are transformed by now
+        if getattr(node, "child", None) is None:
+            return BasicNodeDeletable()
+        return node
+
+    def visit_BasicNodeReplacement(self, node):
+        return self.NONE_DEPUTY
+
+    def visit_BasicNodeDeletable(self, node):
+        return None
+        yield
+
+
+class CollapsingTransformer(visitors.RecursiveNodeTransformer):
+    """Replaces ParentNodes of BasicNodes with BasicNodes, before visiting
+    their children; so a chain of ParentNodes collapses over many rounds.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.access_paths = []
+
+    def visit_ParentNode(self, node):
+        if isinstance(getattr(node, "child", None), BasicNode):
+            self.access_paths.append(self.access_path[:])
+            return BasicNode()
+        return self.generic_visit(node)
+
+
+class CountingIterFields(object):
+    """iter_fields, counting the nodes it is called with
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, node):
+        self.calls += 1
+        return tree.iter_fields(node)
+
+
+class ClassRecordingVisitor(visitors.RecursiveNodeVisitor):
+
+    def __init__(self):
+        super().__init__()
+        self.visited = []
+
+    def visit_Node(self, node):
+        self.visited.append(node.__class__.__name__)
+        yield
+
+
+class ValueRecordingVisitor(visitors.RecursiveNodeVisitor):
+    """Records the values of the ValueNodes, with their access paths
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.visited = []
+
+    def visit_ValueNode(self, node):
+        self.visited.append((node.value, self.access_path[:]))
+        yield
+        self.visited.append(("leave", node.value))
+
+
+class ValueFoldingTransformer(visitors.RecursiveNodeTransformer):
+    """Replaces the ValueNodes with values divisible by `divisor` and removes
+    the ones with values one more than those, before their children.
+    """
+
+    def __init__(self, divisor):
+        super().__init__()
+        self.divisor = divisor
+        self.visited = []
+
+    def visit_ValueNode(self, node):
+        self.visited.append((node.value, self.access_path[:]))
+        if node.value % self.divisor == 0:
+            return ValueNode(node.value + 100, [ValueNode(node.value + 1, [])])
+        elif node.value % self.divisor == 1:
+            return None
+        yield
+        return node
+
+
+class ValueSplittingTransformer(visitors.RecursiveNodeTransformer):
+    """Replaces the ValueNodes with values divisible by 5 with two nodes.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.visited = []
+
+    def visit_ValueNode(self, node):
+        self.visited.append((node.value, self.access_path[:]))
+        if node.value % 5 == 0:
+            return [node, ValueNode(node.value + 1, [])]
+        yield
+        return node
+
+
+def make_value_nodes(shape):
+    return [ValueNode(value, make_value_nodes(rest)) for value, rest in shape]
+
+
+def make_random_shape(rng, depth):
+    """A random shape of a list of ValueNodes, for `make_value_nodes`
+    """
+    if not depth:
+        return []
+    return [
+        (rng.randrange(30), make_random_shape(rng, depth - 1))
+        for _ in range(rng.randrange(4))
+    ]
+
+
+def make_deep_tree(depth):
+    node = BasicNode()
+    for _ in range(depth):
+        node = ParentNode(node)
+    return node
+
+
 # -----------------------------------------------------------------------------
 # Tests
 # -----------------------------------------------------------------------------
@@ -134,6 +399,17 @@ def test_visit_order(self, node, order):
         assert_equal(retval, None)
         assert_equal(visitor.visited, order)
 
+    @data_driven_test("visitors-visitor_order.yaml", prefix="visit order of finalized ")
+    def test_visit_order_finalized(self, node, order):
+        to_visit = self.load(node)
+        to_visit.finalize()
+
+        # The main stuff
+        visitor = VisitOrderCheckingVisitor()
+        visitor.visit(to_visit)
+
+        assert_equal(visitor.visited, order)
+
     @data_driven_test("visitors-access_path.yaml", prefix="access path on visit of ")
     def test_access_path(self, node, access):
         to_visit = self.load(node)
@@ -147,6 +423,549 @@ def test_access_path(self, node, access):
         assert_equal(visitor.recorded_access_path, access_path)
 
 
+    @data_driven_test("visitors-access_path.yaml", prefix="tracked access path on visit of ")
+    def test_tracked_access_path(self, node, access):
+        to_visit = self.load(node)
+        access_path = self.load(access)
+
+        # The main stuff
+        visitor = TrackedAccessPathCheckingVisitor()
+        visitor.visit(to_visit)
+
+        assert_equal(visitor.recorded_access_path, access_path)
+        assert_equal(visitor.access_path, [])
+
+    def test_access_path_in_nested_visits(self):
+        visitor = NestedAccessPathCheckingVisitor()
+        visitor.visit(ParentNode(ParentNode(BasicNode())))
+        assert_equal(visitor.recorded_access_path, [
+            (ParentNode, "child", None), (ParentNode, "child", None)
+        ])
+
+        # `visit` does not add to the access path
+        visitor.visit(ParentNode(ParentNodeWithChildrenList([BasicNode()])))
+        assert_equal(visitor.recorded_access_path, [
+            (ParentNode, "child", None)
+        ])
+
+
+class TestDispatch(Test):
+    """Dispatch of nodes to the methods of visitors
+    """
+
+    def setUp(self):
+        self.node = ParentNodeWithChildrenList([
+            BasicNode(), SubClassOfBasicNode(), ParentNode(BasicNodeReplacement())
+        ])
+
+    def test_dispatches_to_methods_of_base_classes(self):
+        visitor = DispatchCheckingVisitor()
+        visitor.visit(self.node)
+
+        assert_equal(visitor.visited, [
+            "generic ParentNodeWithChildrenList",
+            "BasicNode BasicNode",
+            "BasicNode SubClassOfBasicNode",
+            "generic ParentNode",
+            "generic BasicNodeReplacement",
+        ])
+
+    def test_dispatches_to_most_specific_method(self):
+        visitor = SpecificDispatchCheckingVisitor()
+        visitor.visit(self.node)
+
+        assert_equal(visitor.visited[1:3], [
+            "BasicNode BasicNode", "SubClassOfBasicNode"
+        ])
+
+    def test_resolves_methods_once_per_visitor_class(self):
+        visitor = DispatchCheckingVisitor()
+        visitor.visit(self.node)
+        table = visitors._get_dispatch_table(DispatchCheckingVisitor)
+
+        assert_is(DispatchCheckingVisitor()._dispatch_table, table)
+        assert_is(
+            table[SubClassOfBasicNode], DispatchCheckingVisitor.visit_BasicNode
+        )
+        assert_is_not(
+            visitors._get_dispatch_table(SpecificDispatchCheckingVisitor), table
+        )
+
+
+class TestTraversal(Test):
+    """Traversal of trees by visitors, with an explicit stack
+    """
+
+    def test_visits_trees_deeper_than_recursion_limit(self):
+        depth = sys.getrecursionlimit() * 2
+        for visitor_class in [
+            AccessPathCheckingVisitor, TrackedAccessPathCheckingVisitor
+        ]:
+            visitor = visitor_class()
+            visitor.visit(make_deep_tree(depth))
+
+            assert_equal(len(visitor.recorded_access_path), depth)
+            assert_equal(visitor.access_path, [])
+
+    def test_transforms_trees_deeper_than_recursion_limit(self):
+        depth = sys.getrecursionlimit() * 2
+        node = make_deep_tree(depth)
+        TransformationCheckingTransformer().visit(node)
+
+        for _ in range(depth):
+            node = node.child
+        assert_equal(node, BasicNodeReplacement())
+
+    def test_generator_methods_run_around_children(self):
+        visitor = HookCheckingVisitor()
+        visitor.visit(ParentNodeWithChildrenList([
+            ParentNode(BasicNode()), ParentNodeWithChildrenList([]),
+            ParentNode(),
+        ]))
+
+        assert_equal(visitor.visited, [
+            0,
+            "enter ParentNode", 2, "leave ParentNode",
+            1, 1,
+            "enter ParentNode", "leave ParentNode",
+            0,
+        ])
+
+    def test_generator_methods_run_on_visit_of_node(self):
+        visitor = HookCheckingVisitor()
+        visitor.visit(ParentNode(BasicNode()))
+
+        assert_equal(visitor.visited, [
+            "enter ParentNode", 1, "leave ParentNode"
+        ])
+
+    def test_generator_methods_yield_once(self):
+        node = ParentNodeWithChildrenList([ParentNode()])
+        with assert_raises(RuntimeError):
+            YieldingTwiceVisitor().visit(node)
+
+    def test_generator_methods_return_replacements(self):
+        node = ParentNodeWithChildrenList([
+            ParentNode(BasicNodeReplacement()),
+            ParentNode(ParentNode(BasicNodeDeletable())),
+            BasicNodeDeletable(),
+        ])
+        retval = HookTransformer().visit(node)
+
+        assert_is(retval, node)
+        assert_equal(node, ParentNodeWithChildrenList([
+            BasicNodeDeletable(), ParentNode(BasicNodeDeletable()),
+        ]))
+
+
+class TestPruning(Test):
+    """Skipping of sub-trees that can't contain nodes visitors have methods for
+    """
+
+    def test_skips_subtrees_without_visited_classes(self):
+        visitor = PruningCheckingVisitor()
+        visitor.visit(TypedRoot(
+            [TypedBranch([TypedLeaf()]), TypedBranch([])],
+            ParentNode(ParentNodeWithChildrenList([TypedLeaf()]))
+        ))
+
+        assert_equal(visitor.visited, ["TypedLeaf", "TypedLeaf"])
+
+        visitor = PruningCheckingVisitor()
+        visitor.visit(TypedRoot([], BasicNode()))
+        assert_equal(visitor.visited, ["pruned BasicNode"])
+
+    def test_does_not_prune_for_visitors_that_override_generic_visit(self):
+        visitor = VisitOrderCheckingVisitor()
+        visitor.visit(TypedRoot([TypedBranch([])], BasicNode()))
+
+        assert_equal(visitor.visited, [
+            "TypedRoot", "TypedBranch", "BasicNode"
+        ])
+
+    def test_pruning_accounts_for_classes_defined_later(self):
+        visitor = PruningCheckingVisitor()
+        visitor.visit(TypedBranch([TypedLeaf()]))
+        visitor.visit(TypedBranch([]))
+
+        class LateLeaf(TypedLeaf):
+            pass
+
+        visitor.visit(TypedBranch([LateLeaf()]))
+        assert_equal(visitor.visited, ["TypedLeaf", "LateLeaf"])
+
+    def test_pruned_subtrees_are_kept_by_transformers(self):
+        node = TypedRoot([TypedBranch([TypedLeaf()])], ParentNode(BasicNode()))
+        retval = TransformationCheckingTransformer().visit(node)
+
+        assert_is(retval, node)
+        assert_equal(node, TypedRoot(
+            [TypedBranch([TypedLeaf()])], ParentNode(BasicNodeReplacement())
+        ))
+
+
+class TestChangeDetection(Test):
+    """RecursiveNodeTransformer.changed and PassManager.changed
+    """
+
+    def make_tree(self):
+        node = AssignmentCountingNode(
+            ParentNode(BasicNodeReplacement()),
+            [ParentNode(), BasicNodeReplacement(), BasicNode()]
+        )
+        AssignmentCountingNode.assignments = 0
+        return node
+
+    def test_does_not_assign_when_nothing_changes(self):
+        node = self.make_tree()
+        children = node.children
+        transformer = EmptyTransformer()
+        transformer.visit(node)
+
+        assert not transformer.changed
+        assert_equal(AssignmentCountingNode.assignments, 0)
+        assert_is(node.children, children)
+        assert_equal(node, self.make_tree())
+
+    def test_reports_changes(self):
+        transformer = TransformationCheckingTransformer()
+        for node, changed in [
+            (self.make_tree(), True),
+            (ParentNode(ParentNode(BasicNode())), True),
+            (ParentNodeWithChildrenList([BasicNodeDeletable()]), True),
+            (ParentNode(ParentNodeWithChildrenList([ParentNode()])), False),
+            (BasicNode(), True),
+        ]:
+            transformer.visit(node)
+            assert_equal(transformer.changed, changed)
+
+    def test_reports_changes_made_before_an_error(self):
+        transformer = RaisingTransformer()
+        node = ParentNodeWithChildrenList([
+            ParentNode(BasicNode()), ParentNode(BasicNodeDeletable())
+        ])
+        with assert_raises(ValueError):
+            transformer.visit(node)
+
+        assert transformer.changed
+        assert_is(transformer._cursor, None)
+        assert_equal(transformer.access_path, [])
+
+        transformer.visit(ParentNode(ParentNode()))
+        assert not transformer.changed
+
+    def test_reports_changes_of_passes_made_before_an_error(self):
+        passes = [EmptyTransformer(), RaisingTransformer()]
+        manager = visitors.PassManager(passes)
+        with assert_raises(ValueError):
+            manager.visit(ParentNode(ParentNode(BasicNodeDeletable())))
+        assert not manager.changed
+
+        with assert_raises(ValueError):
+            manager.visit(ParentNodeWithChildrenList([
+                BasicNode(), BasicNodeDeletable()
+            ]))
+        assert manager.changed
+        assert_equal([p.changed for p in passes], [False, True])
+        assert_equal(manager._access_path, [])
+
+    def test_replaces_nodes_of_lists_in_place(self):
+        node = ParentNodeWithChildrenList([BasicNode(), ParentNode()])
+        children = node.child
+        TransformationCheckingTransformer().visit(node)
+
+        assert_is(node.child, children)
+        assert_equal(children, [BasicNodeReplacement(), ParentNode()])
+
+    def test_reports_changes_of_passes(self):
+        passes = [EmptyTransformer(), TransformationCheckingTransformer()]
+        manager = visitors.PassManager(passes)
+
+        manager.visit(ParentNode(BasicNode()))
+        assert manager.changed
+        assert_equal([p.changed for p in passes], [False, True])
+
+        manager.visit(ParentNode(ParentNode()))
+        assert not manager.changed
+        assert_equal([p.changed for p in passes], [False, False])
+
+
+class TestFixpointRewriter(Test):
+    """py2c.tree.visitors.FixpointRewriter
+    """
+
+    def test_rewrites_until_nothing_changes(self):
+        node = ParentNodeWithChildrenList([make_deep_tree(3), BasicNode()])
+        rewriter = visitors.FixpointRewriter(CollapsingTransformer())
+        retval = rewriter.rewrite(node)
+
+        assert_is(retval, node)
+        assert_equal(node, ParentNodeWithChildrenList([
+            BasicNode(), BasicNode()
+        ]))
+        # The ParentNodes above the one collapsed in the first round collapse
+        # when the rules are applied to them again, in the second round.
+        assert_equal(rewriter.rounds, 3)
+
+    def test_revisits_only_changes_and_their_ancestors(self):
+        others = [ParentNode(BasicNodeReplacement()) for _ in range(10)]
+        node = ParentNodeWithChildrenList(
+            others[:5] + [make_deep_tree(4)] + others[5:]
+        )
+        rewriter = visitors.FixpointRewriter(CollapsingTransformer())
+        rewriter.rewrite(node)
+
+        assert_equal(node.child, others[:5] + [BasicNode()] + others[5:])
+        assert_equal(rewriter.rounds, 3)
+        # The replacements and their ancestors: the 3 ParentNodes left and
+        # the root, then the root.
+        assert_equal(rewriter.revisited, (1 + 4) + (1 + 1))
+
+    def test_rewrites_the_root_node(self):
+        rewriter = visitors.FixpointRewriter(CollapsingTransformer())
+
+        assert_equal(rewriter.rewrite(make_deep_tree(3)), BasicNode())
+        assert_equal(rewriter.rounds, 3)
+
+    def test_rewrites_the_root_node_away(self):
+        rewriter = visitors.FixpointRewriter(
+            TransformationCheckingTransformer()
+        )
+
+        assert_is(rewriter.rewrite(BasicNodeDeletable()), None)
+        assert_is(rewriter.rewrite(BasicNodeReplacement()), None)
+        # Replaced in the first round and removed in the second one
+        assert_is(rewriter.rewrite(BasicNode()), None)
+        assert_equal(rewriter.rounds, 2)
+
+    def test_gives_access_paths_of_nodes(self):
+        transformer = CollapsingTransformer()
+        visitors.FixpointRewriter(transformer).rewrite(
+            ParentNodeWithChildrenList([BasicNode(), make_deep_tree(2)])
+        )
+
+        assert_equal(transformer.access_paths, [
+            [
+                (ParentNodeWithChildrenList, "child", 1),
+                (ParentNode, "child", None),
+            ],
+            [(ParentNodeWithChildrenList, "child", 1)],
+        ])
+
+    def test_stops_after_max_rounds(self):
+        rewriter = visitors.FixpointRewriter(
+            CollapsingTransformer(), max_rounds=2
+        )
+        with assert_raises(RuntimeError):
+            rewriter.rewrite(make_deep_tree(3))
+
+
+class TestPassManager(Test):
+    """py2c.tree.visitors.PassManager
+    """
+
+    def test_passes_visit_like_when_run_alone(self):
+        node = ParentNodeWithChildrenList([
+            ParentNode(BasicNode()), BasicNodeReplacement(),
+            ParentNodeWithChildrenList([]), SubClassOfBasicNode(),
+        ])
+        alone = [
+            VisitOrderCheckingVisitor(), HookCheckingVisitor(),
+            DispatchCheckingVisitor(),
+        ]
+        for visitor in alone:
+            visitor.visit(node)
+        passes = [visitor.__class__() for visitor in alone]
+        retval = visitors.PassManager(passes).visit(node)
+
+        assert_is(retval, node)
+        for visitor, visitor_alone in zip(passes, alone):
+            assert_equal(visitor.visited, visitor_alone.visited)
+
+    def test_runs_passes_in_one_walk(self):
+        iter_fields = CountingIterFields()
+        passes = [
+            visitors.RecursiveNodeVisitor(iter_fields=iter_fields),
+            HookCheckingVisitor(), EmptyTransformer(),
+        ]
+        for visitor in passes:
+            visitor.iter_fields = iter_fields
+        node = make_deep_tree(sys.getrecursionlimit() * 2)
+        visitors.PassManager(passes).visit(node)
+
+        assert_equal(iter_fields.calls, sys.getrecursionlimit() * 2 + 1)
+
+    def test_passes_visit_the_replacements_of_earlier_passes(self):
+        visitor = ClassRecordingVisitor()
+        node = ParentNodeWithChildrenList([
+            BasicNodeWithListReplacement(), BasicNode(), BasicNodeDeletable(),
+            ParentNode(BasicNodeDeletable()),
+        ])
+        visitors.PassManager([
+            TransformationCheckingTransformer(), visitor
+        ]).visit(node)
+
+        assert_equal(node, ParentNodeWithChildrenList([
+            BasicNode(), BasicNodeReplacement(), BasicNodeReplacement(),
+            ParentNode(),
+        ]))
+        assert_equal(visitor.visited, [
+            "ParentNodeWithChildrenList", "BasicNodeReplacement", "ParentNode"
+        ])
+
+    def test_passes_walk_nodes_replaced_by_later_passes(self):
+        node = ParentNodeWithChildrenList([
+            ValueNode(6, [ValueNode(4, []), ValueNode(5, [])]),
+            ValueNode(2, []),
+        ])
+        visitor = ValueRecordingVisitor()
+        transformer = ValueFoldingTransformer(3)
+        visitors.PassManager([visitor, transformer]).visit(node)
+
+        assert_equal(node, ParentNodeWithChildrenList([
+            ValueNode(106, [ValueNode(7, [])]), ValueNode(2, []),
+        ]))
+        # The visitor walks the nodes as they were before the transformer
+        path = [(ParentNodeWithChildrenList, "child", 0)]
+        assert_equal(visitor.visited, [
+            (6, path),
+            (4, path + [(ValueNode, "children", 0)]), ("leave", 4),
+            (5, path + [(ValueNode, "children", 1)]), ("leave", 5),
+            ("leave", 6),
+            (2, [(ParentNodeWithChildrenList, "child", 1)]), ("leave", 2),
+        ])
+        assert_equal(transformer.visited, [
+            (6, path), (2, [(ParentNodeWithChildrenList, "child", 1)]),
+        ])
+
+    def test_passes_walk_nodes_removed_by_later_passes(self):
+        node = ParentNodeWithChildrenList([ValueNode(4, [ValueNode(2, [])])])
+        visitor = ValueRecordingVisitor()
+        visitors.PassManager([visitor, ValueFoldingTransformer(3)]).visit(node)
+
+        assert_equal(node, ParentNodeWithChildrenList([]))
+        assert_equal(
+            [entry[0] for entry in visitor.visited], [4, 2, "leave", "leave"]
+        )
+
+    def test_passes_get_indices_shifted_by_earlier_passes(self):
+        node = ParentNodeWithChildrenList([
+            ValueNode(1, []), ValueNode(10, []), ValueNode(3, [])
+        ])
+        visitor = ValueRecordingVisitor()
+        passes = [
+            ValueFoldingTransformer(4), ValueSplittingTransformer(), visitor
+        ]
+        visitors.PassManager(passes).visit(node)
+
+        assert_equal(node, ParentNodeWithChildrenList([
+            ValueNode(10, []), ValueNode(11, []), ValueNode(3, []),
+        ]))
+        # The nodes removed or replaced with many are not visited by the
+        # later passes, but the ones after them are, at their new index.
+        assert_equal(visitor.visited, [
+            (3, [(ParentNodeWithChildrenList, "child", 2)]), ("leave", 3)
+        ])
+
+    def test_runs_passes_like_one_after_another(self):
+        rng = random.Random(0)
+        for _ in range(300):
+            shape = make_random_shape(rng, 4)
+            divisors = [
+                rng.choice([None, 2, 3, 4]) for _ in range(rng.randint(1, 4))
+            ]
+            # The later passes don't visit the nodes a list replaces a node
+            # with, so that's left to the last pass.
+            if rng.random() < 0.3:
+                divisors.append(5)
+
+            def make_pass(divisor):
+                if divisor is None:
+                    return ValueRecordingVisitor()
+                elif divisor == 5:
+                    return ValueSplittingTransformer()
+                return ValueFoldingTransformer(divisor)
+
+            def make_passes():
+                return [make_pass(divisor) for divisor in divisors]
+
+            alone = make_passes()
+            expected = ParentNodeWithChildrenList(make_value_nodes(shape))
+            for visitor in alone:
+                visitor.visit(expected)
+            passes = make_passes()
+            node = ParentNodeWithChildrenList(make_value_nodes(shape))
+            manager = visitors.PassManager(passes)
+            manager.visit(node)
+
+            assert_equal(node, expected)
+            for visitor, visitor_alone in zip(passes, alone):
+                assert_equal(visitor.visited, visitor_alone.visited)
+                assert_equal(
+                    getattr(visitor, "changed", None),
+                    getattr(visitor_alone, "changed", None)
+                )
+            assert_equal(
+                manager.changed,
+                any(getattr(visitor, "changed", False) for visitor in alone)
+            )
+
+    def test_transforms_tuples_like_a_transformer_alone(self):
+        for make_children in [
+            lambda: [BasicNode(), BasicNodeDeletable()],
+            lambda: [ParentNode(), BasicNodeWithListReplacement()],
+            lambda: [ParentNode(), ParentNodeWithChildrenList([])],
+        ]:
+            expected = ParentNodeWithChildrenList(make_children())
+            expected.finalize()
+            expected_kept = expected.child
+            transformer_alone = TransformationCheckingTransformer()
+            transformer_alone.visit(expected)
+
+            node = ParentNodeWithChildrenList(make_children())
+            node.finalize()
+            kept = node.child
+            transformer = TransformationCheckingTransformer()
+            manager = visitors.PassManager([transformer])
+            manager.visit(node)
+
+            assert_equal(node, expected)
+            assert_equal(node.child.__class__, tuple)
+            assert_equal(node.child is kept, expected.child is expected_kept)
+            assert_equal(node._finalized, expected._finalized)
+            assert_equal(transformer.changed, transformer_alone.changed)
+            assert_equal(manager.changed, transformer_alone.changed)
+
+    def test_passes_get_access_paths(self):
+        passes = [
+            AccessPathCheckingVisitor(), TrackedAccessPathCheckingVisitor(),
+            AccessPathCheckingTransformer(),
+        ]
+        visitors.PassManager(passes).visit(
+            ParentNodeWithChildrenList([ParentNode(BasicNode())])
+        )
+
+        for visitor in passes:
+            assert_equal(visitor.recorded_access_path, [
+                (ParentNodeWithChildrenList, "child", 0),
+                (ParentNode, "child", None),
+            ])
+            assert_equal(visitor.access_path, [])
+
+    def test_transforms_root_node(self):
+        manager = visitors.PassManager([TransformationCheckingTransformer()])
+
+        assert_equal(manager.visit(BasicNode()), BasicNodeReplacement())
+        assert_equal(manager.visit(BasicNodeReplacement()), None)
+
+    def test_passes_should_visit_same_kind_of_nodes(self):
+        with assert_raises(ValueError):
+            visitors.PassManager([
+                EmptyTransformer(),
+                visitors.RecursiveNodeVisitor(base_class=BasicNode),
+            ])
+
+
 class TestRecursiveASTTransformer(Test):
     """py2c.tree.visitors.RecursiveNodeTransformer
     """
@@ -196,6 +1015,42 @@ def test_transformation(self, node, expected):
 
         assert_equal(retval, expected_node)
 
+    @data_driven_test("visitors-transform.yaml", prefix="transformation of finalized ")
+    def test_transformation_finalized(self, node, expected):
+        to_visit = self.load(node)
+        to_visit.finalize()
+        expected_node = self.load(expected)
+
+        # The main stuff
+        visitor = TransformationCheckingTransformer()
+        retval = visitor.visit(to_visit)
+
+        for value in [retval, expected_node]:
+            if isinstance(value, tree.Node):
+                value.finalize()
+        assert_equal(retval, expected_node)
+
+    def test_replaces_tuples_of_finalized_trees(self):
+        node = ParentNodeWithChildrenList([BasicNode(), BasicNodeDeletable()])
+        node.finalize()
+        transformer = TransformationCheckingTransformer()
+        transformer.visit(node)
+
+        assert_equal(node.child, (BasicNodeReplacement(),))
+        assert_equal(node._finalized, tree._NOT_FINALIZED)
+        assert transformer.changed
+
+    def test_keeps_unchanged_tuples_of_finalized_trees(self):
+        node = ParentNodeWithChildrenList([BasicNode(), ParentNode()])
+        node.finalize()
+        children = node.child
+        transformer = EmptyTransformer()
+        transformer.visit(node)
+
+        assert_is(node.child, children)
+        assert_equal(node._finalized, tree._FINALIZED)
+        assert not transformer.changed
+
 
 if __name__ == '__main__':
     from py2c.tests import runmodule
@@ -0,0 +1,125 @@
+"""Unit-tests for `py2c.tree.walk`
+"""
+
+import sys
+
+from py2c import tree
+from py2c.tree.walk import walk, iter_child_nodes
+from py2c.tree.visitors import Access
+
+from py2c.tests import Test
+from nose.tools import assert_equal, assert_raises
+
+
+# =============================================================================
+# Helper classes
+# =============================================================================
+class Leaf(tree.Node):
+    _fields = [
+        ('name', tree.identifier, "NEEDED"),
+    ]
+
+
+class Branch(tree.Node):
+    _fields = [
+        ('name', tree.identifier, "NEEDED"),
+        ('first', tree.Node, "OPTIONAL"),
+        ('rest', tree.Node, "ZERO_OR_MORE"),
+    ]
+
+
+class Twig(tree.Node):
+    """Node that can only hold Leaf nodes
+    """
+    _fields = [
+        ('leaves', Leaf, "ZERO_OR_MORE"),
+    ]
+
+
+def make_tree():
+    return Branch(
+        "a", Leaf("b"), [Branch("c", None, [Leaf("d")]), Leaf("e")]
+    )
+
+
+def names(nodes):
+    return [node.name for node in nodes]
+
+
+# =============================================================================
+# Tests
+# =============================================================================
+class TestWalk(Test):
+    """py2c.tree.walk.walk and iter_child_nodes
+    """
+
+    def test_iterates_over_child_nodes(self):
+        assert_equal(names(iter_child_nodes(make_tree())), ["b", "c", "e"])
+        assert_equal(list(iter_child_nodes(Leaf("a"))), [])
+
+    def test_walks_in_pre_order(self):
+        assert_equal(names(walk(make_tree())), ["a", "b", "c", "d", "e"])
+
+    def test_walks_in_post_order(self):
+        assert_equal(
+            names(walk(make_tree(), order="post")), ["b", "d", "c", "e", "a"]
+        )
+
+    def test_walks_breadth_first(self):
+        assert_equal(
+            names(walk(make_tree(), order="bfs")), ["a", "b", "c", "e", "d"]
+        )
+
+    def test_walks_finalized_trees(self):
+        node = make_tree()
+        node.finalize()
+
+        assert_equal(names(walk(node)), ["a", "b", "c", "d", "e"])
+
+    def test_does_not_allow_unknown_orders(self):
+        with assert_raises(ValueError):
+            walk(make_tree(), order="in")
+
+    def test_filters_nodes_by_types(self):
+        for order in ["pre", "post", "bfs"]:
+            assert_equal(
+                names(walk(make_tree(), types=Leaf, order=order)),
+                ["b", "d", "e"] if order != "bfs" else ["b", "e", "d"]
+            )
+        assert_equal(names(walk(make_tree(), types=(Branch,))), ["a", "c"])
+
+    def test_skips_sub_trees_that_cannot_contain_types(self):
+        node = Branch("a", Twig([Leaf("b")]), [Leaf("c")])
+        with tree.trusted_construction():
+            # Going by the types of it's fields, a Twig holds no Branch
+            node.first.leaves.append(Branch("d", None, []))
+
+        assert_equal(names(walk(node, types=Branch)), ["a"])
+        assert_equal(names(walk(node, types=Leaf)), ["b", "c"])
+
+    def test_gives_access_paths(self):
+        node = make_tree()
+        paths = {
+            node.name: path for path, node in walk(node, with_path=True)
+        }
+
+        assert_equal(paths, {
+            "a": [],
+            "b": [Access(Branch, "first", None)],
+            "c": [Access(Branch, "rest", 0)],
+            "d": [Access(Branch, "rest", 0), Access(Branch, "rest", 0)],
+            "e": [Access(Branch, "rest", 1)],
+        })
+        assert_equal(
+            list(walk(node, types=Leaf, with_path=True, order="bfs"))[-1],
+            ([Access(Branch, "rest", 0), Access(Branch, "rest", 0)],
+             node.rest[0].rest[0])
+        )
+
+    def test_walks_trees_deeper_than_recursion_limit(self):
+        node = leaf = Leaf("x")
+        for _ in range(sys.getrecursionlimit() * 2):
+            node = Branch("y", node, [])
+
+        for order in ["pre", "post", "bfs"]:
+            assert_equal(list(walk(node, types=Leaf, order=order)), [leaf])
@@ -2,12 +2,22 @@
 """
 
 import abc
+import types
+import inspect
 import collections
 
-from py2c.tree import Node, iter_fields
+from py2c.tree import (
+    Node, iter_fields, _NodeMetaClass, _get_descendant_classes
+)
 
+# Shadowed by the arguments of BaseNodeVisitor
+_iter_fields = iter_fields
 
-__all__ = ["RecursiveNodeVisitor", "RecursiveNodeTransformer"]
+
+__all__ = [
+    "RecursiveNodeVisitor", "RecursiveNodeTransformer", "PassManager",
+    "FixpointRewriter",
+]
 
 
 # -----------------------------------------------------------------------------
@@ -16,15 +26,250 @@
 Access = collections.namedtuple("Access", "node field_name index")
 
 
+class _AccessCache(dict):
+    """Shares the Access for each (node class, field name, index), since
+    creating them is slow compared to visiting a node.
+    """
+
+    def __missing__(self, key):
+        access = self[key] = Access._make(key)
+        return access
+
+
+_accesses = _AccessCache()
+
+_GeneratorType = types.GeneratorType
+# Marks the end of the nodes of a list, in the stack of a transformer
+_SPLICE = object()
+# Marks the end of the children of a node, in the stack of a PassManager
+_RESUME = object()
+
+
+# -----------------------------------------------------------------------------
+# Dispatch of nodes to the methods of visitors
+#    The method that visits nodes of a class is resolved once per visitor
+#    class. It is `visit_<name>` for the first class in the node class's MRO
+#    that the visitor has such a method for, or `generic_visit`.
+#
+#    Visitors that walk Nodes with the default `generic_visit` can skip the
+#    sub-trees that can't contain any node that they have a method for, going
+#    by the types of the fields of the Node classes. Their dispatch tables
+#    have `_visit_pruned` for the classes of the roots of such sub-trees,
+#    which are forgotten when more Node classes are defined.
+# -----------------------------------------------------------------------------
+_dispatch_tables = {}
+# The version of the Node classes that the pruning tables are valid for
+_pruning_version = [_NodeMetaClass.version]
+
+
+def _get_dispatch_table(visitor_class, pruning=False):
+    """Get the table mapping node classes to the visitor methods that visit
+    their nodes, which is filled in as the node classes are seen.
+
+    Since the methods are looked up once, they should not be changed once the
+    visitor class is in use.
+    """
+    key = (visitor_class, pruning)
+    try:
+        return _dispatch_tables[key]
+    except KeyError:
+        return _dispatch_tables.setdefault(key, {})
+
+
+def _check_pruning_tables():
+    """Forget what the pruning dispatch tables know, if Node classes have
+    been defined since it was worked out.
+    """
+    if _pruning_version[0] != _NodeMetaClass.version:
+        for (_, pruning), table in _dispatch_tables.items():
+            if pruning:
+                table.clear()
+        _pruning_version[0] = _NodeMetaClass.version
+
+
+def _resolve_visitor_method(visitor_class, node_class, pruning=False):
+    for klass in node_class.__mro__:
+        name = "visit_" + klass.__name__
+        if hasattr(visitor_class, name):
+            break
+    else:
+        name = "generic_visit"
+
+    method = getattr(visitor_class, name)
+    if not isinstance(method, types.FunctionType):
+        # Like static methods; these are looked up on the visitor on each call
+        def method(self, node, name=name):
+            return getattr(self, name)(node)
+    elif name != "generic_visit" and inspect.isgeneratorfunction(method):
+        method = _get_hook_wrapper(method)
+    elif (
+        pruning and name == "generic_visit" and
+        issubclass(node_class, Node) and
+        not _visits_any(visitor_class, _get_descendant_classes(node_class))
+    ):
+        method = visitor_class._visit_pruned
+    return method
+
+
+def _visits_any(visitor_class, node_classes):
+    """Does the visitor have methods (other than `generic_visit`) for any of
+    the node classes?
+    """
+    table = _get_dispatch_table(visitor_class)
+    for node_class in node_classes:
+        try:
+            method = table[node_class]
+        except KeyError:
+            method = table[node_class] = (
+                _resolve_visitor_method(visitor_class, node_class)
+            )
+        if method not in _GENERIC_VISITS:
+            return True
+    return False
+
+
+# -----------------------------------------------------------------------------
+# Visitor methods that are generators (hooks)
+#    The code before the `yield` runs before the children of the node are
+#    visited and the code after it, after. The explicit stacks of the visitors
+#    hold the suspended generators, instead of the call stack holding frames.
+# -----------------------------------------------------------------------------
+_hook_wrappers = {}  # Generator function -> wrapper
+_hook_functions = {}  # Wrapper -> generator function
+
+
+def _get_hook_wrapper(function):
+    """Get a method that visits a node with the generator method `function`,
+    for visits of nodes from outside the visitor's traversal.
+    """
+    try:
+        return _hook_wrappers[function]
+    except KeyError:
+        pass
+
+    def wrapper(self, node):
+        generator = function(self, node)
+        yielded, value = _start_hook(generator)
+        if yielded:
+            self._visit_children(node)
+            value = _finish_hook(generator)
+        return value
+
+    _hook_functions[wrapper] = function
+    return _hook_wrappers.setdefault(function, wrapper)
+
+
+def _start_hook(generator):
+    """Run a hook up to it's yield.
+
+    Returns whether it yielded and the value it returned, if it did not.
+    """
+    try:
+        next(generator)
+    except StopIteration as e:
+        return False, e.value
+    return True, None
+
+
+def _finish_hook(generator):
+    """Run a hook that yielded to it's end and return the value it returned.
+    """
+    try:
+        next(generator)
+    except StopIteration as e:
+        return e.value
+    raise RuntimeError(
+        "{}() yielded more than once".format(generator.gi_code.co_name)
+    )
+
+
+# -----------------------------------------------------------------------------
+# Access paths, on demand
+#    Visitors walk trees with stacks of entries, which are (node, parent
+#    entry, field name, index, depth, ...) where depth is the length of the
+#    access path of the node. The entry of the node being visited (the
+#    cursor) is enough to build the access path, when it is asked for.
+# -----------------------------------------------------------------------------
+def _enter(node, cursor):
+    """Get the entry of a node whose children are to be visited.
+    """
+    if cursor is None:
+        return (node, None, None, None, 0)
+    elif cursor[0] is node:
+        return cursor
+    # Visited with `visit`, which does not extend the access path
+    return (node, cursor, None, None, cursor[4])
+
+
+def _get_access_path(entry):
+    path = []
+    while entry is not None:
+        parent, field, index = entry[1:4]
+        if field is not None:
+            path.append(_accesses[parent[0].__class__, field, index])
+        entry = parent
+    path.reverse()
+    return path
+
+
+def _shift_entry(entry, position):
+    """Get the entry of a node in a PassManager's walk, with the indices of it
+    and it's ancestors as they are for the pass at `position`.
+
+    The shifts of an entry are the (position of the pass, change) for the
+    nodes removed before it, in it's sequence; these change the indices of
+    nodes for the later passes, as they would be if run one after another.
+    """
+    chain = []
+    while entry is not None and entry[7] is not None:
+        chain.append(entry)
+        entry = entry[1]
+    for old in reversed(chain):
+        index = old[3]
+        for i, delta in old[7]:
+            if i < position:
+                index += delta
+        entry = (old[0], entry, old[2], index) + old[4:]
+    return entry
+
+
+def _track(path, entry):
+    """Update a tracked access path to that of the entry's node.
+    """
+    depth = entry[4]
+    if entry[2] is None:
+        del path[depth:]
+    else:
+        del path[depth - 1:]
+        path.append(_accesses[entry[1][0].__class__, entry[2], entry[3]])
+
+
 # -----------------------------------------------------------------------------
 # Base Class of NodeVisitors
 # -----------------------------------------------------------------------------
 class BaseNodeVisitor(object, metaclass=abc.ABCMeta):
     """A base class for NodeVisitors
+
+    A node is visited by the `visit_<name>` method for it's class (or the
+    closest base class that has one), or by `generic_visit`, which visits the
+    node's children. `visit_<name>` methods may be generators, which visit the
+    children of the node where they `yield` (once).
+
+    The children visited by `generic_visit` (and generator methods) are
+    walked with an explicit stack, so trees of any depth can be visited; only
+    other methods that call `generic_visit` use the call stack.
+
+    `access_path` is built when it is asked for. Visitors that use it for
+    most nodes should set `track_access_path`, to have it kept up to date
+    during the walk instead.
+
+    Visitors of Nodes that do not override `generic_visit` skip the sub-trees
+    which can't contain nodes that they have methods for (see `can_contain`).
     """
 
     # Serves as a stub when a function needs to return None
     NONE_DEPUTY = object()
+    track_access_path = False
 
     # Arguments allow reuse with similar but different Node systems.
     # For example, these visitors are compatible with `ast`, even though they
@@ -34,19 +279,48 @@ def __init__(self, base_class=Node, iter_fields=iter_fields):
         self.base_class = base_class
         self.iter_fields = iter_fields
 
-        # A Stack of Access which is used to provide current state to a visitor
-        self.access_path = []
+        # A Stack of Access, kept if access paths are tracked
+        self._access_path = []
+        # The entry of the node being visited
+        self._cursor = None
+        # Shared by all the instances of the visitor's class (that prune)
+        self._pruning = (
+            iter_fields is _iter_fields and issubclass(base_class, Node) and
+            self.__class__.generic_visit in _GENERIC_VISITS
+        )
+        self._dispatch_table = _get_dispatch_table(
+            self.__class__, self._pruning
+        )
+
+    @property
+    def access_path(self):
+        """The list of Access from the visited tree's root to the node being
+        visited, which is used to provide current state to a visitor
+        """
+        if self.track_access_path:
+            return self._access_path
+        return _get_access_path(self._cursor)
 
     def visit(self, node):
         """Visits a node.
         """
+        _check_pruning_tables()
         return self._visit(node)
 
     def _visit(self, node):
-        method = 'visit_' + node.__class__.__name__
-        visitor = getattr(self, method, self.generic_visit)
+        try:
+            method = self._dispatch_table[node.__class__]
+        except KeyError:
+            method = self._resolve(node.__class__)
+        return method(self, node)
 
-        return visitor(node)
+    def _resolve(self, node_class):
+        """Resolve the method that visits nodes of a class, for the table
+        """
+        method = self._dispatch_table[node_class] = _resolve_visitor_method(
+            self.__class__, node_class, self._pruning
+        )
+        return method
 
     @abc.abstractmethod
     def generic_visit(self, node):
@@ -56,11 +330,29 @@ def generic_visit(self, node):
     def _visit_children(self, node):  # coverage: not missing
         raise NotImplementedError()
 
-    def _visit_value(self, parent, field, value, index=None):
-        self.access_path.append(Access(parent.__class__, field, index))
-        val = self._visit(value)
-        self.access_path.pop()
-        return val
+    def _visit_pruned(self, node):
+        """Visits a node whose sub-tree is skipped
+        """
+
+    def merge(self, other):
+        """Merge what a copy of the visitor found, visiting other nodes, into
+        the visitor. It's used by `py2c.tree.parallel`; visitors that keep
+        what they find should override it.
+        """
+
+    def __getstate__(self):
+        # The dispatch table is shared by the visitor's class, and looked up
+        # again when unpickled.
+        state = self.__dict__.copy()
+        del state["_dispatch_table"]
+        state["_cursor"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._dispatch_table = _get_dispatch_table(
+            self.__class__, self._pruning
+        )
 
 
 # -----------------------------------------------------------------------------
@@ -74,19 +366,72 @@ def generic_visit(self, node):
         super().generic_visit(node)
 
     def _visit_children(self, node):
-        for field, value in self.iter_fields(node):
+        tracked_path = self._access_path if self.track_access_path else None
+        cursor = self._cursor
+        base_class = self.base_class
+        iter_fields = self.iter_fields
+        table = self._dispatch_table
+        generic_visit = RecursiveNodeVisitor.generic_visit
+
+        # Entries are of nodes to visit, or of hooks to resume (in place of
+        # the node)
+        stack = []
+        pop = stack.pop
+        expand = root = _enter(node, cursor)
+        try:
+            while True:
+                # Push the children of `expand`, in reverse to pop them in
+                # order
+                if expand is not None:
+                    depth = expand[4] + 1
+                    items = []
+                    for field, value in iter_fields(expand[0]):
+                        # Sequences are tuples in finalized trees
+                        if isinstance(value, (list, tuple)):
+                            for i, child in enumerate(value):
+                                if isinstance(child, base_class):
+                                    items.append(
+                                        (child, expand, field, i, depth)
+                                    )
+                        elif isinstance(value, base_class):
+                            items.append((value, expand, field, None, depth))
+                    items.reverse()
+                    stack.extend(items)
+                    expand = None
 
-            value = getattr(node, field, None)
+                if not stack:
+                    break
+                entry = pop()
+                value = entry[0]
+                if tracked_path is not None:
+                    _track(tracked_path, entry)
 
-            if isinstance(value, list):
-                self._visit_list(node, field, value)
-            elif isinstance(value, self.base_class):
-                self._visit_value(node, field, value)
+                if value.__class__ is _GeneratorType:
+                    self._cursor = entry
+                    _finish_hook(value)
+                    continue
+                try:
+                    method = table[value.__class__]
+                except KeyError:
+                    method = self._resolve(value.__class__)
+                if method is generic_visit:
+                    expand = entry
+                    continue
 
-    def _visit_list(self, node, field, original_list):
-        for i, value in enumerate(original_list):
-            if isinstance(value, self.base_class):
-                self._visit_value(node, field, value, i)
+                self._cursor = entry
+                function = _hook_functions.get(method)
+                if function is None:
+                    method(self, value)
+                    continue
+                generator = function(self, value)
+                if _start_hook(generator)[0]:
+                    stack.append((generator,) + entry[1:])
+                    expand = entry
+        finally:
+            # Also when a method raises, for the next visits
+            self._cursor = cursor
+            if tracked_path is not None:
+                del tracked_path[root[4]:]
 
 
 # TEST:: Write tests once I know how this is supposed to be used.
@@ -101,13 +446,34 @@ class RecursiveNodeTransformer(BaseNodeVisitor):
       2. `self.NONE_DEPUTY`: The node will be replaced with `None`
     Otherwise the node is replaced with the return value.
     The return value may be the original node in which case no replacement
-    takes place.
+    takes place. Nodes in lists may also be replaced with an iterable of
+    nodes, which are spliced into the list.
+
+    Like the visitor, the transformer walks the nodes in tuples as well as
+    lists, since the sequences of finalized trees are tuples. Lists are
+    changed in place, while a tuple is replaced with a new one (assigning it
+    to the field, which invalidates the finalized node) if it's nodes are.
+
+    Generator methods `return` the replacement after their `yield`.
+
+    After a visit, `changed` tells whether the tree was changed. Fields and
+    lists are only assigned to when their nodes are replaced by others.
 
     Based off `ast.NodeTransformer`
     """
 
+    changed = False
+    # (parent entry, replacement) for the nodes replaced, if they are kept
+    _changed_at = None
+
     def visit(self, node):
+        # Visits from within a visit change the tree through their caller
+        outermost = self._cursor is None
+        if outermost:
+            self.changed = False
         retval = super().visit(node)
+        if outermost and retval is not node:
+            self.changed = True
         if retval is self.NONE_DEPUTY:
             retval = None
         return retval
@@ -116,39 +482,799 @@ def generic_visit(self, node):
         super().generic_visit(node)
         return node
 
+    def _visit_pruned(self, node):
+        return node
+
     def _visit_children(self, node):
         """Visit all children of node.
         """
-        for field, old_value in self.iter_fields(node):
-            if isinstance(old_value, list):
-                self._visit_list(node, field, old_value)
-            elif isinstance(old_value, self.base_class):
-                new_node = self._visit_value(node, field, old_value)
+        tracked_path = self._access_path if self.track_access_path else None
+        cursor = self._cursor
+        base_class = self.base_class
+        iter_fields = self.iter_fields
+        table = self._dispatch_table
+        generic_visit = RecursiveNodeTransformer.generic_visit
+        replace = _replace
+        changed_at = []
 
-                if new_node is None:
-                    delattr(node, field)
-                else:
-                    if new_node is self.NONE_DEPUTY:
-                        new_node = None
+        # Entries are (node, parent entry, field, index, depth, location),
+        # with hooks to resume in place of the node, or (_SPLICE, ...,
+        # (parent, field, changes)) to splice the changes into a sequence. A
+        # location is (parent, field) or (changes, index) for the nodes in
+        # sequences.
+        stack = []
+        pop = stack.pop
+        expand = root = _enter(node, cursor)
+        try:
+            while True:
+                # Push the children of `expand`, in reverse to pop them in
+                # order
+                if expand is not None:
+                    parent = expand[0]
+                    depth = expand[4] + 1
+                    items = []
+                    for field, value in iter_fields(parent):
+                        # Sequences are tuples in finalized trees
+                        if isinstance(value, (list, tuple)):
+                            changes = None
+                            for i, child in enumerate(value):
+                                if isinstance(child, base_class):
+                                    if changes is None:
+                                        changes = _Changes(value)
+                                    items.append((
+                                        child, expand, field, i, depth,
+                                        (changes, i)
+                                    ))
+                            if changes is not None:
+                                items.append((
+                                    _SPLICE, None, None, None, None,
+                                    (parent, field, changes)
+                                ))
+                        elif isinstance(value, base_class):
+                            items.append((
+                                value, expand, field, None, depth,
+                                (parent, field)
+                            ))
+                    stack.extend(reversed(items))
+                    expand = None
 
-                    setattr(node, field, new_node)
+                if not stack:
+                    break
+                entry = pop()
+                value = entry[0]
+                if value is _SPLICE:
+                    _splice_field(*entry[5], base_class=base_class)
+                    continue
+                if tracked_path is not None:
+                    _track(tracked_path, entry)
 
-    # Moved out of '_visit_children' for readability
-    def _visit_list(self, node, field, original_list):
-        new_list = []
-        for i, value in enumerate(original_list):
-            if isinstance(value, self.base_class):
-                value = self._visit_value(node, field, value, i)
+                if value.__class__ is _GeneratorType:
+                    self._cursor = entry
+                    retval = _finish_hook(value)
+                    if replace(entry[5], retval):
+                        changed_at.append((entry[1], retval))
+                    continue
+                try:
+                    method = table[value.__class__]
+                except KeyError:
+                    method = self._resolve(value.__class__)
+                if method is generic_visit:
+                    expand = entry
+                    continue
 
-                if value is None:
+                self._cursor = entry
+                function = _hook_functions.get(method)
+                if function is None:
+                    retval = method(self, value)
+                    if replace(entry[5], retval):
+                        changed_at.append((entry[1], retval))
                     continue
-                elif value is self.NONE_DEPUTY:
-                    # This is invalid in this py2c.tree system
-                    value = None  # coverage: not missing
-                elif isinstance(value, collections.Iterable):
-                    new_list.extend(value)
+                generator = function(self, value)
+                yielded, retval = _start_hook(generator)
+                if yielded:
+                    stack.append((generator,) + entry[1:])
+                    expand = entry
+                elif replace(entry[5], retval):
+                    changed_at.append((entry[1], retval))
+        finally:
+            # Also when a method raises, for the next visits
+            self._cursor = cursor
+            if changed_at:
+                self.changed = True
+                if self._changed_at is not None:
+                    self._changed_at.extend(changed_at)
+            if tracked_path is not None:
+                del tracked_path[root[4]:]
+
+
+# -----------------------------------------------------------------------------
+# Replacement of nodes by transformers
+#    Fields are only assigned to (which validates the value) when their node
+#    is replaced by another. The replacements of the nodes in a sequence are
+#    kept aside until all of them are visited, and only those that differ
+#    from the original nodes; the sequences without any are left alone.
+# -----------------------------------------------------------------------------
+class _Changes(dict):
+    """The replacements of the nodes in a sequence, by their index
+    """
+    # shifts: (index, position of the pass, change in the length of the
+    # sequence) for the nodes removed (or replaced with many) in a
+    # PassManager, or None
+    __slots__ = ("original", "shifts")
+
+    def __init__(self, original):
+        super().__init__()
+        self.original = original
+        self.shifts = None
+
+
+def _replace(location, new_node):
+    """Put the return value of a visitor method at the visited location.
+
+    Returns whether it's a change.
+    """
+    parent, field = location
+    if parent.__class__ is _Changes:
+        # Spliced in, once all the nodes in the sequence are visited
+        if new_node is parent.original[field]:
+            return False
+        parent[field] = new_node
+    elif new_node is None:
+        delattr(parent, field)
+    else:
+        if new_node is BaseNodeVisitor.NONE_DEPUTY:
+            new_node = None
+        if new_node is getattr(parent, field):
+            return False
+        setattr(parent, field, new_node)
+    return True
+
+
+def _splice(changes, base_class):
+    """Splice the changes into the list they are of.
+    """
+    original_list = changes.original
+    for value in changes.values():
+        if not isinstance(value, base_class):
+            original_list[:] = _get_spliced(changes)
+            return
+    # Only nodes replaced by nodes, which is done in place
+    for i, value in changes.items():
+        original_list[i] = value
+
+
+def _splice_field(parent, field, changes, base_class):
+    """Splice the changes into the sequence in a field of `parent`.
+
+    Lists are changed in place, tuples (of finalized trees) are replaced.
+    """
+    if not changes:
+        return
+    if isinstance(changes.original, list):
+        _splice(changes, base_class)
+    else:
+        setattr(parent, field, tuple(_get_spliced(changes)))
+
+
+def _get_spliced(changes):
+    """Get the elements of a sequence once the changes are spliced in
+    """
+    new_list = []
+    get = changes.get
+    for i, old in enumerate(changes.original):
+        value = get(i, old)
+        if value is old:
+            pass
+        elif value is None:
+            continue
+        elif value is BaseNodeVisitor.NONE_DEPUTY:
+            # This is invalid in this py2c.tree system
+            value = None  # coverage: not missing
+        elif isinstance(value, collections.Iterable):
+            new_list.extend(value)
+            continue
+
+        new_list.append(value)
+    return new_list
+
+
+# -----------------------------------------------------------------------------
+# Running many visitors in one walk
+# -----------------------------------------------------------------------------
+_GENERIC_VISITS = (
+    RecursiveNodeVisitor.generic_visit, RecursiveNodeTransformer.generic_visit
+)
+
+
+class PassManager(object):
+    """Runs visitors and transformers (passes) in a single walk of a tree.
+
+    Each node is dispatched to the passes in the order they were given, and
+    visited as if the passes were run one after another: when a transformer
+    replaces a node, the passes before it walk the children of the node they
+    were given and the passes after it walk the replacement (with the access
+    paths they would have). Nodes that are removed (or replaced with a list
+    of nodes) are not visited by the later passes. The later passes are done
+    with a node by the time code after the `yield` of a transformer's
+    generator replaces it, so they don't visit the replacement; that code
+    can not replace a node already replaced by a later pass either.
+
+    Nodes are visited by a pass in the shared walk while it's methods for
+    them are `generic_visit` or generators; the code after the `yield` of the
+    generators runs once every pass is done with the node's children. Other
+    methods are left to visit the children of their node on their own (by
+    calling `generic_visit`), as they would if the pass was run by itself;
+    such methods (and ones looking at the children of their node, which the
+    earlier passes may not have changed yet) can't be run exactly like one
+    pass after another.
+
+    The `visit` methods of the passes are not called. All the passes should
+    have the same `base_class` and `iter_fields`. After a visit, `changed`
+    tells whether any transformer changed the tree, as does the `changed` of
+    each transformer for it's own changes.
+    """
+
+    def __init__(self, passes):
+        super().__init__()
+        self.passes = list(passes)
+
+        tree_kinds = set((p.base_class, p.iter_fields) for p in self.passes)
+        if len(tree_kinds) > 1:
+            raise ValueError("Passes should visit the same kind of nodes")
+        if tree_kinds:
+            self.base_class, self.iter_fields = tree_kinds.pop()
+        else:
+            self.base_class, self.iter_fields = Node, iter_fields
+        # The passes that track access paths share one
+        self.track_access_path = any(
+            p.track_access_path for p in self.passes
+        )
+        self._access_path = []
+        self._groups = {}
+        self.changed = False
+
+    def visit(self, node):
+        """Visit a node with all the passes.
+
+        Returns the node, or what it was replaced with by the transformers.
+        """
+        _check_pruning_tables()
+        root = _Changes([node])
+        access_paths = [p._access_path for p in self.passes]
+        for visitor in self.passes:
+            visitor._access_path = self._access_path
+            if isinstance(visitor, RecursiveNodeTransformer):
+                visitor.changed = False
+        try:
+            self._walk(node, (root, 0))
+        finally:
+            for visitor, access_path in zip(self.passes, access_paths):
+                visitor._access_path = access_path
+                visitor._cursor = None
+            self.changed = any(
+                visitor.changed for visitor in self.passes
+                if isinstance(visitor, RecursiveNodeTransformer)
+            )
+            del self._access_path[:]
+        retval = root.get(0, node)
+        if retval is BaseNodeVisitor.NONE_DEPUTY:
+            retval = None
+        return retval
+
+    def _walk(self, root, location):
+        tracked_path = self._access_path if self.track_access_path else None
+        base_class = self.base_class
+        iter_fields = self.iter_fields
+        passes = [
+            (
+                visitor, visitor._dispatch_table,
+                isinstance(visitor, RecursiveNodeTransformer)
+            )
+            for visitor in self.passes
+        ]
+        get_group = self._get_group
+        set_cursor = self._set_cursor
+
+        # Entries are (node, parent entry, field, index, depth, location,
+        # group, shifts), with the group of passes walking the node. (_RESUME,
+        # ..., (node, hooks, in tree), shifts) finishes the hooks started on
+        # the node and (_SPLICE, ..., (parent, field, changes), None, None)
+        # splices the changes into a sequence. Locations are like in
+        # RecursiveNodeTransformer. Shifts are None, unless the index of the
+        # node or an ancestor differs between the passes (see _shift_entry).
+        stack = [
+            (
+                root, None, None, None, 0, location,
+                get_group(range(len(passes))), None
+            )
+        ]
+        pop = stack.pop
+        while stack:
+            entry = pop()
+            node, location, group = entry[0], entry[5], entry[6]
+            if node is _SPLICE:
+                _splice_field(*location, base_class=base_class)
+                continue
+            if tracked_path is not None:
+                _track(tracked_path, entry)
+
+            if node is _RESUME:
+                node, hooks, in_tree = group
+                original = node
+                for i, generator in hooks:
+                    visitor, _, transforms = passes[i]
+                    set_cursor(visitor, i, entry)
+                    retval = _finish_hook(generator)
+                    # A node replaced by a later pass is no longer in the tree
+                    if (
+                        in_tree and transforms and retval is not node and
+                        isinstance(node, base_class)
+                    ):
+                        visitor.changed = True
+                        node = self._record_shift(location, i, retval)
+                if node is not original:
+                    _replace(location, node)
+                continue
+
+            # The nodes after the ones a transformer removed from a sequence
+            # have other indices for the passes after it.
+            changes = location[0]
+            if changes.__class__ is _Changes and changes.shifts:
+                entry = entry[:7] + (tuple(
+                    (i, delta) for index, i, delta in changes.shifts
+                    if index < location[1]
+                ),)
+
+            walking, generic_classes, splices = group
+            if node.__class__ not in generic_classes:
+                # Dispatch the node to the passes walking it. The passes
+                # before a transformer that replaces the node walk the node
+                # they were given, while the ones after it walk the
+                # replacement; the earlier ones are (entry, still walking,
+                # hooks) for the passes before each replacement.
+                original = node
+                earlier = None
+                still_walking = []
+                hooks = []
+                for i in walking:
+                    visitor, table, transforms = passes[i]
+                    try:
+                        method = table[node.__class__]
+                    except KeyError:
+                        method = visitor._resolve(node.__class__)
+                    if method in _GENERIC_VISITS:
+                        still_walking.append(i)
+                        continue
+
+                    shifted = entry[7] is not None
+                    if shifted:
+                        set_cursor(visitor, i, entry)
+                    else:
+                        visitor._cursor = entry
+                    function = _hook_functions.get(method)
+                    if function is None:
+                        retval = method(visitor, node)
+                    else:
+                        generator = function(visitor, node)
+                        yielded, retval = _start_hook(generator)
+                        if yielded:
+                            still_walking.append(i)
+                            hooks.append((i, generator))
+                            continue
+                    if shifted:
+                        visitor._access_path = self._access_path
+                    if transforms and retval is not node:
+                        visitor.changed = True
+                        if earlier is None:
+                            earlier = []
+                        earlier.append((entry, still_walking, hooks))
+                        still_walking, hooks = [], []
+                        node = self._record_shift(location, i, retval)
+                        if not isinstance(node, base_class):
+                            # Removed, or replaced with many nodes
+                            break
+                        entry = (node,) + entry[1:]
+
+                if node is not original:
+                    _replace(location, node)
+                if earlier is not None:
+                    # Walked after the replacement, as they are pushed later
+                    for k in range(len(earlier) - 1, -1, -1):
+                        self._push_segment(stack, earlier[k], group, False)
+                    if not isinstance(node, base_class):
+                        continue
+                if hooks:
+                    stack.append(
+                        (_RESUME,) + entry[1:6] + ((node, hooks, True),) +
+                        entry[7:]
+                    )
+                if not still_walking:
                     continue
+                if len(still_walking) != len(walking):
+                    group = get_group(still_walking)
+                    splices = group[2]
+                elif not hooks and node is original:
+                    # Every pass visits nodes of the class with generic_visit
+                    generic_classes.add(node.__class__)
+
+            # Push the children of the node, in reverse to pop them in order.
+            # The children of a node with shifts have shifts too.
+            depth = entry[4] + 1
+            shifts = None if entry[7] is None else ()
+            items = []
+            for field, value in iter_fields(node):
+                if isinstance(value, (list, tuple)):
+                    # Only transformers change the nodes in sequences
+                    changes = _Changes(value) if splices else None
+                    count = len(items)
+                    for i, child in enumerate(value):
+                        if isinstance(child, base_class):
+                            items.append((
+                                child, entry, field, i, depth,
+                                (changes, i), group, shifts
+                            ))
+                    if splices and len(items) != count:
+                        items.append((
+                            _SPLICE, None, None, None, None,
+                            (node, field, changes), None, None
+                        ))
+                elif isinstance(value, base_class):
+                    items.append((
+                        value, entry, field, None, depth, (node, field),
+                        group, shifts
+                    ))
+            stack.extend(reversed(items))
+
+        if tracked_path is not None:
+            del tracked_path[:]
+
+    def _push_segment(self, stack, segment, group, in_tree):
+        """Push the walk of a node by the passes before a transformer that
+        replaced it, which is like the walk of the other nodes in _walk.
+        """
+        entry, still_walking, hooks = segment
+        if hooks:
+            stack.append(
+                (_RESUME,) + entry[1:6] + ((entry[0], hooks, in_tree),) +
+                entry[7:]
+            )
+        if not still_walking:
+            return
+        if len(still_walking) != len(group[0]):
+            group = self._get_group(still_walking)
+        self._push_children(stack, entry, group)
 
-            new_list.append(value)
+    def _set_cursor(self, visitor, position, entry):
+        """Set the cursor of the pass at `position` to an entry, with the
+        indices it would have if the passes were run one after another.
+        """
+        if entry[7] is None:
+            visitor._cursor = entry
+            visitor._access_path = self._access_path
+            return
+        cursor = visitor._cursor = _shift_entry(entry, position)
+        if visitor.track_access_path:
+            visitor._access_path = _get_access_path(cursor)
+
+    def _record_shift(self, location, position, retval):
+        """Record how the pass at `position` replacing a node in a sequence
+        shifts the nodes after it, for the later passes.
+
+        Returns the replacement, with iterables made into lists.
+        """
+        changes, index = location
+        if changes.__class__ is not _Changes:
+            return retval
+        if retval is None:
+            delta = -1
+        elif (
+            retval is BaseNodeVisitor.NONE_DEPUTY or
+            isinstance(retval, self.base_class)
+        ):
+            return retval
+        else:
+            retval = list(retval)
+            delta = len(retval) - 1
+        if delta:
+            if changes.shifts is None:
+                changes.shifts = []
+            changes.shifts.append((index, position, delta))
+        return retval
+
+    def _push_children(self, stack, entry, group):
+        """Push the entries of the children of an entry's node, walked by a
+        group of passes, like _walk does.
+        """
+        base_class = self.base_class
+        splices = group[2]
+        node = entry[0]
+        depth = entry[4] + 1
+        shifts = None if entry[7] is None else ()
+        items = []
+        for field, value in self.iter_fields(node):
+            if isinstance(value, (list, tuple)):
+                changes = _Changes(value) if splices else None
+                count = len(items)
+                for i, child in enumerate(value):
+                    if isinstance(child, base_class):
+                        items.append((
+                            child, entry, field, i, depth, (changes, i), group,
+                            shifts
+                        ))
+                if splices and len(items) != count:
+                    items.append((
+                        _SPLICE, None, None, None, None,
+                        (node, field, changes), None, None
+                    ))
+            elif isinstance(value, base_class):
+                items.append((
+                    value, entry, field, None, depth, (node, field), group,
+                    shifts
+                ))
+        stack.extend(reversed(items))
+
+    def _get_group(self, walking):
+        """Get the group for passes walking a node, which is (their indices,
+        the node classes that they all visit with generic_visit, whether any
+        of them is a transformer).
+        """
+        walking = tuple(walking)
+        try:
+            return self._groups[walking]
+        except KeyError:
+            pass
+        splices = any(
+            isinstance(self.passes[i], RecursiveNodeTransformer)
+            for i in walking
+        )
+        return self._groups.setdefault(walking, (walking, set(), splices))
+
+
+
+# -----------------------------------------------------------------------------
+# Rewriting trees until they stop changing
+# -----------------------------------------------------------------------------
+class FixpointRewriter(object):
+    """Runs a transformer (the rewrite rules) on a tree until it changes
+    nothing.
+
+    The first round visits the whole tree. Each later round only visits the
+    nodes put in the tree by the round before it (and their sub-trees), and
+    then applies the rules again to the ancestors of the changes, without
+    walking their other children.
+
+    Changes are seen through the replacements returned by the transformer's
+    methods; nodes changed in place by them are not visited again for it.
+    After `rewrite`, `rounds` is the number of rounds run (including the last
+    one, which changed nothing) and `revisited` is the number of nodes that
+    the rounds after the first visited again.
+    """
+
+    def __init__(self, transformer, max_rounds=None):
+        super().__init__()
+        self.transformer = transformer
+        self.max_rounds = max_rounds
+        self.rounds = 0
+        self.revisited = 0
+        self._root = None
+
+    def rewrite(self, node):
+        """Rewrite a tree until it stops changing.
+
+        Returns the node, or what it was replaced with.
+        """
+        _check_pruning_tables()
+        transformer = self.transformer
+        changed_at = transformer._changed_at = []
+        self._root = node
+        self.rounds = self.revisited = 0
+        try:
+            changes = [(None, node)]
+            # Until nothing changes, or the root is removed
+            while changes and self._root is not None:
+                if self.rounds == self.max_rounds:
+                    raise RuntimeError(
+                        "Rewriting did not stop in {} rounds".format(
+                            self.max_rounds
+                        )
+                    )
+                self.rounds += 1
+                self._run_round(changes)
+                changes = changed_at[:]
+                del changed_at[:]
+        finally:
+            transformer._changed_at = None
+            transformer._cursor = None
+            del transformer._access_path[:]
+
+        node, self._root = self._root, None
+        return node
+
+    def _run_round(self, changes):
+        """Visit the replacements made by the previous round, and apply the
+        rules to the ancestors of the changes.
+        """
+        base_class = self.transformer.base_class
+        # The entries from the previous round are made again, since their
+        # nodes may have moved (or been removed) since.
+        relocated = {}
+        sub_trees = []
+        parents = []
+        for parent, replacement in changes:
+            if parent is None:
+                if replacement is self._root and replacement is not None:
+                    sub_trees.append((replacement, None, None, None, 0))
+                continue
+            parent = self._relocate(parent, relocated)
+            if parent is None:
+                continue
+            parents.append(parent)
+
+            if isinstance(replacement, base_class):
+                replacements = [replacement]
+            elif isinstance(replacement, (list, tuple)):
+                replacements = replacement
+            elif (
+                replacement is None or
+                replacement is BaseNodeVisitor.NONE_DEPUTY
+            ):
+                replacements = []
+            else:
+                # An iterable that was consumed when spliced
+                sub_trees.append(parent)
+                continue
+            for node in replacements:
+                location = self._locate(parent[0], node)
+                if location is not None:
+                    sub_trees.append(
+                        (node, parent) + location + (parent[4] + 1,)
+                    )
+
+        # Sub-trees inside others are visited with them
+        roots = set(id(entry[0]) for entry in sub_trees)
+        visiting = []
+        seen = set()
+        for entry in sub_trees:
+            parent = entry[1]
+            while parent is not None and id(parent[0]) not in roots:
+                parent = parent[1]
+            if parent is None and id(entry[0]) not in seen:
+                seen.add(id(entry[0]))
+                visiting.append(entry)
+
+        # The ancestors outside of the sub-trees visited
+        ancestors = {}
+        inside = set()
+        for parent in [entry[1] for entry in visiting] + parents:
+            path = []
+            while parent is not None and id(parent[0]) not in ancestors:
+                if id(parent[0]) in roots or id(parent[0]) in inside:
+                    inside.update(id(entry[0]) for entry in path)
+                    break
+                path.append(parent)
+                parent = parent[1]
+            else:
+                ancestors.update((id(entry[0]), entry) for entry in path)
+
+        counting = self.rounds > 1
+        for entry in visiting:
+            if counting:
+                self.revisited += self._count_nodes(entry[0])
+            self._visit_at(entry, self.transformer._visit)
+        # The deepest ones first, as when walking the tree
+        for entry in sorted(ancestors.values(), key=lambda e: -e[4]):
+            if counting:
+                self.revisited += 1
+            self._visit_at(entry, self._apply_rules)
+
+    def _visit_at(self, entry, visit):
+        """Visit the node of an entry with `visit`, and put it's replacement
+        in it's place.
+        """
+        transformer = self.transformer
+        node = entry[0]
+        if transformer.track_access_path:
+            transformer._access_path[:] = _get_access_path(entry)
+        transformer._cursor = entry
+        retval = visit(node)
+        transformer._cursor = None
+        if retval is node:
+            return
+
+        parent = entry[1]
+        if parent is None:
+            if retval is BaseNodeVisitor.NONE_DEPUTY:
+                retval = None
+            self._root = retval
+        else:
+            # The indices of nodes in lists change as others are replaced
+            field, index = self._locate(parent[0], node)
+            if index is None:
+                _replace((parent[0], field), retval)
+            else:
+                changes = _Changes(getattr(parent[0], field))
+                _replace((changes, index), retval)
+                _splice_field(
+                    parent[0], field, changes, transformer.base_class
+                )
+        transformer._changed_at.append((parent, retval))
+
+    def _apply_rules(self, node):
+        """Visit a node with the transformer, without walking it's children.
+        """
+        transformer = self.transformer
+        try:
+            method = transformer._dispatch_table[node.__class__]
+        except KeyError:
+            method = transformer._resolve(node.__class__)
+        if (
+            method in _GENERIC_VISITS or
+            method is transformer.__class__._visit_pruned
+        ):
+            return node
+
+        function = _hook_functions.get(method)
+        if function is None:
+            return method(transformer, node)
+        generator = function(transformer, node)
+        yielded, retval = _start_hook(generator)
+        if yielded:
+            retval = _finish_hook(generator)
+        return retval
+
+    def _relocate(self, entry, relocated):
+        """Get an entry for the node of an entry from the previous round, with
+        it's current location, or None if it's no longer in the tree.
+        """
+        chain = []
+        while entry is not None and id(entry[0]) not in relocated:
+            chain.append(entry)
+            entry = entry[1]
+        if entry is None:
+            node = chain.pop()[0]
+            if node is self._root:
+                entry = (node, None, None, None, 0)
+            relocated[id(node)] = entry
+        else:
+            entry = relocated[id(entry[0])]
+
+        for old_entry in reversed(chain):
+            node = old_entry[0]
+            if entry is not None:
+                location = self._locate(entry[0], node)
+                if location is None:
+                    entry = None
+                else:
+                    entry = (node, entry) + location + (entry[4] + 1,)
+            relocated[id(node)] = entry
+        return entry
+
+    def _locate(self, parent, node):
+        """Get the (field, index) of a node in the fields of it's parent.
+        """
+        for field, value in self.transformer.iter_fields(parent):
+            if value is node:
+                return field, None
+            elif isinstance(value, (list, tuple)):
+                for i, child in enumerate(value):
+                    if child is node:
+                        return field, i
+        return None
 
-        original_list[:] = new_list
+    def _count_nodes(self, node):
+        base_class = self.transformer.base_class
+        iter_fields = self.transformer.iter_fields
+        count = 0
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            count += 1
+            for _, value in iter_fields(node):
+                if isinstance(value, (list, tuple)):
+                    stack.extend(
+                        child for child in value
+                        if isinstance(child, base_class)
+                    )
+                elif isinstance(value, base_class):
+                    stack.append(value)
+        return count
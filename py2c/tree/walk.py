@@ -0,0 +1,144 @@
+"""Walking of Node trees with generators
+
+Like `ast.walk`, but the nodes can be filtered by class, given with their
+access paths and walked in pre-order, post-order or breadth first. Nodes are
+yielded as they are reached, walking with explicit stacks (or a queue)
+instead of recursion or intermediate lists; so large and deep trees can be
+streamed over.
+"""
+
+import collections
+
+from py2c.tree import Node, _get_schema, _get_descendant_classes
+from py2c.tree.visitors import _get_access_path
+
+__all__ = ["walk", "iter_child_nodes"]
+
+_SEQUENCE_TYPES = (list, tuple)
+_MISSING = object()
+
+
+# -----------------------------------------------------------------------------
+# Helpers
+#    Nodes are walked as entries, which are (node, parent entry, field name,
+#    index) like those of the visitors, so that the access path of a node can
+#    be built from it's entry when it is asked for.
+# -----------------------------------------------------------------------------
+def _iter_child_entries(entry):
+    node = entry[0]
+    for name in _get_schema(node.__class__).names:
+        value = getattr(node, name, _MISSING)
+        if isinstance(value, Node):
+            yield (value, entry, name, None)
+        elif isinstance(value, _SEQUENCE_TYPES):
+            for index, item in enumerate(value):
+                if isinstance(item, Node):
+                    yield (item, entry, name, index)
+
+
+def _get_pruner(types):
+    """Get a function telling if the sub-trees of nodes of a class can't
+    contain nodes of `types`, going by the types of the fields.
+    """
+    pruned = {}
+
+    def is_pruned(node_class):
+        try:
+            return pruned[node_class]
+        except KeyError:
+            value = pruned[node_class] = not any(
+                issubclass(cls, types)
+                for cls in _get_descendant_classes(node_class)
+            )
+            return value
+    return is_pruned
+
+
+def _enter(entry, is_pruned):
+    """Get an iterator over the entries of the children of an entry's node.
+    """
+    if is_pruned is not None and is_pruned(entry[0].__class__):
+        return iter(())
+    return _iter_child_entries(entry)
+
+
+def _walk_pre_order(root, is_pruned):
+    yield root
+    stack = [_enter(root, is_pruned)]
+    while stack:
+        for entry in stack[-1]:
+            yield entry
+            stack.append(_enter(entry, is_pruned))
+            break
+        else:
+            stack.pop()
+
+
+def _walk_post_order(root, is_pruned):
+    stack = [(root, _enter(root, is_pruned))]
+    while stack:
+        for entry in stack[-1][1]:
+            stack.append((entry, _enter(entry, is_pruned)))
+            break
+        else:
+            yield stack.pop()[0]
+
+
+def _walk_breadth_first(root, is_pruned):
+    queue = collections.deque([root])
+    while queue:
+        entry = queue.popleft()
+        yield entry
+        queue.extend(_enter(entry, is_pruned))
+
+
+_WALKERS = {
+    "pre": _walk_pre_order,
+    "post": _walk_post_order,
+    "bfs": _walk_breadth_first,
+}
+
+
+# -----------------------------------------------------------------------------
+# API
+# -----------------------------------------------------------------------------
+def iter_child_nodes(node):
+    """Yield the nodes that are the direct children of `node`, in the order
+    of it's fields.
+    """
+    for entry in _iter_child_entries((node, None, None, None)):
+        yield entry[0]
+
+
+def walk(node, types=None, with_path=False, order="pre"):
+    """Get an iterator over the nodes in the tree of `node` (including it).
+
+    If `types` is given (a class or tuple of classes, like for isinstance),
+    only the nodes of those are yielded; sub-trees that can't contain them,
+    going by the types of the fields, are skipped. If `with_path` is true,
+    (access path, node) pairs are yielded; the access path being a list of
+    Access, like for visitors.
+
+    `order` is one of "pre" (parents before their children), "post"
+    (children before their parents) or "bfs" (breadth first). The walks in
+    pre-order and post-order keep one iterator per level of the tree; the
+    breadth first walk keeps the nodes of (up to) two levels. The tree should
+    not be changed while it's walked.
+    """
+    try:
+        walker = _WALKERS[order]
+    except KeyError:
+        raise ValueError("Unknown order of walking: {!r}".format(order))
+
+    if types is None:
+        entries = walker((node, None, None, None), None)
+    else:
+        entries = (
+            entry
+            for entry in walker((node, None, None, None), _get_pruner(types))
+            if isinstance(entry[0], types)
+        )
+
+    if with_path:
+        return ((_get_access_path(entry), entry[0]) for entry in entries)
+    return (entry[0] for entry in entries)